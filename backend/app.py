@@ -3,14 +3,23 @@
 from flask import Flask, request, jsonify, send_from_directory
 from extensions import db
 from models import User, Task
-from background_tasks import enqueue_audio_processing
+from task_queue import upgrade_schema
+from background_tasks import enqueue_audio_processing, get_queue_stats, get_component_stats, get_worker_pool, QueueFullError
+from scheduler import PRIORITY_LANES, DEFAULT_PRIORITY
+from audio_sessions import get_session_manager, decode_chunk, SessionError
+from utils.audio_processing import encode_pcm_wav
+from emergency import send_emergency_alert
+from health import readiness, start_warmup
+import metrics
 import os
+import uuid
 import logging
 from logging.handlers import RotatingFileHandler
 from functools import wraps
 import json
 from datetime import datetime
 from flask_cors import CORS
+from werkzeug.utils import secure_filename
 
 
 
@@ -216,30 +225,12 @@ def create_app():
             app.logger.warning(f"User with ID {user_id} not found")
             return jsonify({'error': 'User not found'}), 404
 
-        # Generate emergency message
-        emergency_message = generate_emergency_message(user)
+        # Generate and send the emergency message (shared with the spoken-keyword fast path)
+        emergency_message = send_emergency_alert(user, source='panic-button')
 
-        # Simulate sending an emergency message (for now, just log it)
-        app.logger.info(f"Emergency message: {emergency_message}")
-
-        # In the future, this could send an SMS, email, or a real-time notification to a nurse.
         # For now, just return the emergency message
         return jsonify({'message': 'Emergency alert triggered', 'emergency_message': emergency_message}), 200
 
-####function to generate emergency message
-    def generate_emergency_message(user):
-        """
-        Generate an emergency message containing the user's relevant information.
-        This message can later be sent to a nurse or notification system.
-        """
-        return f"EMERGENCY ALERT! \n" \
-               f"User: {user.first_name} {user.last_name}\n" \
-               f"Room: {user.room_number}\n" \
-               f"Device Status: {user.device_status or 'N/A'}\n" \
-               f"IP Address: {user.IP_address or 'N/A'}\n" \
-               f"Phone Number: {user.phone_number or 'N/A'}\n" \
-               f"Emergency Contact: {user.emergency_contact or 'N/A'}"
-
 #### fall detection
     @app.route('/fall-detection', methods=['POST'])
     @require_api_key
@@ -288,6 +279,56 @@ def create_app():
                f"Phone Number: {user.phone_number or 'N/A'}\n" \
                f"Emergency Contact: {user.emergency_contact or 'N/A'}"
 
+    # ----------------------- Audio Task Helpers -----------------------
+
+    def read_task_options(form):
+        """
+        user_id, priority and asr_profile of an audio request. Returns ((user_id, priority,
+        asr_profile), None), or (None, error response) when one is missing or invalid.
+        """
+        user_id = form.get('user_id')
+        if not user_id:
+            app.logger.warning("user_id not provided in the audio request")
+            return None, (jsonify({'error': 'user_id is required'}), 400)
+        try:
+            user_id = int(user_id)
+        except ValueError:
+            app.logger.warning("Invalid user_id format provided")
+            return None, (jsonify({'error': 'user_id must be an integer'}), 400)
+
+        # Optional scheduling lane, e.g. set by the device when the resident pressed an alert key
+        priority = form.get('priority', DEFAULT_PRIORITY).strip().lower()
+        if priority not in PRIORITY_LANES:
+            app.logger.warning(f"Invalid priority provided: {priority}")
+            return None, (jsonify({'error': f"priority must be one of {', '.join(PRIORITY_LANES)}"}), 400)
+
+        # Optional Whisper decoding profile, e.g. 'fast' or 'accurate'
+        asr_profile = form.get('asr_profile', app.config['ASR_DEFAULT_PROFILE']).strip().lower()
+        if asr_profile not in app.config['ASR_PROFILES']:
+            app.logger.warning(f"Invalid asr_profile provided: {asr_profile}")
+            return None, (jsonify({'error': f"asr_profile must be one of {', '.join(app.config['ASR_PROFILES'])}"}), 400)
+        return (user_id, priority, asr_profile), None
+
+    def enqueue_task(user_id, priority, asr_profile, audio_file_path=None, audio_data=None, transcript=None,
+                     partial_transcript=None):
+        """
+        Queue an audio task. Returns (task_id, None), or (None, 503 response with Retry-After)
+        when the queue is full, in which case audio_file_path is removed.
+        """
+        try:
+            task_id = enqueue_audio_processing(user_id=user_id, audio_file_path=audio_file_path, app=app,
+                                               priority=priority, transcript=transcript, audio_data=audio_data,
+                                               asr_profile=asr_profile, partial_transcript=partial_transcript)
+        except QueueFullError as e:
+            if audio_file_path:
+                os.remove(audio_file_path)
+            app.logger.warning("Audio processing queue is full, rejecting request")
+            response = jsonify({'error': 'Audio processing queue is full, please retry later',
+                                'queue': get_queue_stats(app)})
+            response.headers['Retry-After'] = str(e.retry_after)
+            return None, (response, 503)
+        return task_id, None
+
     # ----------------------- Audio Processing Route -----------------------
 
     @app.route('/process-audio', methods=['POST'])
@@ -310,33 +351,160 @@ def create_app():
 
         # Check if the file is allowed (optional)
         if audio_file and allowed_file(audio_file.filename):
-            # Get user_id from request form
-            user_id = request.form.get('user_id')
-            if not user_id:
-                app.logger.warning("user_id not provided in the audio processing request")
-                return jsonify({'error': 'user_id is required'}), 400
-            try:
-                user_id = int(user_id)
-            except ValueError:
-                app.logger.warning("Invalid user_id format provided")
-                return jsonify({'error': 'user_id must be an integer'}), 400
-
-            # Save the audio file to the temp directory
-            temp_dir = app.config['TEMP_DIR']
-            os.makedirs(temp_dir, exist_ok=True)
-            file_path = os.path.join(temp_dir, audio_file.filename)
-            audio_file.save(file_path)
-            app.logger.info(f"Saved audio file to {file_path}")
-
-            # Enqueue the background task, passing the app instance
-            task_id = enqueue_audio_processing(user_id=user_id, audio_file_path=file_path, app=app)
+            options, error = read_task_options(request.form)
+            if error:
+                return error
+
+            # Keep the upload in memory (and in the task row) unless it is too large, in which
+            # case it goes to the temp directory under a unique name
+            audio_file.stream.seek(0, os.SEEK_END)
+            size = audio_file.stream.tell()
+            audio_file.stream.seek(0)
+            file_path, audio_data = None, None
+            if size > app.config['AUDIO_SPILL_BYTES']:
+                temp_dir = app.config['TEMP_DIR']
+                os.makedirs(temp_dir, exist_ok=True)
+                file_path = os.path.join(temp_dir, f"{uuid.uuid4()}_{secure_filename(audio_file.filename)}")
+                audio_file.save(file_path)
+                app.logger.info(f"Saved {size} byte audio file to {file_path}")
+            else:
+                audio_data = audio_file.read()
+
+            # Enqueue the background task
+            task_id, error = enqueue_task(*options, audio_file_path=file_path, audio_data=audio_data)
+            if error:
+                return error
             app.logger.info(f"Enqueued audio processing task with ID {task_id}")
 
-            return jsonify({'message': 'Your audio is being processed', 'task_id': task_id}), 202
+            return jsonify({'message': 'Your audio is being processed', 'task_id': task_id,
+                            'queue': get_queue_stats(app)}), 202
         else:
             app.logger.warning("Invalid file type provided")
             return jsonify({'error': 'Invalid file type'}), 400
 
+    # ----------------------- Streaming Audio Routes -----------------------
+
+    # Open a session for an upload sent in chunks while the resident is talking
+    @app.route('/audio-sessions', methods=['POST'])
+    @require_api_key
+    def create_audio_session():
+        options, error = read_task_options(request.form)
+        if error:
+            return error
+
+        try:
+            session = get_session_manager(app).create(*options)
+        except SessionError as e:
+            app.logger.warning(f"Rejected audio session for user_id {options[0]}: {e}")
+            return jsonify({'error': str(e)}), e.status
+        return jsonify({'message': 'Audio session opened', 'session_id': session.session_id}), 201
+
+    # Append one chunk; form fields: sequence (0, 1, 2, ...) and optional format ('pcm_s16le' for raw 16 kHz PCM)
+    @app.route('/audio-sessions/<session_id>/chunks', methods=['POST'])
+    @require_api_key
+    def upload_audio_chunk(session_id):
+        request_files = {key.strip(): value for key, value in request.files.items()}
+        if 'audio' not in request_files:
+            app.logger.warning("No audio chunk provided in the request")
+            return jsonify({'error': 'No audio chunk provided'}), 400
+        try:
+            sequence = int(request.form.get('sequence', ''))
+        except ValueError:
+            app.logger.warning("Invalid or missing chunk sequence number")
+            return jsonify({'error': 'sequence must be an integer'}), 400
+
+        try:
+            samples = decode_chunk(request_files['audio'], request.form.get('format'))
+            status = get_session_manager(app).append(session_id, sequence, samples)
+        except SessionError as e:
+            app.logger.warning(f"Rejected chunk {sequence} for audio session {session_id}: {e}")
+            return jsonify({'error': str(e)}), e.status
+        except Exception as e:
+            app.logger.error(f"Error decoding chunk {sequence} for audio session {session_id}: {e}")
+            return jsonify({'error': 'Could not decode audio chunk'}), 400
+        return jsonify(status), 200
+
+    # Session progress, including the transcript of the windows done so far
+    @app.route('/audio-sessions/<session_id>', methods=['GET'])
+    @require_api_key
+    def get_audio_session(session_id):
+        try:
+            return jsonify(get_session_manager(app).get(session_id).status()), 200
+        except SessionError as e:
+            return jsonify({'error': str(e)}), e.status
+
+    # Finish the session and queue it for an answer: the transcript of its windows and the audio
+    # after them, which the workers transcribe (without STREAM_WINDOW_ASR, all of its audio).
+    # The session is only closed once the task is queued, so a failed finish can be retried.
+    @app.route('/audio-sessions/<session_id>/finish', methods=['POST'])
+    @require_api_key
+    def finish_audio_session(session_id):
+        sessions = get_session_manager(app)
+        try:
+            session = sessions.finish(session_id)
+        except SessionError as e:
+            return jsonify({'error': str(e)}), e.status
+        except Exception as e:
+            app.logger.error(f"Error transcribing audio session {session_id}: {e}")
+            return jsonify({'error': 'Transcription failed, please retry'}), 500
+
+        transcript, partial_transcript, file_path, audio_data = session.transcript, None, None, None
+        if len(session.buffer):
+            # The workers transcribe the audio left after the windows and add it to their transcript
+            transcript, partial_transcript = None, transcript
+            # Stored like an upload: in the task row, or in the temp directory when too large
+            audio_data = encode_pcm_wav(session.buffer)
+            if len(audio_data) > app.config['AUDIO_SPILL_BYTES']:
+                os.makedirs(app.config['TEMP_DIR'], exist_ok=True)
+                file_path = os.path.join(app.config['TEMP_DIR'], f"{uuid.uuid4()}_{session_id}.wav")
+                with open(file_path, 'wb') as f:
+                    f.write(audio_data)
+                audio_data = None
+        elif transcript is None:
+            sessions.close(session_id)
+            return jsonify({'error': 'No audio received'}), 422
+        elif not transcript.strip():
+            sessions.close(session_id)
+            app.logger.warning(f"No speech detected in audio session {session_id}")
+            return jsonify({'error': 'No speech detected in audio'}), 422
+
+        task_id, error = enqueue_task(session.user_id, session.priority, session.asr_profile,
+                                      audio_file_path=file_path, audio_data=audio_data, transcript=transcript,
+                                      partial_transcript=partial_transcript)
+        if error:
+            return error
+        sessions.close(session_id)
+        app.logger.info(f"Enqueued audio processing task with ID {task_id} for audio session {session_id}")
+
+        return jsonify({'message': 'Your audio is being processed', 'task_id': task_id, 'transcript': transcript,
+                        'partial_transcript': partial_transcript, 'queue': get_queue_stats(app)}), 202
+
+    # ----------------------- Health Routes -----------------------
+
+    # The process is up and serving requests
+    @app.route('/healthz/live', methods=['GET'])
+    def healthz_live():
+        return jsonify({'status': 'alive'}), 200
+
+    # The database, ASR and TTS have all been exercised successfully since startup
+    @app.route('/healthz/ready', methods=['GET'])
+    def healthz_ready():
+        start_warmup(app)  # No-op once started; covers servers that don't run __main__
+        status = readiness.status()
+        return jsonify(status), 200 if status['ready'] else 503
+
+    # Report audio queue depth and worker usage
+    @app.route('/queue-status', methods=['GET'])
+    @require_api_key
+    def queue_status():
+        return jsonify(get_queue_stats(app)), 200
+
+    # Counters and latency histograms recorded by this process, and the state of its models and caches
+    @app.route('/metrics', methods=['GET'])
+    @require_api_key
+    def get_metrics():
+        return jsonify({**metrics.snapshot(), 'components': get_component_stats()}), 200
+
     return app
 
 if __name__ == '__main__':
@@ -344,5 +512,13 @@ if __name__ == '__main__':
     CORS(app)
     with app.app_context():
         db.create_all()  # Creates the database tables
+        upgrade_schema()  # Adds columns introduced since the tables were created
         app.logger.info("Database tables created")
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    debug = True
+    # Start workers now so tasks left PENDING by a previous run are picked up. The debug
+    # reloader runs this file in a watcher process and a serving child; only the child
+    # (WERKZEUG_RUN_MAIN set) should start workers and load the model.
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_warmup(app)
+        get_worker_pool(app)
+    app.run(host='0.0.0.0', port=5000, debug=debug)
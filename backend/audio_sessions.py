@@ -0,0 +1,251 @@
+# backend/audio_sessions.py
+#
+# Chunked audio uploads. A device opens a session, streams audio segments into it while
+# the resident is still talking, and finishes it when they stop. Every time a full window
+# (30 seconds by default) of audio has arrived it is transcribed in the background, so at
+# finish only the last partial window is left: it is queued with the transcript of the
+# windows before it and the workers transcribe just that.
+#
+# Sessions live in the memory of the process that receives the chunks, so streaming clients
+# must stay on one API process, which holds at most STREAM_MAX_SESSIONS of them and
+# STREAM_MAX_SESSION_BYTES of audio in each. Windows are transcribed with that process's model only when
+# STREAM_WINDOW_ASR is on (the default when EMBEDDED_AUDIO_WORKERS is on). With it off, an API
+# process running without embedded workers never loads Whisper: the session just collects the
+# audio and finish queues all of it for the worker processes, as a regular upload would be,
+# so emergency phrases are only caught once a worker has transcribed it.
+
+import threading
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+import metrics
+from background_tasks import transcribe_audio_array
+from emergency import check_for_emergency
+from utils.audio_processing import find_split_point, decode_audio_bytes
+
+logger = logging.getLogger('background_tasks')
+
+SAMPLE_RATE = 16000
+
+class SessionError(Exception):
+    """
+    Raised for requests that don't fit the session's state; status is the HTTP status to return.
+    """
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def decode_chunk(audio_file, chunk_format):
+    """
+    Decode one uploaded chunk to 16 kHz mono float32 samples. Raw 16 kHz 16-bit little-endian
+    PCM (chunk_format 'pcm_s16le') is converted directly; anything else is decoded in memory.
+    """
+    data = audio_file.read()
+    if chunk_format == 'pcm_s16le':
+        return np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768.0
+    return decode_audio_bytes(data)
+
+class AudioSession:
+    def __init__(self, user_id, priority, asr_profile=None):
+        self.session_id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.priority = priority
+        self.asr_profile = asr_profile
+        self.next_sequence = 0
+        self.buffer = np.zeros(0, dtype=np.float32)  # Received audio not yet sent for transcription
+        self.received_samples = 0
+        self.windows = []  # Windows sent for transcription, in audio order
+        self.emergency_phrase = None
+        self.finished = False  # No more chunks are accepted
+        self.transcript = None  # Set by finish when the windows were transcribed here
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def status(self):
+        done = [window.future.result() for window in self.windows
+                if window.future.done() and not window.future.exception()]
+        return {
+            'session_id': self.session_id,
+            'user_id': self.user_id,
+            'next_sequence': self.next_sequence,
+            'received_seconds': self.received_samples / SAMPLE_RATE,
+            'windows': len(self.windows),
+            'windows_transcribed': len(done),
+            'emergency_phrase': self.emergency_phrase,
+            'finished': self.finished,
+            'partial_transcript': ' '.join(text for text in done if text)
+        }
+
+class Window:
+    def __init__(self, audio, heard_at):
+        self.audio = audio  # Kept until transcribed, so a failed window can be retried
+        self.heard_at = heard_at
+        self.future = None
+
+class AudioSessionManager:
+    """
+    Holds open sessions and transcribes their completed windows on a small thread pool.
+    transcribe takes 16 kHz mono float32 samples and the session's ASR profile name and returns
+    the text; when it is None, windows are not transcribed and the audio is kept for finish.
+    on_transcript, if given, is called with (session, text, heard_at) for each window until it
+    returns a truthy value; it is how emergency phrases are caught before the session is finished.
+    """
+    def __init__(self, transcribe, window_seconds=30, session_timeout=300, workers=1, on_transcript=None,
+                 max_sessions=100, max_session_bytes=16 * 1024 * 1024):
+        self._transcribe = transcribe
+        self._on_transcript = on_transcript
+        self.window_samples = int(window_seconds * SAMPLE_RATE)
+        self.session_timeout = session_timeout
+        self.max_sessions = max_sessions
+        self.max_session_bytes = max_session_bytes  # Received audio as float32 samples
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stream-asr')
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, user_id, priority, asr_profile=None):
+        self._expire_idle()
+        session = AudioSession(user_id, priority, asr_profile)
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                metrics.increment('stream_sessions_rejected')
+                raise SessionError('Too many open audio sessions, please retry later', status=429)
+            self._sessions[session.session_id] = session
+        metrics.increment('stream_sessions')
+        logger.info(f"Opened audio session {session.session_id} for user_id {user_id}")
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            raise SessionError('Audio session not found', status=404)
+        return session
+
+    def append(self, session_id, sequence, samples):
+        """
+        Add the chunk with the given sequence number (0, 1, 2, ...). A chunk that was already
+        received, e.g. a retry after a dropped connection, is ignored; a gap is rejected.
+        """
+        session = self.get(session_id)
+        with session.lock:
+            if session.finished:
+                raise SessionError('Audio session is already finished', status=409)
+            if sequence < session.next_sequence:
+                logger.info(f"Ignoring duplicate chunk {sequence} for audio session {session_id}")
+                return session.status()
+            if sequence > session.next_sequence:
+                raise SessionError(f"Expected chunk {session.next_sequence}, got {sequence}", status=409)
+            if (session.received_samples + len(samples)) * 4 > self.max_session_bytes:
+                raise SessionError(f"Audio session is limited to {self.max_session_bytes // (4 * SAMPLE_RATE)}s "
+                                   f"of audio", status=413)
+
+            session.next_sequence += 1
+            session.received_samples += len(samples)
+            session.updated_at = time.monotonic()
+            session.buffer = np.concatenate([session.buffer, samples.astype(np.float32)])
+
+            # Send every completed window for transcription right away
+            while self._transcribe and len(session.buffer) >= self.window_samples:
+                split = find_split_point(session.buffer, self.window_samples)
+                self._submit_window(session, Window(session.buffer[:split], datetime.utcnow()))
+                session.buffer = session.buffer[split:]
+            return session.status()
+
+    def finish(self, session_id):
+        """
+        Stop accepting chunks. Waits for the windows already sent for transcription and returns
+        the session with their transcript set and the last partial window left in buffer, for
+        the workers to transcribe; when windows are not transcribed here, the transcript is
+        None and the whole audio is in buffer. The session stays open until close, so a finish
+        that fails, or whose task could not be queued, can be retried; windows that failed are
+        transcribed again.
+        """
+        session = self.get(session_id)
+        started = time.perf_counter()
+        with session.lock:
+            session.finished = True
+            session.updated_at = time.monotonic()
+            if session.transcript is not None or not self._transcribe:
+                return session
+            for window in session.windows:
+                if window.future.done() and window.future.exception():
+                    self._submit_window(session, window)
+            windows = list(session.windows)
+
+        transcript = ' '.join(text for text in (window.future.result() for window in windows) if text)
+        with session.lock:
+            session.transcript = transcript
+        metrics.observe('stream_finish_seconds', time.perf_counter() - started)
+        logger.info(f"Finished audio session {session_id}: {session.received_samples / SAMPLE_RATE:.1f}s "
+                    f"in {len(windows)} windows, transcript ready {time.perf_counter() - started:.2f}s after finish, "
+                    f"{len(session.buffer) / SAMPLE_RATE:.1f}s left for the workers")
+        return session
+
+    def close(self, session_id):
+        """
+        Forget a session, once its task is queued.
+        """
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        logger.info(f"Closed audio session {session_id}")
+
+    def _submit_window(self, session, window):
+        if window.future is None:
+            window.audio = window.audio.copy()
+            session.windows.append(window)
+        window.future = self._executor.submit(self._transcribe_window, session, window)
+
+    def _transcribe_window(self, session, window):
+        started = time.perf_counter()
+        text = self._transcribe(window.audio, session.asr_profile).strip()
+        window.audio = None
+        heard_at = window.heard_at
+        metrics.increment('stream_windows_transcribed')
+        metrics.observe('stream_window_seconds', time.perf_counter() - started)
+        if self._on_transcript and session.emergency_phrase is None:
+            try:
+                session.emergency_phrase = self._on_transcript(session, text, heard_at)
+            except Exception as e:
+                logger.error(f"Error checking transcript of audio session {session.session_id}: {e}")
+        return text
+
+    def _expire_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [session_id for session_id, session in self._sessions.items()
+                       if now - session.updated_at > self.session_timeout]
+            for session_id in expired:
+                del self._sessions[session_id]
+        for session_id in expired:
+            metrics.increment('stream_sessions_expired')
+            logger.warning(f"Discarded idle audio session {session_id}")
+
+_session_manager = None
+_session_manager_lock = threading.Lock()
+
+def get_session_manager(app):
+    global _session_manager
+    with _session_manager_lock:
+        if _session_manager is None:
+            def transcribe_window(audio, asr_profile):
+                with app.app_context():
+                    return transcribe_audio_array(audio, asr_profile)[0]
+
+            def on_transcript(session, text, heard_at):
+                with app.app_context():
+                    return check_for_emergency(session.user_id, text, heard_at=heard_at)
+
+            _session_manager = AudioSessionManager(
+                # Without window ASR the workers transcribe the whole session
+                transcribe_window if app.config['STREAM_WINDOW_ASR'] else None,
+                window_seconds=app.config['STREAM_WINDOW_SECONDS'],
+                session_timeout=app.config['STREAM_SESSION_TIMEOUT'],
+                workers=app.config['STREAM_ASR_WORKERS'],
+                on_transcript=on_transcript,
+                max_sessions=app.config['STREAM_MAX_SESSIONS'],
+                max_session_bytes=app.config['STREAM_MAX_SESSION_BYTES']
+            )
+        return _session_manager
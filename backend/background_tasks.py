@@ -1,16 +1,37 @@
 # backend/background_tasks.py
 
 import threading
+import socket
+import time
 import uuid
 import json
 import os
 import logging
-from gtts import gTTS
+from concurrent.futures import ThreadPoolExecutor
 from extensions import db
-from models import User, Task
+from models import User
+from task_queue import create_task, claim_next_task, heartbeat, requeue_expired_leases, complete_task, fail_task, count_tasks, save_transcript, PermanentTaskError
+from pipeline import Stage, Pipeline
+import metrics
+from scheduler import PRIORITY_LANES, DEFAULT_PRIORITY
+from emergency import check_for_emergency
 from datetime import datetime
+from flask import current_app
+from config import Config
 import warnings
-import whisper
+import numpy as np
+from utils.model_registry import ModelRegistry, AdaptiveModelSelector, load_whisper_model
+from utils.model_store import ModelStore
+from utils.ai_processing import generate_ai_response, generate_ai_response_async, CHAT_PARAMETERS
+from utils.audio_processing import convert_to_wav, normalize_audio, save_transcription, trim_silence, decode_audio_bytes
+from utils.asr_batching import BatchingTranscriber, transcribe_segments
+from utils.asr_profiles import AsrProfile
+from utils.transcription_cache import TranscriptionCache
+from utils.response_cache import ResponseCache, response_key, response_scope
+from utils.question_matcher import QuestionMatcher
+from utils.tts_streaming import SpokenAnswer, synthesize_speech
+from utils.io_engine import IOEngine
+from utils.cpu_budget import CpuBudget, split_cores
 
 # Suppress specific warnings
 warnings.filterwarnings("ignore", category=FutureWarning, module="whisper")
@@ -31,24 +52,231 @@ formatter = logging.Formatter('%(asctime)s %(levelname)s: %(message)s [in %(path
 file_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 
-# Preload the Whisper model to optimize performance
-try:
-    logger.info("Loading Whisper model...")
-    model = whisper.load_model("base")  # Options: 'tiny', 'base', 'small', 'medium', 'large'
-    logger.info("Whisper model loaded successfully.")
-except Exception as e:
-    logger.error(f"Failed to load Whisper model: {e}")
-    model = None  # Handle gracefully in tasks
+# Whisper models are loaded on first use rather than at import time, so processes that
+# only serve the API (EMBEDDED_AUDIO_WORKERS off) never pay for them. Worker processes
+# warm up the configured size at startup. For the same reason whisper, torch and gtts are
+# imported inside the functions that use them rather than at the top of these modules.
+SAMPLE_RATE = 16000  # Whisper's input sample rate
 
-# Import AI processing functions
-from utils.ai_processing import generate_ai_response
+model_store = ModelStore(Config.MODEL_STORE_DIR, allow_download=Config.MODEL_STORE_DOWNLOAD)
+
+def load_asr_model(size):
+    return load_whisper_model(size, quantization=Config.WHISPER_QUANTIZATION, store=model_store)
+
+model_registry = ModelRegistry(load_asr_model)
+_singletons_lock = threading.Lock()  # Guards the lazy creation of the process-wide objects below
+
+def get_model(size=None):
+    """
+    Return the Whisper model of the given size (default WHISPER_MODEL), loading it on first
+    use. Returns None if loading failed.
+    """
+    size = size or Config.WHISPER_MODEL
+    try:
+        return model_registry.get(size)
+    except Exception as e:
+        logger.error(f"Failed to load Whisper model '{size}': {e}")
+        return None  # Handle gracefully in tasks
+
+_transcribers = {}
+
+_cpu_budget = None
+
+def get_cpu_budget():
+    """
+    Return this process's ASR CPU budget: ASR_CONCURRENCY transcriptions at a time with
+    ASR_TORCH_THREADS torch threads each, or by default the cores split evenly between the
+    ASR_PROCESSES processes and their transcriptions.
+    """
+    global _cpu_budget
+    with _singletons_lock:
+        if _cpu_budget is None:
+            processes = current_app.config['ASR_PROCESSES']
+            concurrency, threads = current_app.config['ASR_CONCURRENCY'], current_app.config['ASR_TORCH_THREADS']
+            if not threads:
+                concurrency, threads = split_cores(concurrency, processes)
+            _cpu_budget = CpuBudget(concurrency, threads, processes)
+            logger.info(f"ASR CPU budget: {concurrency} concurrent transcriptions x {threads} torch threads "
+                        f"in each of {processes} processes")
+        return _cpu_budget
+
+def get_transcriber(size=None):
+    """
+    Return the BatchingTranscriber that ASR calls for a model size go through. It batches
+    clips when ASR_BATCH_SIZE is above 1 and runs the model within the CPU budget.
+    Returns None if the model failed to load.
+    """
+    size = size or current_app.config['WHISPER_MODEL']
+    asr_model = get_model(size)
+    if asr_model is None:
+        return None
+    cpu_budget = get_cpu_budget()
+    with _singletons_lock:
+        if size not in _transcribers:
+            _transcribers[size] = BatchingTranscriber(
+                asr_model,
+                max_batch_size=current_app.config['ASR_BATCH_SIZE'],
+                max_wait_ms=current_app.config['ASR_BATCH_WAIT_MS'],
+                cpu_budget=cpu_budget
+            )
+        return _transcribers[size]
+
+_model_selector = None
+
+def get_model_selector():
+    """
+    Return the selector that adapts the model size to load, or None when ASR_ADAPTIVE_MODEL is off.
+    """
+    global _model_selector
+    if not current_app.config['ASR_ADAPTIVE_MODEL']:
+        return None
+    with _singletons_lock:
+        if _model_selector is None:
+            _model_selector = AdaptiveModelSelector(
+                sizes=current_app.config['ASR_MODEL_SIZES'],
+                max_size=current_app.config['WHISPER_MODEL'],
+                latency_target=current_app.config['ASR_LATENCY_TARGET'],
+                downgrade_queue_depth=current_app.config['ASR_DOWNGRADE_QUEUE_DEPTH'],
+                upgrade_queue_depth=current_app.config['ASR_UPGRADE_QUEUE_DEPTH'],
+                cooldown=current_app.config['ASR_MODEL_SWITCH_COOLDOWN']
+            )
+        return _model_selector
+
+def choose_model_size():
+    selector = get_model_selector()
+    if selector is None:
+        return current_app.config['WHISPER_MODEL']
+    return selector.choose(queue_depth=count_tasks('PENDING'))
+
+_transcription_cache = None
+
+def get_transcription_cache():
+    """
+    Return the process-wide transcript cache, or None when TRANSCRIPT_CACHE_ENABLED is off.
+    """
+    global _transcription_cache
+    if not current_app.config['TRANSCRIPT_CACHE_ENABLED']:
+        return None
+    with _singletons_lock:
+        if _transcription_cache is None:
+            _transcription_cache = TranscriptionCache(
+                max_entries=current_app.config['TRANSCRIPT_CACHE_ENTRIES'],
+                max_bytes=current_app.config['TRANSCRIPT_CACHE_BYTES'],
+                path=current_app.config['TRANSCRIPT_CACHE_PATH'] or None,
+                disk_entries=current_app.config['TRANSCRIPT_CACHE_DISK_ENTRIES']
+            )
+        return _transcription_cache
+
+_response_cache = None
+
+def get_response_cache():
+    """
+    Return the process-wide chat answer cache, or None when RESPONSE_CACHE_ENABLED is off.
+    """
+    global _response_cache
+    if not current_app.config['RESPONSE_CACHE_ENABLED']:
+        return None
+    with _singletons_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(
+                current_app.config['RESPONSE_CACHE_PATH'],
+                ttl=current_app.config['RESPONSE_CACHE_TTL'],
+                max_entries=current_app.config['RESPONSE_CACHE_ENTRIES'],
+                max_bytes=current_app.config['RESPONSE_CACHE_BYTES']
+            )
+        return _response_cache
+
+_question_matcher = None
+
+def get_question_matcher():
+    """
+    Return the process-wide paraphrase matcher, or None when QUESTION_MATCHER_ENABLED is off.
+    """
+    global _question_matcher
+    if not current_app.config['QUESTION_MATCHER_ENABLED']:
+        return None
+    with _singletons_lock:
+        if _question_matcher is None:
+            _question_matcher = QuestionMatcher(
+                threshold=current_app.config['QUESTION_MATCHER_THRESHOLD'],
+                entries_per_scope=current_app.config['QUESTION_MATCHER_ENTRIES'],
+                ttl=current_app.config['RESPONSE_CACHE_TTL']
+            )
+        return _question_matcher
+
+def get_asr_profile(name=None):
+    """
+    Return the AsrProfile for a name in ASR_PROFILES (default ASR_DEFAULT_PROFILE).
+    """
+    name = name or current_app.config['ASR_DEFAULT_PROFILE']
+    return AsrProfile(name, **current_app.config['ASR_PROFILES'][name])
+
+def transcribe_audio_array(audio, profile_name=None):
+    """
+    Transcribe 16 kHz mono float32 samples with a profile from ASR_PROFILES and the model size
+    chosen for the current load, through the transcript cache. Returns (text, model_size).
+    """
+    profile = get_asr_profile(profile_name)
+    model_size = choose_model_size()
+    cache = get_transcription_cache()
+    if cache is None:
+        return _run_transcription(audio, profile, model_size)
+    return cache.get_or_transcribe(audio, lambda audio: _run_transcription(audio, profile, model_size),
+                                   variant=f"{profile.name}:{model_size}")
+
+_segment_executor = None
+
+def get_segment_executor():
+    global _segment_executor
+    with _singletons_lock:
+        if _segment_executor is None:
+            _segment_executor = ThreadPoolExecutor(max_workers=current_app.config['ASR_SEGMENT_WORKERS'],
+                                                   thread_name_prefix='asr-segment')
+        return _segment_executor
+
+_tts_executor = None
+
+def get_tts_executor():
+    """
+    Return the process-wide pool that synthesizes answer sentences, TTS_WORKERS at a time.
+    """
+    global _tts_executor
+    with _singletons_lock:
+        if _tts_executor is None:
+            _tts_executor = ThreadPoolExecutor(max_workers=current_app.config['TTS_WORKERS'],
+                                               thread_name_prefix='tts-sentence')
+        return _tts_executor
+
+_io_engine = None
+
+def get_io_engine():
+    """
+    Return the process-wide IOEngine, starting its event loop thread on first use.
+    """
+    global _io_engine
+    with _singletons_lock:
+        if _io_engine is None:
+            _io_engine = IOEngine()
+        return _io_engine
+
+def _run_transcription(audio, profile, model_size):
+    transcriber = get_transcriber(model_size)
+    if transcriber is None:
+        raise RuntimeError("Whisper model is not loaded.")
+    started = time.perf_counter()
+    # Long recordings are split at silence and the segments transcribed in parallel
+    if len(audio) >= current_app.config['ASR_SEGMENT_MIN_SECONDS'] * SAMPLE_RATE:
+        text = transcribe_segments(transcriber, audio, get_segment_executor(),
+                                   segment_seconds=current_app.config['ASR_SEGMENT_SECONDS'], profile=profile)
+    else:
+        text = transcriber.transcribe(audio, profile)['text']
+    metrics.observe(f'asr_seconds.{model_size}', time.perf_counter() - started)
+    metrics.increment(f'asr_profile_clips.{profile.name}')
+    return text, model_size
 
-# Import functions for audio processing
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ['mp3', 'wav']
 
-from utils.audio_processing import convert_to_wav, normalize_audio, save_transcription
-
 def generate_default_prompt(user_data, user_question):
     """
     Generate a prompt string for the AI model using user data and the question.
@@ -59,89 +287,486 @@ def generate_default_prompt(user_data, user_question):
     prompt += f"\nQuestion: {user_question}\n"
     return prompt
 
-def process_audio_task(task_id, user_id, audio_file_path, app):
-    with app.app_context():
-        task = Task.query.filter_by(task_id=task_id).first()
-        if not task:
-            logger.error(f"Task with ID {task_id} not found in database.")
+class AudioJob:
+    """
+    State of one audio task as it moves through the processing stages.
+    """
+    def __init__(self, task_id, user_id, audio_file_path, worker_id=None, created_at=None, audio_data=None,
+                 asr_profile=None):
+        self.task_id = task_id
+        self.user_id = user_id
+        self.audio_file_path = audio_file_path
+        self.asr_profile = asr_profile
+        self.audio_data = audio_data  # Upload bytes when the file was small enough to keep in memory
+        self.partial_transcript = None  # Transcript of the streamed audio before this audio
+        self.worker_id = worker_id
+        self.created_at = created_at
+        self.model_size = None
+        self.user_data = None
+        self.audio = None
+        self.question = None
+        self.emergency_phrase = None
+        self.answer = None
+        self.speech = None  # SpokenAnswer, synthesizing the answer as it is generated
+        self.result = None
+
+    @classmethod
+    def from_task(cls, task, worker_id=None):
+        job = cls(task.task_id, task.user_id, task.audio_file_path, worker_id, created_at=task.created_at,
+                  asr_profile=task.asr_profile)
+        # Streamed sessions and retried tasks already have their transcript
+        job.question = task.transcript
+        if job.question is None:
+            job.audio_data = task.audio_data
+            job.partial_transcript = task.partial_transcript
+        return job
+
+def build_user_data(user):
+    return {
+        'First Name': user.first_name,
+        'Last Name': user.last_name,
+        'Date of Birth': user.date_of_birth.strftime('%Y-%m-%d') if user.date_of_birth else 'N/A',
+        'Gender': user.gender or 'N/A',
+        'Device Status': user.device_status or 'N/A',
+        'Room Number': user.room_number or 'N/A',
+        'IP Address': user.IP_address or 'N/A',
+        'Phone Number': user.phone_number or 'N/A',
+        'Emergency Contact': user.emergency_contact or 'N/A',
+        'Prescriptions': json.loads(user.prescriptions) if user.prescriptions else []
+    }
+
+# ----------------------- Processing Stages -----------------------
+# Each stage takes an AudioJob and runs inside an app context. decode and asr are CPU bound,
+# llm and tts wait on the network, so the worker pool gives them separate thread pools.
+
+def decode_stage(job):
+    """
+    Load the resident's data and decode the upload into 16 kHz mono samples for Whisper.
+    """
+    logger.info(f"Processing audio for task_id: {job.task_id}, user_id: {job.user_id}")
+
+    # Fetch user data from the database
+    user = User.query.get(job.user_id)
+    if not user:
+        logger.error(f"User with ID {job.user_id} not found.")
+        raise PermanentTaskError('User not found.')
+    job.user_data = build_user_data(user)
+    if job.question is not None:
+        return
+
+    if job.audio_data is not None:
+        job.audio = decode_audio_bytes(job.audio_data)
+        job.audio_data = None
+    else:
+        import whisper
+
+        job.audio = whisper.load_audio(job.audio_file_path)
+
+    # Drop leading/trailing silence, and clips without speech, before they reach Whisper
+    if current_app.config['VAD_ENABLED']:
+        job.audio, skipped_seconds = trim_silence(
+            job.audio,
+            padding_ms=current_app.config['VAD_PADDING_MS'],
+            min_speech_ms=current_app.config['VAD_MIN_SPEECH_MS'],
+            energy_margin_db=current_app.config['VAD_ENERGY_MARGIN_DB']
+        )
+        metrics.increment('vad_clips')
+        metrics.increment('vad_skipped_seconds', skipped_seconds)
+        if job.audio is None and job.partial_transcript:
+            # Only the end of a streamed session, after the resident stopped talking
+            logger.info(f"No speech after the streamed transcript for task_id {job.task_id}")
+            job.question = job.partial_transcript
             return
+        if job.audio is None:
+            metrics.increment('vad_dropped_clips')
+            logger.info(f"No speech detected for task_id {job.task_id}, skipped {skipped_seconds:.1f}s of audio")
+            raise PermanentTaskError('No speech detected in audio.')
+        logger.info(f"Trimmed {skipped_seconds:.1f}s of silence for task_id {job.task_id}")
+
+def asr_stage(job):
+    """
+    Transcribe the decoded audio to text.
+    """
+    if job.question is not None:
+        logger.info(f"Using existing transcript for task_id {job.task_id}")
+        return
+    text, job.model_size = transcribe_audio_array(job.audio, job.asr_profile)
+    job.audio = None  # Release the samples while the job waits on the network stages
+    logger.info(f"Transcribed Text: {text}")
+    # Alert right away instead of after the answer is generated and spoken. The streamed
+    # part was checked as it was transcribed
+    job.emergency_phrase = check_for_emergency(job.user_id, text, heard_at=job.created_at)
+    job.question = ' '.join(part for part in (job.partial_transcript, text) if part)
+    save_transcript(job.task_id, job.question)
 
+def record_first_audio(job, seconds):
+    logger.info(f"First answer audio for task_id {job.task_id} after {seconds:.2f}s")
+    if job.created_at:
+        metrics.observe('time_to_first_audio_seconds', (datetime.utcnow() - job.created_at).total_seconds())
+
+def start_answer(job):
+    """
+    Set up the audio for a job's answer. Returns the prompt for the chat model.
+    """
+    logger.info("Generating AI response...")
+    answer_audio_filename = f"response_{job.user_id}_{job.task_id}.mp3"
+    answer_audio_path = os.path.join(current_app.config['TEMP_DIR'], answer_audio_filename)
+    os.makedirs(os.path.dirname(answer_audio_path), exist_ok=True)
+    job.speech = SpokenAnswer(answer_audio_path, get_tts_executor(), synthesize_speech,
+                              on_first_audio=lambda seconds: record_first_audio(job, seconds))
+    return generate_default_prompt(job.user_data, job.question)
+
+def matched_answer(matcher, scope, job):
+    match = matcher.match(scope, job.question) if matcher else None
+    if match is None:
+        return None
+    logger.info(f"Answering as for the earlier question '{match.question}' (similarity {match.score:.2f})")
+    return match.answer
+
+def end_answer(job, matcher, scope, streamed):
+    if matcher:
+        matcher.add(scope, job.question, job.answer)
+    if not streamed:
+        # Cached and non-streamed answers arrive whole; their sentences are still synthesized
+        # side by side, first sentence first
+        job.speech.feed(job.answer)
+    logger.info(f"AI Response: {job.answer}")
+
+def llm_stage(job):
+    """
+    Ask the chat model to answer the transcribed question. Each sentence of the answer is
+    handed to TTS as soon as it is complete, while the rest is still being streamed.
+    """
+    prompt = start_answer(job)
+    streamed = False
+
+    # Call OpenAI ChatCompletion API, unless this resident asked the same thing recently,
+    # in the same words (response cache) or in others (question matcher)
+    matcher = get_question_matcher()
+    scope = response_scope(job.user_id, job.user_data, CHAT_PARAMETERS)
+
+    def generate():
+        nonlocal streamed
+        answer = matched_answer(matcher, scope, job)
+        if answer is not None:
+            return answer
+        if not current_app.config['LLM_STREAMING']:
+            return generate_ai_response(prompt)
+        streamed = True
+        return generate_ai_response(prompt, on_text=job.speech.feed)
+
+    cache = get_response_cache()
+    if cache is None:
+        job.answer = generate()
+    else:
+        key = response_key(job.user_id, job.user_data, job.question, CHAT_PARAMETERS)
+        job.answer = cache.get_or_generate(key, generate)
+    end_answer(job, matcher, scope, streamed)
+
+async def llm_stage_async(job):
+    """
+    llm_stage as a coroutine for the IO engine: waiting on the chat API holds no thread.
+    """
+    prompt = start_answer(job)
+    streamed = False
+    matcher = get_question_matcher()
+    scope = response_scope(job.user_id, job.user_data, CHAT_PARAMETERS)
+
+    async def generate():
+        nonlocal streamed
+        answer = matched_answer(matcher, scope, job)
+        if answer is not None:
+            return answer
+        if not current_app.config['LLM_STREAMING']:
+            return await generate_ai_response_async(prompt)
+        streamed = True
+        return await generate_ai_response_async(prompt, on_text=job.speech.feed)
+
+    cache = get_response_cache()
+    if cache is None:
+        job.answer = await generate()
+    else:
+        key = response_key(job.user_id, job.user_data, job.question, CHAT_PARAMETERS)
+        job.answer = await cache.get_or_generate_async(key, generate)
+    end_answer(job, matcher, scope, streamed)
+
+def tts_stage(job):
+    """
+    Wait until every sentence of the answer has been converted to audio using gTTS. A wait
+    past TTS_TIMEOUT_SECONDS raises TimeoutError, and the task is retried.
+    """
+    logger.info("Converting AI response to audio...")
+    job.result = job.speech.finish(timeout=current_app.config['TTS_TIMEOUT_SECONDS'])
+    job.speech = None
+    logger.info(f"AI response audio saved at {job.result}")
+
+async def tts_stage_async(job):
+    """
+    tts_stage as a coroutine for the IO engine. gTTS itself has no async API, so sentences
+    are still synthesized on the TTS_WORKERS pool; only the wait for them is async.
+    """
+    logger.info("Converting AI response to audio...")
+    job.result = await job.speech.finish_async(timeout=current_app.config['TTS_TIMEOUT_SECONDS'])
+    job.speech = None
+    logger.info(f"AI response audio saved at {job.result}")
+
+# ----------------------- Warm-up -----------------------
+# Run once at startup so the first real request doesn't pay for model loading, lazy kernel
+# initialization and page faults, and so a broken backend is found before traffic arrives.
+
+def warm_up_asr():
+    """
+    Load the configured Whisper model and run a short synthetic clip through the same
+    transcriber, profile and CPU budget as real uploads. Raises if the model can't be used.
+    """
+    transcriber = get_transcriber()
+    if transcriber is None:
+        raise RuntimeError("Whisper model is not loaded.")
+    t = np.arange(2 * SAMPLE_RATE) / SAMPLE_RATE
+    audio = (0.1 * np.sin(2 * np.pi * 220 * t) + np.random.default_rng(0).normal(0, 0.01, len(t))).astype(np.float32)
+    started = time.perf_counter()
+    transcriber.transcribe(audio, get_asr_profile())
+    logger.info(f"ASR warm-up transcription took {time.perf_counter() - started:.2f}s")
+
+def warm_up_tts():
+    """
+    Synthesize a short phrase with the same TTS backend as the tts stage, in memory.
+    """
+    synthesize_speech('Ready.')
+
+AUDIO_STAGES = [
+    ('decode', decode_stage),
+    ('asr', asr_stage),
+    ('llm', llm_stage),
+    ('tts', tts_stage)
+]
+
+# The same stages with the network-bound ones as coroutines, for IO_ENGINE_ENABLED
+ASYNC_AUDIO_STAGES = [
+    ('decode', decode_stage),
+    ('asr', asr_stage),
+    ('llm', llm_stage_async),
+    ('tts', tts_stage_async)
+]
+
+def audio_stages(app):
+    return ASYNC_AUDIO_STAGES if app.config['IO_ENGINE_ENABLED'] else AUDIO_STAGES
+
+def finish_job(job):
+    complete_task(job.task_id, job.worker_id, job.result)
+    if job.created_at:
+        latency = (datetime.utcnow() - job.created_at).total_seconds()
+        metrics.observe('task_seconds', latency)
+        selector = get_model_selector()
+        if selector:
+            selector.record_latency(latency)
+
+def fail_job(job, error):
+    if not isinstance(error, PermanentTaskError):
+        logger.error(f"Error processing audio for task_id {job.task_id}: {error}")
+    db.session.rollback()
+    fail_task(job.task_id, job.worker_id, str(error), retryable=not isinstance(error, PermanentTaskError))
+
+class QueueFullError(Exception):
+    """
+    Raised when the audio processing queue cannot accept more work.
+    """
+    def __init__(self, retry_after):
+        super().__init__("Audio processing queue is full")
+        self.retry_after = retry_after
+
+class AudioWorkerPool:
+    """
+    Claims tasks from the tasks table while the first pipeline stage has room, and renews
+    their leases until they are done.
+    """
+    def __init__(self, app, max_workers, io_workers=None):
+        self.app = app
+        self.max_workers = max_workers
+        self.io_workers = io_workers or app.config['AUDIO_IO_WORKERS']
+        if app.config['IO_ENGINE_ENABLED']:
+            self.io_workers = app.config['IO_ENGINE_CONCURRENCY']
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads = []
+
+        queue_size = app.config['AUDIO_STAGE_QUEUE_SIZE']
+        # With batching, asr threads mostly wait on their batch, so run enough of them to fill one
+        asr_workers = max(max_workers, app.config['ASR_BATCH_SIZE'])
+        stage_workers = {'decode': max_workers, 'asr': asr_workers, 'llm': self.io_workers, 'tts': self.io_workers}
+        stages = audio_stages(app)
+        self.pipeline = Pipeline(
+            [Stage(name, handler, stage_workers[name], queue_size) for name, handler in stages],
+            on_success=self._on_success,
+            on_error=self._on_error,
+            context=app.app_context,
+            engine=get_io_engine() if stages is ASYNC_AUDIO_STAGES else None
+        )
+
+    def start(self):
+        self.pipeline.start()
+        for target, name in [(self._dispatch, 'dispatcher'), (self._housekeeping, 'housekeeping')]:
+            thread = threading.Thread(target=target, name=f"audio-worker-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        io_mode = 'jobs in flight on the IO engine' if self.app.config['IO_ENGINE_ENABLED'] else 'I/O workers'
+        logger.info(f"Started audio worker pool {self.worker_id} with {self.max_workers} CPU workers and "
+                    f"{self.io_workers} {io_mode} per stage")
+
+    def stop(self, timeout=None):
+        """
+        Stop claiming new tasks and wait for in-flight tasks to finish.
+        Tasks still running after the timeout are recovered through lease expiry.
+        """
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self.pipeline.stop(timeout)
+        logger.info(f"Stopped audio worker pool {self.worker_id}")
+
+    def notify(self):
+        """
+        Wake the dispatcher after a task was enqueued instead of waiting for the next poll.
+        """
+        with self._wakeup:
+            self._wakeup.notify()
+
+    def _dispatch(self):
+        poll_seconds = self.app.config['TASK_POLL_SECONDS']
+        while not self._stopping.is_set():
+            if not self.pipeline.wait_for_capacity(timeout=poll_seconds):
+                continue
+            try:
+                with self.app.app_context():
+                    task = claim_next_task(self.worker_id)
+                    job = AudioJob.from_task(task, self.worker_id) if task else None
+            except Exception as e:
+                logger.error(f"Error claiming task: {e}")
+                job = None
+
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=poll_seconds)
+                continue
+
+            with self._lock:
+                self._in_flight.add(job.task_id)
+            self.pipeline.submit(job)
+
+    def _on_success(self, job):
+        try:
+            finish_job(job)
+        finally:
+            self._done(job)
+
+    def _on_error(self, job, error):
         try:
-            task.status = 'IN_PROGRESS'
-            db.session.commit()
-            logger.info(f"Processing audio for task_id: {task_id}, user_id: {user_id}")
-
-            # Fetch user data from the database
-            user = User.query.get(user_id)
-            if not user:
-                logger.error(f"User with ID {user_id} not found.")
-                task.status = 'FAILURE'
-                task.result = 'User not found.'
-                db.session.commit()
-                return
-
-            # Transcribe audio to text
-            if model is None:
-                raise RuntimeError("Whisper model is not loaded.")
-            user_question = model.transcribe(audio_file_path)['text']
-            logger.info(f"Transcribed Text: {user_question}")
-
-            # Prepare user data
-            user_data = {
-                'First Name': user.first_name,
-                'Last Name': user.last_name,
-                'Date of Birth': user.date_of_birth.strftime('%Y-%m-%d') if user.date_of_birth else 'N/A',
-                'Gender': user.gender or 'N/A',
-                'Device Status': user.device_status or 'N/A',
-                'Room Number': user.room_number or 'N/A',
-                'IP Address': user.IP_address or 'N/A',
-                'Phone Number': user.phone_number or 'N/A',
-                'Emergency Contact': user.emergency_contact or 'N/A',
-                'Prescriptions': json.loads(user.prescriptions) if user.prescriptions else []
-            }
-
-            # Generate prompt for AI
-            prompt = generate_default_prompt(user_data, user_question)
-            logger.info("Generating AI response...")
-
-            # Call OpenAI ChatCompletion API
-            answer = generate_ai_response(prompt)
-            logger.info(f"AI Response: {answer}")
-
-            # Convert answer to audio using gTTS
-            logger.info("Converting AI response to audio...")
-            tts = gTTS(text=answer, lang='en')
-            answer_audio_filename = f"response_{user_id}_{task_id}.mp3"
-            answer_audio_path = os.path.join(os.getenv('TEMP_DIR', 'temp'), answer_audio_filename)
-            os.makedirs(os.path.dirname(answer_audio_path), exist_ok=True)
-            tts.save(answer_audio_path)
-            logger.info(f"AI response audio saved at {answer_audio_path}")
-
-            # Update task status and result
-            task.status = 'SUCCESS'
-            task.result = answer_audio_path
-            db.session.commit()
-
-        except Exception as e:
-            logger.error(f"Error processing audio for task_id {task_id}: {e}")
-            task.status = 'FAILURE'
-            task.result = str(e)
-            db.session.commit()
-
-def enqueue_audio_processing(user_id, audio_file_path, app):
+            fail_job(job, error)
+        finally:
+            self._done(job)
+
+    def _done(self, job):
+        with self._lock:
+            self._in_flight.discard(job.task_id)
+
+    def _housekeeping(self):
+        while not self._stopping.wait(self.app.config['TASK_HEARTBEAT_SECONDS']):
+            with self._lock:
+                task_ids = list(self._in_flight)
+            try:
+                with self.app.app_context():
+                    heartbeat(task_ids, self.worker_id)
+                    if requeue_expired_leases():
+                        self.notify()
+            except Exception as e:
+                logger.error(f"Error during task queue housekeeping: {e}")
+            if task_ids:
+                logger.info(f"Pipeline stages for {self.worker_id}: {self.pipeline.stats()}")
+                logger.info(f"Metrics for {self.worker_id}: {metrics.snapshot()}")
+                logger.info(f"Components of {self.worker_id}: {get_component_stats()}")
+
+    def stats(self):
+        stages = self.pipeline.stats()
+        with self._lock:
+            in_flight = len(self._in_flight)
+        threaded = [stage for stage in stages.values() if not stage['async']]
+        return {
+            'active_workers': sum(stage['busy_workers'] for stage in threaded),
+            'max_workers': sum(stage['workers'] for stage in threaded),
+            'io_engine_jobs': sum(stage['busy_workers'] for stage in stages.values() if stage['async']),
+            'in_flight': in_flight,
+            'stages': stages
+        }
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+def get_worker_pool(app):
+    """
+    Return the worker pool embedded in this process, starting it on first use.
+    Returns None when EMBEDDED_AUDIO_WORKERS is off and tasks are left to worker.py processes.
+    """
+    global _worker_pool
+    if not app.config['EMBEDDED_AUDIO_WORKERS']:
+        return None
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = AudioWorkerPool(app, max_workers=app.config['AUDIO_WORKERS'])
+            _worker_pool.start()
+        return _worker_pool
+
+def get_queue_stats(app):
+    pool = get_worker_pool(app)
+    stats = pool.stats() if pool else {'active_workers': 0, 'max_workers': 0}
+    stats.update({
+        'queue_depth': count_tasks('PENDING'),
+        'queue_depth_by_priority': {lane: count_tasks('PENDING', lane) for lane in PRIORITY_LANES},
+        'queue_capacity': app.config['AUDIO_QUEUE_SIZE'],
+        'urgent_reserve': app.config['AUDIO_URGENT_QUEUE_RESERVE'],
+        'in_progress': count_tasks('IN_PROGRESS')
+    })
+    return stats
+
+def get_component_stats():
+    """
+    State of the Whisper models, CPU budget and caches this process has set up so far.
+    """
+    stats = {'asr_models_loaded': model_registry.loaded_sizes()}
+    if _cpu_budget is not None:
+        stats['cpu_budget'] = _cpu_budget.stats()
+    if _transcription_cache is not None:
+        stats['transcript_cache'] = _transcription_cache.stats()
+    if _response_cache is not None:
+        stats['response_cache'] = _response_cache.stats()
+    return stats
+
+def enqueue_audio_processing(user_id, audio_file_path, app, priority=DEFAULT_PRIORITY, transcript=None,
+                             audio_data=None, asr_profile=None, partial_transcript=None):
+    """
+    Queue a task for the workers, with its audio in audio_file_path or audio_data, or an
+    existing transcript, which makes it start at the llm stage. partial_transcript is the
+    transcript of streamed audio that came before the task's audio.
+    """
+    pool = get_worker_pool(app)
+    # Urgent requests may use reserved slots beyond the routine queue capacity
+    capacity = app.config['AUDIO_QUEUE_SIZE']
+    if priority == 'urgent':
+        capacity += app.config['AUDIO_URGENT_QUEUE_RESERVE']
+
     task_id = str(uuid.uuid4())
-    new_task = Task(
-        task_id=task_id,
-        user_id=user_id,
-        status='PENDING',
-        result=None
-    )
-    db.session.add(new_task)
-    db.session.commit()
-
-    # Start a new thread for processing
-    thread = threading.Thread(target=process_audio_task, args=(task_id, user_id, audio_file_path, app))
-    thread.start()
-
-    logger.info(f"Enqueued audio processing task with ID {task_id}")
-    return task_id
\ No newline at end of file
+    task = create_task(task_id, user_id, audio_file_path, priority=priority, transcript=transcript,
+                       audio_data=audio_data, asr_profile=asr_profile or app.config['ASR_DEFAULT_PROFILE'],
+                       partial_transcript=partial_transcript, max_pending=capacity)
+    if task is None:
+        logger.warning(f"Rejected {priority} audio processing task for user_id {user_id}: queue is full")
+        raise QueueFullError(app.config['AUDIO_QUEUE_RETRY_AFTER'])
+    if pool:
+        pool.notify()
+
+    logger.info(f"Enqueued {priority} audio processing task with ID {task_id}")
+    return task_id
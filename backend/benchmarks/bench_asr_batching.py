@@ -0,0 +1,57 @@
+# benchmarks/bench_asr_batching.py
+#
+# Compare clips/sec of one-at-a-time model.transcribe against BatchingTranscriber on CPU.
+#
+#     python benchmarks/bench_asr_batching.py --model base --clips 32 --batch-sizes 1 4 8 16
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from common import load_sample_clips, audio_seconds
+import whisper
+import metrics
+from utils.asr_batching import BatchingTranscriber
+
+def bench_sequential(model, clips):
+    started = time.perf_counter()
+    for clip in clips:
+        model.transcribe(clip, fp16=False)
+    return time.perf_counter() - started
+
+def bench_batched(model, clips, batch_size, wait_ms):
+    transcriber = BatchingTranscriber(model, max_batch_size=batch_size, max_wait_ms=wait_ms)
+    # One submitting thread per clip in a batch, like the asr stage threads in the worker pool
+    with ThreadPoolExecutor(max_workers=batch_size) as executor:
+        started = time.perf_counter()
+        list(executor.map(transcriber.transcribe, clips))
+        return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description='Whisper micro-batching benchmark')
+    parser.add_argument('--model', default='base')
+    parser.add_argument('--clips', type=int, default=32)
+    parser.add_argument('--max-seconds', type=float, default=10.0, help='cut sample clips to this length')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[2, 4, 8, 16])
+    parser.add_argument('--wait-ms', type=int, default=20)
+    args = parser.parse_args()
+
+    model = whisper.load_model(args.model, device='cpu')
+    clips = load_sample_clips(args.clips, args.max_seconds)
+    print(f"{len(clips)} clips, {audio_seconds(clips):.1f}s of audio, model '{args.model}' on CPU")
+
+    # Warm up so the first measurement does not include lazy initialization
+    model.transcribe(clips[0], fp16=False)
+
+    elapsed = bench_sequential(model, clips)
+    print(f"{'sequential':>12}: {len(clips) / elapsed:6.2f} clips/sec ({elapsed:.1f}s)")
+
+    for batch_size in args.batch_sizes:
+        before = metrics.snapshot()['histograms'].get('asr_batch_size', {}).get('count', 0)
+        elapsed = bench_batched(model, clips, batch_size, args.wait_ms)
+        sizes = metrics.snapshot()['histograms']['asr_batch_size']
+        batches = sizes['count'] - before
+        print(f"{f'batch {batch_size}':>12}: {len(clips) / elapsed:6.2f} clips/sec ({elapsed:.1f}s, "
+              f"{batches} batches, mean size {len(clips) / batches:.1f})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/bench_cpu_budget.py
+#
+# Sweep ASR_CONCURRENCY x ASR_TORCH_THREADS on this machine: for each combination, run the
+# clips through a CpuBudget from more submitting threads than it allows (like the asr stage,
+# session and batching threads do) and report throughput. Use the fastest row for the config.
+#
+#     python benchmarks/bench_cpu_budget.py --model base --clips 16 --oversubscribe
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from common import load_sample_clips, audio_seconds
+import whisper
+from utils.cpu_budget import CpuBudget
+
+def powers_of_two(limit):
+    value = 1
+    while value <= limit:
+        yield value
+        value *= 2
+
+def run(model, clips, budget, submitters):
+    def transcribe(clip):
+        with budget.slot():
+            model.transcribe(clip, fp16=False)
+
+    with ThreadPoolExecutor(max_workers=submitters) as executor:
+        started = time.perf_counter()
+        list(executor.map(transcribe, clips))
+        return time.perf_counter() - started
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description='ASR CPU budget sweep')
+    parser.add_argument('--model', default='base')
+    parser.add_argument('--clips', type=int, default=16)
+    parser.add_argument('--max-seconds', type=float, default=10.0, help='cut sample clips to this length')
+    parser.add_argument('--submitters', type=int, default=8, help='threads asking for transcriptions')
+    parser.add_argument('--oversubscribe', action='store_true',
+                        help='also try combinations that use more threads than there are cores')
+    args = parser.parse_args()
+
+    model = whisper.load_model(args.model, device='cpu')
+    clips = load_sample_clips(args.clips, args.max_seconds)
+    seconds = audio_seconds(clips)
+    print(f"{len(clips)} clips, {seconds:.1f}s of audio, model '{args.model}', {cores} cores")
+
+    # Warm up so the first measurement does not include lazy initialization
+    model.transcribe(clips[0], fp16=False)
+
+    limit = cores * 2 if args.oversubscribe else cores
+    results = []
+    for concurrency in powers_of_two(limit):
+        for threads in powers_of_two(limit // concurrency):
+            budget = CpuBudget(concurrency, threads)
+            elapsed = run(model, clips, budget, max(args.submitters, concurrency))
+            results.append((len(clips) / elapsed, concurrency, threads))
+            print(f"{concurrency:>3} x {threads:<3} threads: {len(clips) / elapsed:6.2f} clips/sec, "
+                  f"{seconds / elapsed:6.1f}x real time ({elapsed:.1f}s)")
+
+    best, concurrency, threads = max(results)
+    print(f"Best: ASR_CONCURRENCY={concurrency} ASR_TORCH_THREADS={threads} ({best:.2f} clips/sec)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_first_audio.py
+#
+# Time to first audio for answers generated whole and then synthesized, as before, versus
+# streamed from the chat API with each sentence synthesized as soon as it is complete.
+# Questions are answered by the local stub chat server (llm_stub_server.py), which generates
+# one word per --token-interval seconds. Reports the median and 95th percentile seconds from
+# sending the question to the first sentence of audio being written, and to all of it.
+#
+#     python benchmarks/bench_first_audio.py --questions 20 --latency 0.6 --token-interval 0.04
+#     python benchmarks/bench_first_audio.py --tts simulated  # without network access for gTTS
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from common import BACKEND_DIR  # noqa: F401 (puts the backend on sys.path)
+from llm_stub_server import serve
+from utils.llm_client import LLMClient
+from utils.tts_streaming import SpokenAnswer, synthesize_speech
+
+QUESTIONS = ["What time is lunch?", "When is my next pill?", "When is the nurse coming?",
+             "What is my room number?", "When are visiting hours?"]
+
+def simulated_tts(seconds_per_char):
+    def synthesize(text):
+        time.sleep(0.15 + seconds_per_char * len(text))  # Round trip plus synthesis
+        return b'\0' * (len(text) * 100)
+    return synthesize
+
+def answer(client, question, path, executor, synthesize, streamed):
+    """
+    Returns (seconds to first audio, seconds to all audio) for one question.
+    """
+    messages = [{'role': 'user', 'content': f"Question: {question}"}]
+    started = time.perf_counter()
+    speech = SpokenAnswer(path, executor, synthesize)
+    if streamed:
+        for piece in client.chat_stream(messages, model='stub'):
+            speech.feed(piece)
+        speech.finish()
+        return speech.first_audio_seconds, time.perf_counter() - started
+    # Before sentence streaming: the whole answer, then the whole answer's audio
+    text = client.chat(messages, model='stub')
+    with open(path, 'wb') as f:
+        f.write(synthesize(text))
+    elapsed = time.perf_counter() - started
+    return elapsed, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Time to first audio, whole versus streamed answers')
+    parser.add_argument('--questions', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.6, help='stub seconds to the first word')
+    parser.add_argument('--token-interval', type=float, default=0.04, help='stub seconds per further word')
+    parser.add_argument('--tts', choices=['gtts', 'simulated'], default='gtts')
+    parser.add_argument('--tts-seconds-per-char', type=float, default=0.004, help='for --tts simulated')
+    parser.add_argument('--tts-workers', type=int, default=4)
+    args = parser.parse_args()
+
+    server, _ = serve(port=0, latency=args.latency, token_interval=args.token_interval)
+    client = LLMClient(f"http://127.0.0.1:{server.server_port}/v1", api_key='stub')
+    executor = ThreadPoolExecutor(max_workers=args.tts_workers)
+    synthesize = synthesize_speech if args.tts == 'gtts' else simulated_tts(args.tts_seconds_per_char)
+
+    print(f"{'mode':>8} {'first p50':>9} {'first p95':>9} {'all p50':>8} {'all p95':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for streamed in (False, True):
+            first, total = [], []
+            for i in range(args.questions):
+                path = os.path.join(directory, f"answer_{i}.mp3")
+                seconds = answer(client, QUESTIONS[i % len(QUESTIONS)], path, executor, synthesize, streamed)
+                first.append(seconds[0])
+                total.append(seconds[1])
+            print(f"{'streamed' if streamed else 'whole':>8} {np.percentile(first, 50):9.3f} "
+                  f"{np.percentile(first, 95):9.3f} {np.percentile(total, 50):8.3f} {np.percentile(total, 95):8.3f}")
+
+    executor.shutdown()
+    client.close()
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/bench_import_time.py
+#
+# How long importing a backend module takes, from `python -X importtime` in a fresh
+# interpreter, and which heavy dependencies it pulls in. API processes import app, so
+# anything listed under "heavy modules loaded" there is paid on every API start.
+#
+#     python benchmarks/bench_import_time.py --module app --top 15 --runs 3
+
+import argparse
+import re
+import subprocess
+import sys
+from common import BACKEND_DIR
+
+HEAVY_MODULES = ['torch', 'whisper', 'gtts', 'pydub', 'openai']
+
+# import time: self [us] | cumulative | imported package
+LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def measure(module):
+    """
+    Import module in a fresh interpreter. Returns (entries, loaded): entries as
+    (cumulative_us, self_us, depth, name) for every import, loaded the heavy modules
+    that ended up in sys.modules.
+    """
+    code = (f"import {module}, sys; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=BACKEND_DIR,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((int(cumulative_us), int(self_us), len(indent) // 2, name))
+    lines = result.stdout.strip().splitlines()
+    loaded = [name for name in lines[-1].split(',') if name] if lines else []
+    return entries, loaded
+
+def main():
+    parser = argparse.ArgumentParser(description='Backend import time report')
+    parser.add_argument('--module', default='app', help='module to import, e.g. app or worker')
+    parser.add_argument('--top', type=int, default=15, help='number of slowest top-level imports to list')
+    parser.add_argument('--runs', type=int, default=3, help='report the fastest of this many runs')
+    args = parser.parse_args()
+
+    best = None
+    for _ in range(args.runs):
+        entries, loaded = measure(args.module)
+        total = next(cumulative for cumulative, _, _, name in reversed(entries) if name == args.module)
+        if best is None or total < best[0]:
+            best = (total, entries, loaded)
+    total, entries, loaded = best
+
+    print(f"import {args.module}: {total / 1e6:.2f}s (fastest of {args.runs} runs)")
+    print(f"Heavy modules loaded: {', '.join(loaded) or 'none'}")
+    # Imports made directly by the module (or by the interpreter before it), slowest first
+    direct = sorted((entry for entry in entries if entry[2] <= 1 and entry[3] != args.module), reverse=True)
+    print(f"\n{'cumulative':>11} {'self':>9}  module")
+    for cumulative, self_us, _, name in direct[:args.top]:
+        print(f"{cumulative / 1e3:9.1f}ms {self_us / 1e3:7.1f}ms  {name}")
+
+if __name__ == '__main__':
+    main()
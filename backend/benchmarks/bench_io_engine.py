@@ -0,0 +1,197 @@
+# benchmarks/bench_io_engine.py
+#
+# Memory, threads and throughput with many answers in flight at once: a thread per request
+# blocking on requests (the threaded llm/tts stages) versus coroutines on the IO engine with
+# the aiohttp client. Each request streams an answer from the stub chat server
+# (llm_stub_server.py, run as its own process) and synthesizes its sentences with a
+# simulated TTS on a shared pool, like the llm and tts stages. Each mode runs in a fresh
+# interpreter, so its peak RSS is its own.
+#
+#     python benchmarks/bench_io_engine.py --concurrency 200 --requests 600 --latency 1.0
+#     python benchmarks/bench_io_engine.py --modes threads-4,threads-200,engine
+#
+# threads-4 is the default AUDIO_IO_WORKERS, and takes minutes for a few hundred requests.
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from common import BACKEND_DIR  # noqa: F401 (puts the backend on sys.path)
+
+def simulated_tts(seconds):
+    def synthesize(text):
+        time.sleep(seconds)  # A TTS round trip
+        return b'\0' * (len(text) * 100)
+    return synthesize
+
+def process_status():
+    """
+    RSS in bytes and thread count of this process, from /proc.
+    """
+    with open('/proc/self/status') as f:
+        fields = dict(line.split(':', 1) for line in f if ':' in line)
+    return int(fields['VmRSS'].split()[0]) * 1024, int(fields['Threads'])
+
+class PeakSampler:
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.rss = self.threads = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss, threads = process_status()
+            self.rss, self.threads = max(self.rss, rss), max(self.threads, threads)
+
+def run_threads(args, url, directory, tts_executor, threads):
+    from utils.llm_client import LLMClient
+    from utils.tts_streaming import SpokenAnswer
+
+    client = LLMClient(url, 'stub', pool_size=threads, read_timeout=60)
+    synthesize = simulated_tts(args.tts_seconds)
+
+    def answer(i):
+        started = time.perf_counter()
+        speech = SpokenAnswer(os.path.join(directory, f"{i}.mp3"), tts_executor, synthesize)
+        for piece in client.chat_stream([{'role': 'user', 'content': f"Question: question {i}"}], model='stub'):
+            speech.feed(piece)
+        speech.finish()
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(answer, range(args.requests)))
+    client.close()
+    return latencies
+
+def run_engine(args, url, directory, tts_executor):
+    from utils.async_llm_client import AsyncLLMClient
+    from utils.io_engine import IOEngine
+    from utils.tts_streaming import SpokenAnswer
+
+    engine = IOEngine()
+    client = AsyncLLMClient(url, 'stub', pool_size=args.concurrency, read_timeout=60)
+    synthesize = simulated_tts(args.tts_seconds)
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def answer(i):
+        async with slots:
+            started = time.perf_counter()
+            speech = SpokenAnswer(os.path.join(directory, f"{i}.mp3"), tts_executor, synthesize)
+            async for piece in client.chat_stream([{'role': 'user', 'content': f"Question: question {i}"}],
+                                                  model='stub'):
+                speech.feed(piece)
+            await speech.finish_async()
+            return time.perf_counter() - started
+
+    async def answer_all():
+        try:
+            return await asyncio.gather(*(answer(i) for i in range(args.requests)))
+        finally:
+            await client.close()
+
+    # Submitted from a synchronous thread, as the pipeline does
+    latencies = engine.run(answer_all())
+    engine.stop()
+    return latencies
+
+def run_child(args):
+    """
+    Run one mode in this process and print its results as JSON.
+    """
+    url = f"http://127.0.0.1:{args.port}/v1"
+    tts_executor = ThreadPoolExecutor(max_workers=args.tts_workers)
+    with tempfile.TemporaryDirectory() as directory:
+        if args.mode == 'engine':
+            import aiohttp  # noqa: F401 (imported before the baseline, like requests below)
+        import requests  # noqa: F401
+        import utils.tts_streaming  # noqa: F401
+        baseline_rss, baseline_threads = process_status()
+        started = time.perf_counter()
+        with PeakSampler() as peak:
+            if args.mode == 'engine':
+                latencies = run_engine(args, url, directory, tts_executor)
+            else:
+                latencies = run_threads(args, url, directory, tts_executor, int(args.mode.split('-')[1]))
+        elapsed = time.perf_counter() - started
+    print(json.dumps({
+        'seconds': elapsed,
+        'p50': float(np.percentile(latencies, 50)),
+        'p95': float(np.percentile(latencies, 95)),
+        'rss_mib': (peak.rss - baseline_rss) / 2 ** 20,
+        'threads': peak.threads - baseline_threads
+    }))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_stub(args):
+    port = free_port()
+    stub = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, 'benchmarks', 'llm_stub_server.py'),
+                             '--port', str(port), '--latency', str(args.latency),
+                             '--token-interval', str(args.token_interval)], stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return stub, port
+        except OSError:
+            time.sleep(0.1)
+    stub.kill()
+    raise RuntimeError("Stub chat server did not start")
+
+def main():
+    parser = argparse.ArgumentParser(description='Thread-per-request versus IO engine at high concurrency')
+    parser.add_argument('--concurrency', type=int, default=200, help='requests in flight at once')
+    parser.add_argument('--requests', type=int, default=600)
+    parser.add_argument('--modes', default=None,
+                        help='comma-separated: threads-N (N threads) and engine (default: threads-<concurrency>, engine)')
+    parser.add_argument('--latency', type=float, default=1.0, help='stub seconds to the first word')
+    parser.add_argument('--token-interval', type=float, default=0.02, help='stub seconds per further word')
+    parser.add_argument('--tts-seconds', type=float, default=0.05, help='simulated seconds per sentence')
+    parser.add_argument('--tts-workers', type=int, default=32)
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_child(args)
+        return
+
+    modes = (args.modes or f"threads-{args.concurrency},engine").split(',')
+    stub, port = start_stub(args)
+    print(f"{args.requests} requests, {args.concurrency} in flight, stub latency {args.latency}s "
+          f"+ {args.token_interval}s/word, TTS {args.tts_seconds}s/sentence on {args.tts_workers} threads")
+    print(f"{'mode':>12} {'seconds':>8} {'req/s':>7} {'p50 s':>7} {'p95 s':>7} {'+RSS MiB':>9} {'+threads':>8}")
+    try:
+        for mode in modes:
+            child = subprocess.run([sys.executable, __file__, '--mode', mode, '--port', str(port)] + sys.argv[1:],
+                                   capture_output=True, text=True)
+            if child.returncode != 0:
+                print(f"{mode:>12} failed:\n{child.stderr}")
+                continue
+            result = json.loads(child.stdout.strip().splitlines()[-1])
+            print(f"{mode:>12} {result['seconds']:8.2f} {args.requests / result['seconds']:7.1f} "
+                  f"{result['p50']:7.2f} {result['p95']:7.2f} {result['rss_mib']:9.1f} {result['threads']:8d}")
+    finally:
+        stub.terminate()
+
+if __name__ == '__main__':
+    main()
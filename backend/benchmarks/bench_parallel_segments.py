@@ -0,0 +1,80 @@
+# benchmarks/bench_parallel_segments.py
+#
+# Wall-clock time to transcribe one long recording (the sample clips joined with pauses) as
+# a single model.transcribe call versus split at silence and transcribed in parallel, for
+# each core count up to the machine's. Also reports how far the stitched transcript drifts
+# from the single-call one.
+#
+#     python benchmarks/bench_parallel_segments.py --model base --seconds 300
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import torch
+from common import load_sample_clips, word_error_rate, SAMPLE_RATE
+import whisper
+from utils.asr_batching import BatchingTranscriber, transcribe_segments
+from utils.cpu_budget import CpuBudget
+
+def long_recording(seconds, pause_seconds=1.0):
+    """
+    Join the sample clips, separated by pauses of low-level noise, until the recording is seconds long.
+    """
+    rng = np.random.default_rng(0)
+    parts, total = [], 0
+    for clip in load_sample_clips(1000):
+        if total >= seconds * SAMPLE_RATE:
+            break
+        pause = rng.normal(0, 0.002, int(pause_seconds * SAMPLE_RATE)).astype(np.float32)
+        parts.extend([clip, pause])
+        total += len(clip) + len(pause)
+    return np.concatenate(parts)[:int(seconds * SAMPLE_RATE)]
+
+def core_counts(limit):
+    count = 1
+    while count < limit:
+        yield count
+        count *= 2
+    yield limit
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel segment transcription benchmark')
+    parser.add_argument('--model', default='base')
+    parser.add_argument('--seconds', type=float, default=300.0, help='length of the test recording')
+    parser.add_argument('--segment-seconds', type=float, default=30.0)
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='above 1, segments are batched on one thread instead of run concurrently')
+    args = parser.parse_args()
+
+    model = whisper.load_model(args.model, device='cpu')
+    audio = long_recording(args.seconds)
+    print(f"{len(audio) / SAMPLE_RATE:.0f}s recording, model '{args.model}', {os.cpu_count()} cores")
+    model.transcribe(audio[:5 * SAMPLE_RATE], fp16=False)  # Warm up
+
+    baseline = None
+    for cores in core_counts(os.cpu_count() or 1):
+        torch.set_num_threads(cores)
+        started = time.perf_counter()
+        reference = model.transcribe(audio, fp16=False)['text'].strip()
+        sequential = time.perf_counter() - started
+        baseline = baseline or sequential
+
+        # Spend the same cores on segments: one thread each, or one batch using all of them
+        if args.batch_size > 1:
+            budget, workers = CpuBudget(1, cores), args.batch_size
+        else:
+            budget, workers = CpuBudget(cores, 1), cores
+        transcriber = BatchingTranscriber(model, max_batch_size=args.batch_size, cpu_budget=budget)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            started = time.perf_counter()
+            text = transcribe_segments(transcriber, audio, executor, segment_seconds=args.segment_seconds)
+            parallel = time.perf_counter() - started
+
+        print(f"{cores:>3} cores: single call {sequential:6.1f}s ({baseline / sequential:4.1f}x), "
+              f"segments {parallel:6.1f}s ({baseline / parallel:4.1f}x), "
+              f"WER vs single call {word_error_rate(reference, text):.3f}")
+
+if __name__ == '__main__':
+    main()
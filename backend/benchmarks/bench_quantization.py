@@ -0,0 +1,79 @@
+# benchmarks/bench_quantization.py
+#
+# Compare the fp32 Whisper model with its int8 dynamically quantized version on the sample
+# clips: word error rate of the int8 transcripts against the fp32 ones (drift), against
+# reference transcripts when given, and the real-time factor (processing time / audio
+# duration) of each.
+#
+#     python benchmarks/bench_quantization.py --model base --references refs.json
+#
+# refs.json maps sample file names to their correct transcript, e.g. {"test_speech.mp3": "..."}
+
+import argparse
+import json
+import os
+import time
+import torch
+from common import sample_files, word_error_rate, SAMPLE_RATE
+import whisper
+from utils.model_registry import load_whisper_model
+
+def transcribe_all(model, clips, repeat):
+    """
+    Transcribe every clip, keeping the fastest of repeat runs. Returns (texts, seconds).
+    """
+    texts, total = [], 0.0
+    for audio in clips:
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            text = model.transcribe(audio, fp16=False, temperature=0.0)['text'].strip()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        texts.append(text)
+        total += best
+    return texts, total
+
+def main():
+    parser = argparse.ArgumentParser(description='Whisper int8 quantization accuracy/speed benchmark')
+    parser.add_argument('--model', default='base')
+    parser.add_argument('--references', help='JSON file mapping sample file names to reference transcripts')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per clip; the fastest is kept')
+    parser.add_argument('--threads', type=int, default=0, help='torch threads (0 leaves the default)')
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    references = {}
+    if args.references:
+        with open(args.references) as f:
+            references = json.load(f)
+
+    paths = sample_files()
+    clips = [whisper.load_audio(path) for path in paths]
+    seconds = sum(len(clip) for clip in clips) / SAMPLE_RATE
+    print(f"{len(clips)} clips, {seconds:.1f}s of audio, model '{args.model}', {torch.get_num_threads()} threads")
+
+    results = {}
+    for mode in ['none', 'int8']:
+        model = load_whisper_model(args.model, quantization=mode)
+        if mode == 'none':
+            model = model.cpu()
+        texts, elapsed = transcribe_all(model, clips, args.repeat)
+        results[mode] = texts
+        line = f"{mode:>5}: {elapsed:6.2f}s, RTF {elapsed / seconds:.3f}"
+        scored = [(references[os.path.basename(path)], text) for path, text in zip(paths, texts)
+                  if os.path.basename(path) in references]
+        if scored:
+            line += f", WER vs references {sum(word_error_rate(r, h) for r, h in scored) / len(scored):.3f}"
+        print(line)
+        del model
+
+    print("int8 drift from fp32:")
+    for path, fp32_text, int8_text in zip(paths, results['none'], results['int8']):
+        print(f"{os.path.basename(path):>30}: WER {word_error_rate(fp32_text, int8_text):.3f}")
+    drift = sum(word_error_rate(a, b) for a, b in zip(results['none'], results['int8'])) / len(paths)
+    print(f"Mean WER of int8 against fp32: {drift:.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/bench_question_matcher.py
+#
+# Offline evaluation of the paraphrase matcher. Replays a log of questions, each labelled
+# with its intent, in order: every question is first matched against what that resident
+# asked before, then added. A match is correct when the stored question had the same intent.
+# Questions the resident already asked in the same words are left out, since the response
+# cache answers those. For each threshold it reports precision (correct matches / matches,
+# the share of served answers that answered the right question), recall (correct matches /
+# paraphrases of an earlier question) and the chat latency saved per question. Pick
+# QUESTION_MATCHER_THRESHOLD from the lowest threshold whose precision you can accept.
+#
+#     python benchmarks/bench_question_matcher.py --residents 50 --llm-seconds 1.5
+#     python benchmarks/bench_question_matcher.py --log questions.jsonl
+#
+# --log takes JSON lines of {"user_id": ..., "question": ..., "intent": ...}; without it
+# a synthetic log is generated from the phrasings below.
+
+import argparse
+import json
+import random
+import time
+from common import BACKEND_DIR  # noqa: F401 (puts the backend on sys.path)
+from utils.question_matcher import QuestionMatcher
+from utils.keyword_spotting import normalize_text
+
+INTENTS = {
+    'lunch': ["what time is lunch", "when is lunch", "when's lunch served", "what time do we eat lunch"],
+    'dinner': ["what time is dinner", "when's dinner", "when is dinner served", "what time do we have dinner"],
+    'breakfast': ["what time is breakfast", "when is breakfast", "when do we get breakfast"],
+    'next_dose': ["when is my next pill", "when do i take my next pill", "what time is my next dose",
+                  "when should i take my pills"],
+    'next_meal': ["when is my next meal", "when do we eat next", "what time is the next meal"],
+    'medications': ["what medications am i on", "which medicines do i take", "what pills am i taking"],
+    'nurse': ["when is the nurse coming", "when will the nurse visit", "what time does the nurse come"],
+    'family': ["when is my daughter coming", "when is my family visiting", "is my son coming today"],
+    'visiting_hours': ["when are visiting hours", "what are the visiting hours", "when can visitors come"],
+    'weather': ["what's the weather today", "what is the weather like today", "how is the weather outside"],
+    'date': ["what day is it today", "what is today's date", "what's the date today"],
+    'room': ["what is my room number", "which room am i in", "what room am i in"],
+    'therapy': ["when is my physical therapy", "what time is physio", "when do i have physical therapy"],
+    'doctor': ["when is my doctor's appointment", "when do i see the doctor", "what time is my appointment with the doctor"]
+}
+
+def synthetic_log(residents, questions_per_resident, seed):
+    rng = random.Random(seed)
+    log = []
+    for user_id in range(residents):
+        # Each resident cares about a few topics and asks about them in different words
+        topics = rng.sample(sorted(INTENTS), k=5)
+        for _ in range(questions_per_resident):
+            intent = rng.choice(topics)
+            log.append({'user_id': user_id, 'question': rng.choice(INTENTS[intent]), 'intent': intent})
+    rng.shuffle(log)  # Residents interleave; each resident's own order is random anyway
+    return log
+
+def replay(log, threshold):
+    """
+    Returns (matches, correct, repeats, lookup_seconds) over the questions whose exact wording
+    the resident had not used before: exact repeats are already served by the response cache.
+    """
+    matcher = QuestionMatcher(threshold=threshold, ttl=float('inf'))
+    asked = set()
+    intents = set()
+    matches = correct = repeats = 0
+    lookup_seconds = 0.0
+    for entry in log:
+        scope = str(entry['user_id'])
+        started = time.perf_counter()
+        match = matcher.match(scope, entry['question'])
+        lookup_seconds += time.perf_counter() - started
+        if (scope, normalize_text(entry['question'])) not in asked:
+            repeats += (scope, entry['intent']) in intents
+            if match is not None:
+                matches += 1
+                correct += match.answer == entry['intent']
+        # The answer stands in for the intent it answered
+        matcher.add(scope, entry['question'], entry['intent'])
+        asked.add((scope, normalize_text(entry['question'])))
+        intents.add((scope, entry['intent']))
+    return matches, correct, repeats, lookup_seconds
+
+def main():
+    parser = argparse.ArgumentParser(description='Paraphrase matcher evaluation')
+    parser.add_argument('--log', help='JSON lines of user_id, question and intent (default: synthetic)')
+    parser.add_argument('--residents', type=int, default=50)
+    parser.add_argument('--questions', type=int, default=12, help='questions per resident in the synthetic log')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--llm-seconds', type=float, default=1.5, help='latency of one chat call')
+    parser.add_argument('--thresholds', default='0.3,0.4,0.5,0.55,0.6,0.65,0.7,0.8')
+    args = parser.parse_args()
+
+    if args.log:
+        with open(args.log) as f:
+            log = [json.loads(line) for line in f if line.strip()]
+    else:
+        log = synthetic_log(args.residents, args.questions, args.seed)
+    print(f"{len(log)} questions from {len({entry['user_id'] for entry in log})} residents")
+
+    print(f"{'threshold':>9} {'matches':>8} {'precision':>9} {'recall':>7} {'lookup ms':>9} {'saved s/q':>9}")
+    for threshold in (float(value) for value in args.thresholds.split(',')):
+        matches, correct, repeats, lookup_seconds = replay(log, threshold)
+        precision = correct / matches if matches else 1.0
+        recall = correct / repeats if repeats else 0.0
+        # Chat calls skipped by correct matches, minus the time spent looking every question up
+        saved = (correct * args.llm_seconds - lookup_seconds) / len(log)
+        print(f"{threshold:9.2f} {matches:8d} {precision:9.1%} {recall:7.1%} "
+              f"{1000 * lookup_seconds / len(log):9.3f} {saved:9.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_vad.py
+#
+# Measure how much audio the silence-trimming VAD removes from the sample clips, what it
+# costs, and (with --transcribe) how much Whisper time it saves.
+#
+#     python benchmarks/bench_vad.py --pad-seconds 5 --transcribe --model base
+
+import argparse
+import os
+import time
+import numpy as np
+from common import sample_files, SAMPLE_RATE
+import whisper
+from utils.audio_processing import trim_silence
+
+def with_silence(audio, pad_seconds, noise_level=0.002, seed=0):
+    """
+    Surround a clip with low-level noise, like the idle time devices record around a question.
+    """
+    rng = np.random.default_rng(seed)
+    pad = rng.normal(0, noise_level, int(pad_seconds * SAMPLE_RATE)).astype(np.float32)
+    return np.concatenate([pad, audio, pad])
+
+def main():
+    parser = argparse.ArgumentParser(description='VAD silence trimming benchmark')
+    parser.add_argument('--pad-seconds', type=float, default=5.0,
+                        help='silence added before and after each sample clip (0 to use the clips as recorded)')
+    parser.add_argument('--transcribe', action='store_true', help='also time model.transcribe with and without VAD')
+    parser.add_argument('--model', default='base')
+    args = parser.parse_args()
+
+    model = whisper.load_model(args.model, device='cpu') if args.transcribe else None
+    total_seconds = skipped_total = vad_time = 0.0
+    asr_full = asr_trimmed = 0.0
+
+    for path in sample_files():
+        audio = whisper.load_audio(path)
+        if args.pad_seconds:
+            audio = with_silence(audio, args.pad_seconds)
+
+        started = time.perf_counter()
+        trimmed, skipped = trim_silence(audio)
+        elapsed = time.perf_counter() - started
+
+        seconds = len(audio) / SAMPLE_RATE
+        total_seconds += seconds
+        skipped_total += skipped
+        vad_time += elapsed
+        line = (f"{os.path.basename(path):>30}: {seconds:6.1f}s audio, skipped {skipped:5.1f}s, "
+                f"VAD {elapsed * 1000:5.1f} ms")
+
+        if model is not None:
+            started = time.perf_counter()
+            model.transcribe(audio, fp16=False)
+            full = time.perf_counter() - started
+            trimmed_time = 0.0
+            if trimmed is not None:
+                started = time.perf_counter()
+                model.transcribe(trimmed, fp16=False)
+                trimmed_time = time.perf_counter() - started
+            asr_full += full
+            asr_trimmed += trimmed_time
+            line += f", ASR {full:.2f}s -> {trimmed_time:.2f}s"
+        print(line)
+
+    print(f"Total: skipped {skipped_total:.1f}s of {total_seconds:.1f}s "
+          f"({100 * skipped_total / max(total_seconds, 1e-9):.0f}%), VAD cost {vad_time * 1000:.1f} ms")
+    if model is not None:
+        print(f"ASR time: {asr_full:.2f}s without VAD, {asr_trimmed:.2f}s with VAD")
+
+if __name__ == '__main__':
+    main()
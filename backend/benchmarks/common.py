@@ -0,0 +1,61 @@
+# benchmarks/common.py
+#
+# Shared helpers for the scripts in this directory. Run them from the backend directory,
+# e.g. python benchmarks/bench_asr_batching.py
+
+import os
+import sys
+import glob
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SAMPLE_RATE = 16000
+
+def sample_files():
+    """
+    Audio shipped with the repo plus anything left in backend/temp.
+    """
+    patterns = ['test_*.mp3', os.path.join('temp', '*.mp3'), os.path.join('temp', '*.wav'), os.path.join('temp', '*.ogg')]
+    files = []
+    for pattern in patterns:
+        files.extend(sorted(glob.glob(os.path.join(BACKEND_DIR, pattern))))
+    return files
+
+def load_sample_clips(count, max_seconds=None):
+    """
+    Decode the sample files to 16 kHz mono float32 arrays, cut to max_seconds, and repeat
+    them until there are count clips.
+    """
+    import whisper
+
+    sources = []
+    for path in sample_files():
+        audio = whisper.load_audio(path)
+        if max_seconds:
+            audio = audio[:int(max_seconds * SAMPLE_RATE)]
+        sources.append(audio)
+    if not sources:
+        raise RuntimeError("No sample audio found in the backend directory")
+    return [sources[i % len(sources)] for i in range(count)]
+
+def audio_seconds(clips):
+    return sum(len(clip) for clip in clips) / SAMPLE_RATE
+
+def normalize_words(text):
+    return ''.join(c.lower() if c.isalnum() or c.isspace() or c == "'" else ' ' for c in text).split()
+
+def word_error_rate(reference, hypothesis):
+    """
+    Word-level edit distance between the two texts divided by the number of reference words.
+    """
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / len(ref)
@@ -0,0 +1,156 @@
+# benchmarks/llm_stub_server.py
+#
+# Local stand-in for the OpenAI chat completions API, for running and load-testing the
+# whole pipeline offline. It answers POST /v1/chat/completions after a configurable delay
+# with a canned answer that quotes the question, keeps connections alive like the real API,
+# and can fail a share of requests. The answer is generated one word per --token-interval
+# seconds after the first, and streamed as server-sent events when the request asks for
+# "stream": true. GET /stats reports requests and connections served.
+#
+#     python benchmarks/llm_stub_server.py --port 8008 --latency 0.8 --jitter 0.2 --token-interval 0.03
+#     LLM_BASE_URL=http://127.0.0.1:8008/v1 python app.py
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # Accept hundreds of concurrent clients without dropped connects
+
+class StubStats:
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def add(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self):
+        with self.lock:
+            return {'requests': self.requests, 'connections': self.connections, 'failures': self.failures}
+
+def make_handler(latency, jitter, error_rate, stats, token_interval=0.0):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, so clients can reuse connections
+
+        def setup(self):
+            super().setup()
+            stats.add('connections')
+
+        def do_GET(self):
+            if self.path.rstrip('/') == '/stats':
+                self._send(200, stats.as_dict())
+            else:
+                self._send(404, {'error': {'message': 'Not found'}})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if self.path.rstrip('/') != '/v1/chat/completions':
+                self._send(404, {'error': {'message': 'Not found'}})
+                return
+            stats.add('requests')
+            time.sleep(max(0.0, random.gauss(latency, jitter)) if jitter else latency)
+            if random.random() < error_rate:
+                stats.add('failures')
+                self._send(503, {'error': {'message': 'Stub server failure'}})
+                return
+
+            # The pipeline's prompt ends with "Question: ..."
+            question = body['messages'][-1]['content'].strip().splitlines()[-1].removeprefix('Question:').strip()
+            answer = (f"This is a stand-in answer. You asked: {question.rstrip('?.! ')}? "
+                      f"A real model would say more, in a few sentences like these.")
+            if body.get('stream'):
+                self._stream(body, answer.split(' '))
+                return
+            time.sleep(token_interval * (len(answer.split()) - 1))
+            self._send(200, {
+                'id': f"chatcmpl-stub-{stats.requests}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': body.get('model', 'stub'),
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': answer}, 'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': len(answer.split()), 'total_tokens': len(answer.split())}
+            })
+
+        def _stream(self, body, words):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            try:
+                for i, word in enumerate(words):
+                    if i:
+                        time.sleep(token_interval)
+                    self._event({
+                        'id': f"chatcmpl-stub-{stats.requests}",
+                        'object': 'chat.completion.chunk',
+                        'model': body.get('model', 'stub'),
+                        'choices': [{'index': 0, 'delta': {'content': word if i == 0 else f" {word}"},
+                                     'finish_reason': None}]
+                    })
+                self._event('[DONE]')
+                self.wfile.write(b'0\r\n\r\n')
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+
+        def _event(self, payload):
+            data = f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n".encode('utf-8')
+            self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b'\r\n')
+            self.wfile.flush()
+
+        def _send(self, status, payload):
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            try:
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # The client gave up waiting, e.g. after its read timeout
+
+        def log_message(self, format, *args):
+            pass  # One line per request would drown out the pipeline's own logs
+
+    return StubHandler
+
+def serve(host='127.0.0.1', port=8008, latency=0.8, jitter=0.0, error_rate=0.0, token_interval=0.0):
+    """
+    Start the stub server on a background thread. Returns (server, stats); stop it with
+    server.shutdown().
+    """
+    stats = StubStats()
+    server = StubServer((host, port), make_handler(latency, jitter, error_rate, stats, token_interval))
+    threading.Thread(target=server.serve_forever, name='llm-stub', daemon=True).start()
+    return server, stats
+
+def main():
+    parser = argparse.ArgumentParser(description='OpenAI-compatible stub chat server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8008)
+    parser.add_argument('--latency', type=float, default=0.8, help='seconds before each answer')
+    parser.add_argument('--jitter', type=float, default=0.0, help='standard deviation of the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with 503')
+    parser.add_argument('--token-interval', type=float, default=0.0, help='seconds between the words of an answer')
+    args = parser.parse_args()
+
+    server, stats = serve(args.host, args.port, args.latency, args.jitter, args.error_rate, args.token_interval)
+    print(f"Stub chat API on http://{args.host}:{server.server_port}/v1 "
+          f"(latency {args.latency}s +/- {args.jitter}s, {args.token_interval}s per word, "
+          f"error rate {args.error_rate:.0%})")
+    try:
+        while True:
+            time.sleep(60)
+            print(f"Served {stats.as_dict()}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -6,10 +6,126 @@ from dotenv import load_dotenv
 # Load environment variables from .env
 load_dotenv()
 
+# Directory of this file. Paths below are relative to it rather than to the working
+# directory, so app.py and worker.py share them wherever they are started from.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')  # Optional
     SQLALCHEMY_DATABASE_URI = 'sqlite:///nurseai.db'  # Using SQLite for simplicity
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', 'your_openai_api_key')  # Replace with your actual API key
-    TEMP_DIR = os.path.join(os.getcwd(), 'temp')
-    LOG_DIR = os.path.join(os.getcwd(), 'logs')
+    TEMP_DIR = os.path.join(BASE_DIR, 'temp')
+    AUDIO_SPILL_BYTES = int(os.getenv('AUDIO_SPILL_BYTES', 2 * 1024 * 1024))  # Larger uploads go to TEMP_DIR; smaller ones stay in memory and the task row
+    LOG_DIR = os.path.join(BASE_DIR, 'logs')
+    WARMUP_RETRY_SECONDS = int(os.getenv('WARMUP_RETRY_SECONDS', 10))  # Retry interval for failed startup checks
+
+    # Audio processing worker pool
+    EMBEDDED_AUDIO_WORKERS = os.getenv('EMBEDDED_AUDIO_WORKERS', 'true').lower() == 'true'  # Set to false when running worker.py
+    AUDIO_WORKERS = int(os.getenv('AUDIO_WORKERS', 2))  # Threads for each CPU stage (decode, ASR)
+    AUDIO_IO_WORKERS = int(os.getenv('AUDIO_IO_WORKERS', 4))  # Threads for each network stage (LLM, TTS) when IO_ENGINE_ENABLED is off
+    IO_ENGINE_ENABLED = os.getenv('IO_ENGINE_ENABLED', 'true').lower() == 'true'  # Run the LLM and TTS stages as coroutines on one asyncio event loop
+    IO_ENGINE_CONCURRENCY = int(os.getenv('IO_ENGINE_CONCURRENCY', 256))  # Jobs in flight in each of those stages
+    AUDIO_STAGE_QUEUE_SIZE = int(os.getenv('AUDIO_STAGE_QUEUE_SIZE', 4))  # Jobs buffered in front of each stage
+    AUDIO_QUEUE_SIZE = int(os.getenv('AUDIO_QUEUE_SIZE', 20))  # Tasks allowed to wait for a worker
+    AUDIO_QUEUE_RETRY_AFTER = int(os.getenv('AUDIO_QUEUE_RETRY_AFTER', 30))  # Seconds, sent as Retry-After when full
+    AUDIO_URGENT_QUEUE_RESERVE = int(os.getenv('AUDIO_URGENT_QUEUE_RESERVE', 10))  # Extra queue slots only urgent tasks may use
+
+    # Durable task queue
+    TASK_LEASE_SECONDS = int(os.getenv('TASK_LEASE_SECONDS', 120))  # Claimed tasks are requeued if not renewed in time
+    TASK_HEARTBEAT_SECONDS = int(os.getenv('TASK_HEARTBEAT_SECONDS', 20))
+    TASK_POLL_SECONDS = float(os.getenv('TASK_POLL_SECONDS', 1.0))  # Idle workers check for new tasks this often
+    TASK_MAX_ATTEMPTS = int(os.getenv('TASK_MAX_ATTEMPTS', 3))
+    TASK_RETRY_BACKOFF = int(os.getenv('TASK_RETRY_BACKOFF', 5))  # Seconds, doubled after every failed attempt
+    TASK_RETRY_BACKOFF_MAX = int(os.getenv('TASK_RETRY_BACKOFF_MAX', 300))
+    TASK_PRIORITY_AGING_SECONDS = int(os.getenv('TASK_PRIORITY_AGING_SECONDS', 60))  # Waiting this long promotes a task one lane
+
+    # Standalone worker processes (python -m backend.worker)
+    WORKER_PROCESSES = int(os.getenv('WORKER_PROCESSES', os.cpu_count() or 1))
+    WORKER_THREADS = int(os.getenv('WORKER_THREADS', 1))  # Worker threads per process
+    WORKER_PREFORK = os.getenv('WORKER_PREFORK', 'true').lower() == 'true'  # Share one loaded model between workers
+    WORKER_MEMORY_REPORT_SECONDS = int(os.getenv('WORKER_MEMORY_REPORT_SECONDS', 300))
+
+    # Speech recognition
+    WHISPER_MODEL = os.getenv('WHISPER_MODEL', 'base')  # Options: 'tiny', 'base', 'small', 'medium', 'large'
+    MODEL_STORE_DIR = os.getenv('MODEL_STORE_DIR', os.path.join(BASE_DIR, 'models'))  # Whisper weights, memory-mapped when loaded
+    MODEL_STORE_DOWNLOAD = os.getenv('MODEL_STORE_DOWNLOAD', 'true').lower() == 'true'  # Set to false in production and fill the store with manage_models.py
+    WHISPER_QUANTIZATION = os.getenv('WHISPER_QUANTIZATION', 'none')  # 'int8' runs the linear layers in int8 on CPU; see benchmarks/bench_quantization.py
+    ASR_ADAPTIVE_MODEL = os.getenv('ASR_ADAPTIVE_MODEL', 'true').lower() == 'true'  # Fall back to smaller models under load
+    ASR_MODEL_SIZES = os.getenv('ASR_MODEL_SIZES', 'tiny,base,small').split(',')  # Smallest first; the selector uses those below WHISPER_MODEL, then WHISPER_MODEL
+    ASR_LATENCY_TARGET = float(os.getenv('ASR_LATENCY_TARGET', 15.0))  # p95 seconds from upload to finished answer
+    ASR_DOWNGRADE_QUEUE_DEPTH = int(os.getenv('ASR_DOWNGRADE_QUEUE_DEPTH', 8))  # Pending tasks that trigger a smaller model
+    ASR_UPGRADE_QUEUE_DEPTH = int(os.getenv('ASR_UPGRADE_QUEUE_DEPTH', 2))  # Pending tasks low enough to step back up
+    ASR_MODEL_SWITCH_COOLDOWN = int(os.getenv('ASR_MODEL_SWITCH_COOLDOWN', 30))  # Minimum seconds between switches
+
+    # Whisper decoding profiles, chosen per request with the asr_profile form field on /process-audio.
+    # temperature lists the fallback temperatures, tried in order when a decode looks failed.
+    ASR_LANGUAGE = os.getenv('ASR_LANGUAGE', 'en')  # Set to '' to let Whisper detect the language
+    ASR_PROFILES = {
+        'fast': {'language': ASR_LANGUAGE or None, 'beam_size': None, 'temperature': (0.0,),
+                 'condition_on_previous_text': False},
+        'balanced': {'language': ASR_LANGUAGE or None, 'beam_size': None, 'temperature': (0.0, 0.4, 0.8),
+                     'condition_on_previous_text': False},
+        'accurate': {'language': ASR_LANGUAGE or None, 'beam_size': 5, 'best_of': 5,
+                     'temperature': (0.0, 0.2, 0.4, 0.6, 0.8, 1.0), 'condition_on_previous_text': True}
+    }
+    ASR_DEFAULT_PROFILE = os.getenv('ASR_DEFAULT_PROFILE', 'balanced')
+
+    ASR_BATCH_SIZE = int(os.getenv('ASR_BATCH_SIZE', 8))  # Clips decoded together; 1 disables batching
+    ASR_BATCH_WAIT_MS = int(os.getenv('ASR_BATCH_WAIT_MS', 20))  # How long the first clip waits for others
+    ASR_CONCURRENCY = int(os.getenv('ASR_CONCURRENCY', 2))  # Transcriptions (or batches) running at once per process
+    ASR_TORCH_THREADS = int(os.getenv('ASR_TORCH_THREADS', 0))  # Torch threads for each; 0 splits the cores evenly
+    ASR_PROCESSES = int(os.getenv('ASR_PROCESSES', 1))  # Processes on the host running ASR, which share its cores; worker.py sets it to --processes
+    ASR_SEGMENT_MIN_SECONDS = float(os.getenv('ASR_SEGMENT_MIN_SECONDS', 60))  # Longer recordings are split and transcribed in parallel
+    ASR_SEGMENT_SECONDS = float(os.getenv('ASR_SEGMENT_SECONDS', 30))  # Maximum segment length; 30s segments can be batched
+    ASR_SEGMENT_WORKERS = int(os.getenv('ASR_SEGMENT_WORKERS', 4))  # Segments of one recording in flight at once
+
+    # Voice activity detection before transcription
+    VAD_ENABLED = os.getenv('VAD_ENABLED', 'true').lower() == 'true'
+    VAD_PADDING_MS = int(os.getenv('VAD_PADDING_MS', 300))  # Audio kept around the detected speech
+    VAD_MIN_SPEECH_MS = int(os.getenv('VAD_MIN_SPEECH_MS', 250))  # Clips with less speech are dropped
+    VAD_ENERGY_MARGIN_DB = float(os.getenv('VAD_ENERGY_MARGIN_DB', 12.0))  # Speech level above the noise floor
+
+    # Transcripts cached by a hash of the decoded audio, so re-uploaded clips skip the model
+    TRANSCRIPT_CACHE_ENABLED = os.getenv('TRANSCRIPT_CACHE_ENABLED', 'true').lower() == 'true'
+    TRANSCRIPT_CACHE_ENTRIES = int(os.getenv('TRANSCRIPT_CACHE_ENTRIES', 1024))  # Entries kept in memory
+    TRANSCRIPT_CACHE_BYTES = int(os.getenv('TRANSCRIPT_CACHE_BYTES', 4 * 1024 * 1024))  # Transcript text kept in memory
+    TRANSCRIPT_CACHE_PATH = os.getenv('TRANSCRIPT_CACHE_PATH', '')  # SQLite file to persist entries; empty keeps them in memory only
+    TRANSCRIPT_CACHE_DISK_ENTRIES = int(os.getenv('TRANSCRIPT_CACHE_DISK_ENTRIES', 10000))  # Entries kept in the file
+
+    # Chat model API (OpenAI-compatible)
+    LLM_BASE_URL = os.getenv('LLM_BASE_URL', 'https://api.openai.com/v1')  # e.g. http://127.0.0.1:8008/v1 for benchmarks/llm_stub_server.py
+    LLM_API_KEY = os.getenv('LLM_API_KEY', '')  # Empty uses OPENAI_API_KEY
+    LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', 3.05))  # Seconds
+    LLM_READ_TIMEOUT = float(os.getenv('LLM_READ_TIMEOUT', 30))  # Seconds until the response starts, and between streamed pieces
+    LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', 10))  # Keep-alive connections shared by the process
+    LLM_ASYNC_POOL_SIZE = int(os.getenv('LLM_ASYNC_POOL_SIZE', 100))  # Connections for the IO engine's requests
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 2))  # For connection errors, 429 and 5xx responses
+    LLM_STREAMING = os.getenv('LLM_STREAMING', 'true').lower() == 'true'  # Stream answers and start TTS on each finished sentence
+    TTS_WORKERS = int(os.getenv('TTS_WORKERS', 4))  # Sentences synthesized at once in the process
+    TTS_TIMEOUT_SECONDS = float(os.getenv('TTS_TIMEOUT_SECONDS', 60))  # Wait for an answer's audio; the task is retried after it
+
+    # Chat answers cached by resident, context version and normalized question
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH', os.path.join(BASE_DIR, 'temp', 'response_cache.db'))  # SQLite file shared by the workers on the host
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 900))  # Seconds; answers about times and schedules go stale
+    RESPONSE_CACHE_ENTRIES = int(os.getenv('RESPONSE_CACHE_ENTRIES', 5000))
+    RESPONSE_CACHE_BYTES = int(os.getenv('RESPONSE_CACHE_BYTES', 16 * 1024 * 1024))  # Answer text kept in the file
+    QUESTION_MATCHER_ENABLED = os.getenv('QUESTION_MATCHER_ENABLED', 'true').lower() == 'true'  # Serve answers to paraphrases of recent questions
+    QUESTION_MATCHER_THRESHOLD = float(os.getenv('QUESTION_MATCHER_THRESHOLD', 0.65))  # Similarity from 0 to 1; see benchmarks/bench_question_matcher.py
+    QUESTION_MATCHER_ENTRIES = int(os.getenv('QUESTION_MATCHER_ENTRIES', 50))  # Recent questions kept per resident
+
+    # Spoken emergency phrases raise the same alert as /panic-button as soon as they are transcribed
+    EMERGENCY_KEYWORDS_ENABLED = os.getenv('EMERGENCY_KEYWORDS_ENABLED', 'true').lower() == 'true'
+    EMERGENCY_PHRASES = os.getenv('EMERGENCY_PHRASES', "help,call the nurse,call a nurse,get the nurse,emergency,"
+                                  "i fell,i've fallen,i have fallen,i can't breathe,chest pain,call 911,ambulance").split(',')
+
+    # Chunked (streamed) audio uploads
+    STREAM_WINDOW_SECONDS = int(os.getenv('STREAM_WINDOW_SECONDS', 30))  # Audio transcribed as soon as this much arrived
+    STREAM_SESSION_TIMEOUT = int(os.getenv('STREAM_SESSION_TIMEOUT', 300))  # Idle sessions are discarded after this
+    STREAM_ASR_WORKERS = int(os.getenv('STREAM_ASR_WORKERS', 1))
+    STREAM_MAX_SESSIONS = int(os.getenv('STREAM_MAX_SESSIONS', 100))  # Open sessions per API process; more are refused with 429
+    STREAM_MAX_SESSION_BYTES = int(os.getenv('STREAM_MAX_SESSION_BYTES', 16 * 1024 * 1024))  # Audio held per session as float32 samples (about 4 minutes); larger sessions are refused with 413
+    # Transcribe windows in the API process while chunks arrive. Off, finish queues the whole
+    # session's audio for the workers instead, so the API process never loads Whisper
+    STREAM_WINDOW_ASR = os.getenv('STREAM_WINDOW_ASR', str(EMBEDDED_AUDIO_WORKERS)).lower() == 'true'
@@ -0,0 +1,92 @@
+# backend/emergency.py
+#
+# Emergency alerts. The /panic-button route and the keyword fast path both go through
+# send_emergency_alert, so a resident saying "help" alerts exactly like pressing the button.
+
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from models import User
+import metrics
+from utils.keyword_spotting import EmergencyPhraseDetector
+
+logger = logging.getLogger('background_tasks')
+
+# Alerts are sent on their own threads so the audio pipeline keeps going in parallel
+_alert_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='emergency-alert')
+
+_detector = None
+_detector_lock = threading.Lock()
+
+def generate_emergency_message(user):
+    """
+    Generate an emergency message containing the user's relevant information.
+    This message can later be sent to a nurse or notification system.
+    """
+    return f"EMERGENCY ALERT! \n" \
+           f"User: {user.first_name} {user.last_name}\n" \
+           f"Room: {user.room_number}\n" \
+           f"Device Status: {user.device_status or 'N/A'}\n" \
+           f"IP Address: {user.IP_address or 'N/A'}\n" \
+           f"Phone Number: {user.phone_number or 'N/A'}\n" \
+           f"Emergency Contact: {user.emergency_contact or 'N/A'}"
+
+def send_emergency_alert(user, source):
+    """
+    Raise an emergency alert for the user and return its message. source says what
+    triggered it ('panic-button', 'keyword').
+    """
+    emergency_message = generate_emergency_message(user)
+
+    # Simulate sending an emergency message (for now, just log it)
+    current_app.logger.info(f"Emergency message ({source}): {emergency_message}")
+    metrics.increment(f'emergency_alerts.{source}')
+
+    # In the future, this could send an SMS, email, or a real-time notification to a nurse.
+    return emergency_message
+
+def get_emergency_detector():
+    """
+    Return the detector for EMERGENCY_PHRASES, or None when EMERGENCY_KEYWORDS_ENABLED is off.
+    """
+    global _detector
+    if not current_app.config['EMERGENCY_KEYWORDS_ENABLED']:
+        return None
+    with _detector_lock:
+        if _detector is None:
+            _detector = EmergencyPhraseDetector(current_app.config['EMERGENCY_PHRASES'])
+        return _detector
+
+def check_for_emergency(user_id, text, heard_at=None):
+    """
+    Look for an emergency phrase in freshly transcribed text. On a match, send the alert in
+    the background and return the phrase; otherwise return None. heard_at is when the audio
+    arrived (UTC), for the time-to-alert metric.
+    """
+    detector = get_emergency_detector()
+    phrase = detector.find(text) if detector else None
+    if phrase is None:
+        return None
+
+    logger.warning(f"Emergency phrase '{phrase}' heard from user_id {user_id}, sending alert")
+    app = current_app._get_current_object()
+    _alert_executor.submit(_send_keyword_alert, app, user_id, phrase, heard_at)
+    return phrase
+
+def _send_keyword_alert(app, user_id, phrase, heard_at):
+    with app.app_context():
+        try:
+            user = User.query.get(user_id)
+            if not user:
+                logger.error(f"User with ID {user_id} not found, emergency alert for '{phrase}' not sent")
+                return
+            send_emergency_alert(user, source='keyword')
+        except Exception as e:
+            logger.error(f"Error sending emergency alert for user_id {user_id}: {e}")
+            return
+    if heard_at is not None:
+        seconds = (datetime.utcnow() - heard_at).total_seconds()
+        metrics.observe('emergency_time_to_alert_seconds', seconds)
+        logger.info(f"Emergency alert for user_id {user_id} sent {seconds:.2f}s after the audio arrived")
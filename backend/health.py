@@ -0,0 +1,114 @@
+# backend/health.py
+#
+# Startup warm-up and readiness. The warm-up exercises everything a request depends on:
+# the database, ASR (a short synthetic transcription, which also pays for lazy kernel
+# initialization and page faults before a real upload does) and the TTS backend.
+# /healthz/ready reports ready only once all of them have succeeded; failed checks are
+# retried every WARMUP_RETRY_SECONDS. API processes that leave tasks to worker.py
+# (EMBEDDED_AUDIO_WORKERS off) only check the database, so they never load Whisper.
+
+import threading
+import time
+import logging
+from datetime import datetime
+from sqlalchemy import text
+from extensions import db
+import metrics
+from background_tasks import warm_up_asr, warm_up_tts
+
+logger = logging.getLogger('background_tasks')
+
+def check_database():
+    db.session.execute(text('SELECT 1'))
+
+WARMUP_CHECKS = {
+    'database': check_database,
+    'asr': warm_up_asr,
+    'tts': warm_up_tts
+}
+
+def required_checks(app):
+    """
+    The checks this API process must pass: ASR and TTS only when it processes tasks itself.
+    """
+    if app.config['EMBEDDED_AUDIO_WORKERS']:
+        return list(WARMUP_CHECKS)
+    return ['database']
+
+class Readiness:
+    """
+    Outcome of the latest run of each warm-up check.
+    """
+    def __init__(self):
+        self.required = list(WARMUP_CHECKS)
+        self._checks = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, ok, seconds, error=None):
+        with self._lock:
+            self._checks[name] = {
+                'ok': ok,
+                'seconds': round(seconds, 3),
+                'error': error,
+                'checked_at': datetime.utcnow().isoformat()
+            }
+        metrics.set_gauge(f'ready.{name}', ok)
+
+    def passed(self, name):
+        with self._lock:
+            return self._checks.get(name, {}).get('ok', False)
+
+    def is_ready(self):
+        return all(self.passed(name) for name in self.required)
+
+    def status(self):
+        with self._lock:
+            checks = {name: dict(self._checks.get(name, {'ok': False, 'error': 'not run yet'}))
+                      for name in self.required}
+        return {'ready': all(check['ok'] for check in checks.values()), 'checks': checks}
+
+readiness = Readiness()
+
+def run_warmup(app, checks, stop=None):
+    """
+    Run the named warm-up checks until all have passed, retrying failed ones every
+    WARMUP_RETRY_SECONDS. Returns False if stop (a threading.Event) was set first.
+    """
+    readiness.required = list(checks)
+    while True:
+        for name in checks:
+            if readiness.passed(name):
+                continue
+            check = WARMUP_CHECKS[name]
+            started = time.perf_counter()
+            try:
+                with app.app_context():
+                    check()
+            except Exception as e:
+                readiness.record(name, False, time.perf_counter() - started, error=str(e))
+                logger.error(f"Warm-up check '{name}' failed: {e}")
+                continue
+            readiness.record(name, True, time.perf_counter() - started)
+            logger.info(f"Warm-up check '{name}' passed in {time.perf_counter() - started:.2f}s")
+
+        if readiness.is_ready():
+            logger.info("Warm-up complete, ready for traffic")
+            return True
+        if stop is None:
+            time.sleep(app.config['WARMUP_RETRY_SECONDS'])
+        elif stop.wait(app.config['WARMUP_RETRY_SECONDS']):
+            return False
+
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+def start_warmup(app):
+    """
+    Start the warm-up in the background, once per process.
+    """
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=run_warmup, args=(app, required_checks(app)),
+                                              name='warmup', daemon=True)
+            _warmup_thread.start()
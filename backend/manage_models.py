@@ -0,0 +1,76 @@
+# backend/manage_models.py
+#
+# Fill and check the Whisper model store (MODEL_STORE_DIR) ahead of time, so production
+# nodes (MODEL_STORE_DOWNLOAD=false) never download a model at startup. Run from the
+# backend directory:
+#
+#     python manage_models.py fetch base small          # download and verify
+#     python manage_models.py fetch base --source base.pt   # from a local copy
+#     python manage_models.py verify                    # check every stored model
+#     python manage_models.py list
+
+import argparse
+import logging
+import sys
+from config import Config
+from utils.model_store import ModelStore, ModelStoreError
+
+logger = logging.getLogger('background_tasks')
+
+def fetch(store, args):
+    if args.source and len(args.sizes) != 1:
+        raise ModelStoreError('--source takes exactly one model size')
+    for size in args.sizes:
+        entry = store.fetch(size, source=args.source)
+        store.verify(size)
+        print(f"{size}: stored {entry['bytes'] / 2 ** 20:.0f} MiB, sha256 {entry['sha256']}")
+
+def verify(store, args):
+    sizes = args.sizes or sorted(store.manifest())
+    failed = False
+    for size in sizes:
+        try:
+            store.verify(size)
+            print(f"{size}: OK")
+        except ModelStoreError as e:
+            print(f"{size}: FAILED, {e}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+def list_models(store, args):
+    manifest = store.manifest()
+    if not manifest:
+        print(f"No models in {store.root}")
+    for size, entry in sorted(manifest.items()):
+        print(f"{size:<10} {entry['bytes'] / 2 ** 20:8.0f} MiB  fetched {entry['fetched_at']}  sha256 {entry['sha256']}")
+
+def main():
+    parser = argparse.ArgumentParser(description='NurseAI Whisper model store')
+    parser.add_argument('--store', default=Config.MODEL_STORE_DIR, help='model store directory')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    fetch_parser = commands.add_parser('fetch', help='add models to the store and verify them')
+    fetch_parser.add_argument('sizes', nargs='+', help='model sizes, e.g. base small')
+    fetch_parser.add_argument('--source', help='checkpoint file to add instead of downloading')
+    fetch_parser.set_defaults(handler=fetch)
+
+    verify_parser = commands.add_parser('verify', help='check stored models against their SHA256')
+    verify_parser.add_argument('sizes', nargs='*', help='model sizes (default: all stored models)')
+    verify_parser.set_defaults(handler=verify)
+
+    list_parser = commands.add_parser('list', help='show the stored models')
+    list_parser.set_defaults(handler=list_models)
+
+    args = parser.parse_args()
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+
+    try:
+        args.handler(ModelStore(args.store, allow_download=True), args)
+    except ModelStoreError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
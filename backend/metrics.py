@@ -0,0 +1,72 @@
+# backend/metrics.py
+#
+# In-process counters, gauges and histograms. Every process keeps its own values;
+# the API serves its snapshot at /metrics and worker processes log theirs.
+
+import threading
+from collections import deque
+
+# Samples kept per histogram for percentile estimates
+HISTOGRAM_WINDOW = 1000
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_histograms = {}
+
+class _Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.samples = deque(maxlen=HISTOGRAM_WINDOW)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.samples.append(value)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': _percentile(ordered, 0.50),
+            'p95': _percentile(ordered, 0.95)
+        }
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+def increment(name, value=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def set_gauge(name, value):
+    with _lock:
+        _gauges[name] = value
+
+def observe(name, value):
+    with _lock:
+        if name not in _histograms:
+            _histograms[name] = _Histogram()
+        _histograms[name].observe(value)
+
+def get_counter(name):
+    with _lock:
+        return _counters.get(name, 0)
+
+def snapshot():
+    with _lock:
+        return {
+            'counters': dict(_counters),
+            'gauges': dict(_gauges),
+            'histograms': {name: histogram.summary() for name, histogram in _histograms.items()}
+        }
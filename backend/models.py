@@ -22,12 +22,30 @@ class User(db.Model):
 
 class Task(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        db.Index('ix_tasks_status_available_at', 'status', 'available_at'),  # Claim query
+        db.Index('ix_tasks_status_priority_available_at', 'status', 'priority', 'available_at'),  # Candidates per lane
+        db.Index('ix_tasks_user_id_claimed_at', 'user_id', 'claimed_at'),  # Last time each user was served
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     task_id = db.Column(db.String(36), unique=True, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     status = db.Column(db.String(20), nullable=False, default='PENDING')  # PENDING, IN_PROGRESS, SUCCESS, FAILURE
     result = db.Column(db.String, nullable=True)  # Path to the result file or error message
+    audio_file_path = db.Column(db.String, nullable=True)  # Uploaded audio waiting to be processed
+    audio_data = db.deferred(db.Column(db.LargeBinary, nullable=True))  # Small uploads kept in the row instead of on disk
+    priority = db.Column(db.String(10), nullable=False, default='routine')  # urgent, routine
+    asr_profile = db.Column(db.String(20), nullable=True)  # Whisper decoding profile, a key of Config.ASR_PROFILES
+    transcript = db.Column(db.String, nullable=True)  # Set once ASR is done, so retries skip it
+    partial_transcript = db.Column(db.String, nullable=True)  # Streamed windows transcribed before the rest of the audio
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    available_at = db.Column(db.DateTime, default=datetime.utcnow)  # Not claimable before this time (retry backoff)
+    claimed_at = db.Column(db.DateTime, nullable=True)  # Last time a worker picked the task up
+    lease_owner = db.Column(db.String(100), nullable=True)  # Worker currently holding the task
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
 
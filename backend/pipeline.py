@@ -0,0 +1,207 @@
+# backend/pipeline.py
+
+import threading
+import queue
+import inspect
+import logging
+from contextlib import nullcontext
+
+logger = logging.getLogger('background_tasks')
+
+_STOP = object()
+
+class Stage:
+    """
+    One step of a pipeline: a handler run by its own worker threads, fed from a bounded queue.
+    A coroutine handler runs on the pipeline's IOEngine instead, up to workers jobs at a time.
+    """
+    def __init__(self, name, handler, workers, queue_size):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.is_async = inspect.iscoroutinefunction(handler)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.next_stage = None
+        self.threads = []
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+        if self.is_async:
+            self.slots = threading.BoundedSemaphore(workers)
+            self.completed = queue.Queue()  # (job, error) of coroutines that have finished
+
+    def stats(self):
+        return {
+            'queue_depth': self.queue.qsize(),
+            'queue_capacity': self.queue.maxsize,
+            'busy_workers': self.busy,
+            'workers': self.workers,
+            'async': self.is_async,
+            'processed': self.processed,
+            'failed': self.failed
+        }
+
+class Pipeline:
+    """
+    Chain of stages connected by bounded queues, so a full queue blocks the stage in front of it.
+    Handlers update the job in place; a job that raises goes to on_error, one that clears the
+    last stage to on_success. Handlers and callbacks run inside context() when one is given.
+    """
+    def __init__(self, stages, on_success, on_error, context=None, engine=None):
+        if engine is None and any(stage.is_async for stage in stages):
+            raise ValueError("Pipelines with async stages need an IO engine")
+        self.stages = stages
+        self._engine = engine
+        for stage, next_stage in zip(stages, stages[1:]):
+            stage.next_stage = next_stage
+        self._on_success = on_success
+        self._on_error = on_error
+        self._context = context
+        self._lock = threading.Lock()
+        self._capacity = threading.Condition(self._lock)
+
+    def start(self):
+        for stage in self.stages:
+            if stage.is_async:
+                # The feeder starts coroutines and the collector runs the callbacks, so nothing
+                # blocking runs on the event loop
+                targets = [(self._feed, 'feeder'), (self._collect, 'collector')]
+            else:
+                targets = [(self._run, i) for i in range(stage.workers)]
+            for target, suffix in targets:
+                thread = threading.Thread(target=target, args=(stage,), name=f"{stage.name}-{suffix}", daemon=True)
+                thread.start()
+                stage.threads.append(thread)
+
+    def stop(self, timeout=None):
+        """
+        Stop every stage thread once the jobs already queued ahead of it are done.
+        """
+        for stage in self.stages:
+            for _ in range(1 if stage.is_async else stage.workers):
+                stage.queue.put(_STOP)
+            for thread in stage.threads:
+                thread.join(timeout)
+
+    def submit(self, job):
+        """
+        Add a job to the first stage, blocking while its queue is full.
+        """
+        self.stages[0].queue.put(job)
+
+    def wait_for_capacity(self, timeout=None):
+        """
+        Block until the first stage can take a job without waiting. Returns False on timeout.
+        """
+        with self._capacity:
+            return self._capacity.wait_for(lambda: not self.stages[0].queue.full(), timeout)
+
+    def _run(self, stage):
+        while True:
+            job = stage.queue.get()
+            if stage is self.stages[0]:
+                with self._capacity:
+                    self._capacity.notify()
+            if job is _STOP:
+                return
+
+            with self._lock:
+                stage.busy += 1
+            try:
+                finished = self._handle(stage, job)
+            finally:
+                with self._lock:
+                    stage.busy -= 1
+
+            if not finished:
+                stage.next_stage.queue.put(job)
+
+    def _handle(self, stage, job):
+        """
+        Run one stage on a job. Returns True when the job has left the pipeline.
+        """
+        with self._context() if self._context else nullcontext():
+            try:
+                stage.handler(job)
+            except Exception as e:
+                return self._finish(stage, job, e)
+            return self._finish(stage, job, None)
+
+    def _finish(self, stage, job, error):
+        """
+        Count a job that went through stage, failed when error is set, and run the callback
+        if it leaves the pipeline here. Returns True when it did.
+        """
+        if error is not None:
+            with self._lock:
+                stage.failed += 1
+            self._callback(self._on_error, job, error)
+            return True
+
+        with self._lock:
+            stage.processed += 1
+        if stage.next_stage is None:
+            self._callback(self._on_success, job)
+            return True
+        return False
+
+    def _feed(self, stage):
+        while True:
+            job = stage.queue.get()
+            if stage is self.stages[0]:
+                with self._capacity:
+                    self._capacity.notify()
+            if job is _STOP:
+                # Wait until every job in flight has been collected, then stop the collector
+                for _ in range(stage.workers):
+                    stage.slots.acquire()
+                stage.completed.put(_STOP)
+                return
+
+            stage.slots.acquire()
+            with self._lock:
+                stage.busy += 1
+            future = self._engine.submit(self._handle_async(stage, job))
+            future.add_done_callback(lambda future, job=job: stage.completed.put((job, self._result(future))))
+
+    async def _handle_async(self, stage, job):
+        # Runs on the loop; each coroutine has its own copy of the context, so one app
+        # context per job can stay pushed across its awaits
+        with self._context() if self._context else nullcontext():
+            try:
+                await stage.handler(job)
+            except Exception as e:
+                return e
+        return None
+
+    def _result(self, future):
+        try:
+            return future.result()
+        except BaseException as e:  # Cancelled when the engine stopped first
+            return e
+
+    def _collect(self, stage):
+        while True:
+            item = stage.completed.get()
+            if item is _STOP:
+                return
+            job, error = item
+            try:
+                with self._context() if self._context else nullcontext():
+                    finished = self._finish(stage, job, error)
+                if not finished:
+                    stage.next_stage.queue.put(job)
+            finally:
+                with self._lock:
+                    stage.busy -= 1
+                stage.slots.release()
+
+    def _callback(self, callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error(f"Error in pipeline callback {callback.__name__}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {stage.name: stage.stats() for stage in self.stages}
@@ -0,0 +1,69 @@
+# backend/scheduler.py
+
+from extensions import db
+from models import Task
+from datetime import datetime
+
+# Scheduling lanes, most urgent first
+PRIORITY_LANES = ['urgent', 'routine']
+DEFAULT_PRIORITY = 'routine'
+
+def lane_rank(priority):
+    try:
+        return PRIORITY_LANES.index(priority)
+    except ValueError:
+        return PRIORITY_LANES.index(DEFAULT_PRIORITY)
+
+def effective_rank(task, now, aging_seconds):
+    """
+    Lane rank after aging: every aging_seconds a task has waited moves it up one lane,
+    so routine work is never starved by a steady stream of urgent requests.
+    """
+    rank = lane_rank(task.priority)
+    if aging_seconds > 0 and task.created_at:
+        rank -= int((now - task.created_at).total_seconds() // aging_seconds)
+    return max(rank, 0)
+
+def pending_candidates(now, per_lane):
+    """
+    The claimable tasks the scheduler chooses from: the per_lane oldest of every lane, so an
+    urgent task is considered however long the routine backlog in front of it is.
+    """
+    candidates = []
+    for lane in PRIORITY_LANES:
+        if lane == DEFAULT_PRIORITY:
+            # Unknown priorities are scheduled in the default lane, as lane_rank does
+            in_lane = Task.priority.notin_([other for other in PRIORITY_LANES if other != lane])
+        else:
+            in_lane = Task.priority == lane
+        candidates += Task.query.filter(
+            Task.status == 'PENDING',
+            Task.available_at <= now,
+            in_lane
+        ).order_by(Task.available_at, Task.id).limit(per_lane).all()
+    return candidates
+
+def last_served_by_user(user_ids):
+    """
+    Map each user_id to the last time one of their tasks was claimed.
+    """
+    if not user_ids:
+        return {}
+    rows = db.session.query(Task.user_id, db.func.max(Task.claimed_at)).filter(
+        Task.user_id.in_(user_ids)
+    ).group_by(Task.user_id).all()
+    return {user_id: claimed_at for user_id, claimed_at in rows if claimed_at}
+
+def order_candidates(candidates, aging_seconds, now=None):
+    """
+    Order claimable tasks: highest effective lane first, then the user served least
+    recently (round-robin across residents within a lane), then oldest task first.
+    """
+    now = now or datetime.utcnow()
+    last_served = last_served_by_user({task.user_id for task in candidates})
+    return sorted(candidates, key=lambda task: (
+        effective_rank(task, now, aging_seconds),
+        last_served.get(task.user_id, datetime.min),
+        task.created_at or now,
+        task.id
+    ))
@@ -0,0 +1,229 @@
+# backend/task_queue.py
+
+from flask import current_app
+from extensions import db
+from models import Task
+from scheduler import pending_candidates, order_candidates, DEFAULT_PRIORITY
+from datetime import datetime, timedelta
+import os
+import logging
+
+logger = logging.getLogger('background_tasks')
+
+# Number of pending rows per lane the scheduler chooses from per claim attempt
+CLAIM_CANDIDATES = 100
+
+class PermanentTaskError(Exception):
+    """
+    Raised by task code for failures that retrying cannot fix, e.g. a deleted user.
+    """
+
+def retry_delay(attempts):
+    """
+    Backoff before the next attempt, doubling with every attempt already made.
+    """
+    base = current_app.config['TASK_RETRY_BACKOFF']
+    return min(base * 2 ** max(attempts - 1, 0), current_app.config['TASK_RETRY_BACKOFF_MAX'])
+
+def upgrade_schema():
+    """
+    Add the tasks columns and indexes missing from a database created by an older version.
+    db.create_all() only creates missing tables, so run this after it; it is a no-op once
+    the table is up to date.
+    """
+    inspector = db.inspect(db.engine)
+    if not inspector.has_table(Task.__tablename__):
+        return
+    existing = {column['name'] for column in inspector.get_columns(Task.__tablename__)}
+    with db.engine.begin() as connection:
+        for column in Task.__table__.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {Task.__tablename__} ADD COLUMN {column.name} {column.type.compile(db.engine.dialect)}"
+            default = column.default.arg if column.default is not None and column.default.is_scalar else None
+            if default is not None:
+                # Existing rows take the default, which SQLite needs for a NOT NULL column
+                ddl += f" DEFAULT {default!r}" + ('' if column.nullable else ' NOT NULL')
+            connection.execute(db.text(ddl))
+            logger.info(f"Added column {column.name} to {Task.__tablename__}")
+        if 'available_at' not in existing:
+            # Tasks left PENDING by the older version must stay claimable
+            connection.execute(db.text(f"UPDATE {Task.__tablename__} SET available_at = created_at "
+                                       f"WHERE available_at IS NULL"))
+        for index in Task.__table__.indexes:
+            index.create(connection, checkfirst=True)
+
+def create_task(task_id, user_id, audio_file_path, priority=DEFAULT_PRIORITY, transcript=None, audio_data=None,
+                asr_profile=None, partial_transcript=None, max_pending=None):
+    """
+    Add a PENDING task. With max_pending, returns None instead when that many tasks are
+    already waiting: the count is taken after the insert in the same transaction, which on
+    SQLite holds the write lock, so concurrent requests cannot both take the last place.
+    """
+    task = Task(
+        task_id=task_id,
+        user_id=user_id,
+        status='PENDING',
+        result=None,
+        audio_file_path=audio_file_path,
+        audio_data=audio_data,
+        priority=priority,
+        asr_profile=asr_profile,
+        transcript=transcript,
+        partial_transcript=partial_transcript,
+        attempts=0,
+        max_attempts=current_app.config['TASK_MAX_ATTEMPTS'],
+        available_at=datetime.utcnow()
+    )
+    db.session.add(task)
+    if max_pending is not None:
+        db.session.flush()
+        if count_tasks('PENDING') > max_pending:
+            db.session.rollback()
+            return None
+    db.session.commit()
+    return task
+
+def claim_next_task(worker_id):
+    """
+    Atomically move the next PENDING task chosen by the scheduler to IN_PROGRESS under a
+    lease held by worker_id. Returns the claimed Task, or None when nothing is waiting.
+    """
+    now = datetime.utcnow()
+    candidates = pending_candidates(now, CLAIM_CANDIDATES)
+    candidates = order_candidates(candidates, current_app.config['TASK_PRIORITY_AGING_SECONDS'], now)
+
+    lease_expires_at = now + timedelta(seconds=current_app.config['TASK_LEASE_SECONDS'])
+    for candidate in candidates:
+        # Conditional update: only one worker can flip a given row out of PENDING
+        claimed = Task.query.filter_by(id=candidate.id, status='PENDING').update({
+            'status': 'IN_PROGRESS',
+            'lease_owner': worker_id,
+            'lease_expires_at': lease_expires_at,
+            'heartbeat_at': now,
+            'claimed_at': now,
+            'attempts': Task.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            task = db.session.get(Task, candidate.id)
+            logger.info(f"Worker {worker_id} claimed {task.priority} task {task.task_id} "
+                        f"(attempt {task.attempts}/{task.max_attempts})")
+            return task
+    return None
+
+def heartbeat(task_ids, worker_id):
+    """
+    Extend the leases worker_id holds on task_ids. Returns the number of leases renewed.
+    """
+    if not task_ids:
+        return 0
+    now = datetime.utcnow()
+    renewed = Task.query.filter(
+        Task.task_id.in_(task_ids),
+        Task.status == 'IN_PROGRESS',
+        Task.lease_owner == worker_id
+    ).update({
+        'lease_expires_at': now + timedelta(seconds=current_app.config['TASK_LEASE_SECONDS']),
+        'heartbeat_at': now
+    }, synchronize_session=False)
+    db.session.commit()
+    return renewed
+
+def requeue_expired_leases():
+    """
+    Return IN_PROGRESS tasks whose lease ran out (crashed or stalled worker) to the queue,
+    or fail them once their attempt budget is spent. Returns the number of tasks touched.
+    """
+    now = datetime.utcnow()
+    expired = Task.query.filter(
+        Task.status == 'IN_PROGRESS',
+        Task.lease_expires_at < now
+    ).all()
+    finished_files = []
+    for task in expired:
+        logger.warning(f"Lease on task {task.task_id} held by {task.lease_owner} expired")
+        finished_files.append(_release(task, f"Lease expired (held by {task.lease_owner})", retryable=True, now=now))
+    if expired:
+        db.session.commit()
+    for path in finished_files:
+        remove_audio_file(path)
+    return len(expired)
+
+def save_transcript(task_id, transcript):
+    # The audio is not needed again once the transcript is saved
+    Task.query.filter_by(task_id=task_id).update({'transcript': transcript, 'audio_data': None},
+                                                 synchronize_session=False)
+    db.session.commit()
+
+def complete_task(task_id, worker_id, result):
+    """
+    Mark a task SUCCESS and remove its spilled audio. Ignored if worker_id no longer holds the lease.
+    """
+    held = Task.query.filter_by(task_id=task_id, status='IN_PROGRESS', lease_owner=worker_id)
+    audio_file_path = held.with_entities(Task.audio_file_path).scalar()
+    updated = held.update({
+        'status': 'SUCCESS',
+        'result': result,
+        'audio_data': None,
+        'audio_file_path': None,
+        'lease_owner': None,
+        'lease_expires_at': None
+    }, synchronize_session=False)
+    db.session.commit()
+    if not updated:
+        logger.warning(f"Worker {worker_id} finished task {task_id} after losing its lease; result discarded")
+        return False
+    remove_audio_file(audio_file_path)
+    return True
+
+def fail_task(task_id, worker_id, error, retryable=True):
+    """
+    Record a failed attempt. The task goes back to PENDING after a backoff while it has
+    attempts left, otherwise it is marked FAILURE.
+    """
+    task = Task.query.filter_by(task_id=task_id, status='IN_PROGRESS', lease_owner=worker_id).first()
+    if not task:
+        logger.warning(f"Worker {worker_id} failed task {task_id} after losing its lease")
+        return False
+    audio_file_path = _release(task, error, retryable=retryable, now=datetime.utcnow())
+    db.session.commit()
+    remove_audio_file(audio_file_path)
+    return True
+
+def remove_audio_file(path):
+    """
+    Delete an upload spilled to TEMP_DIR once its task no longer needs it.
+    """
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not remove audio file {path}: {e}")
+
+def _release(task, error, retryable, now):
+    # Returns the task's audio file once it failed for good, for the caller to remove after committing
+    audio_file_path = None
+    task.lease_owner = None
+    task.lease_expires_at = None
+    task.result = error
+    if retryable and task.attempts < task.max_attempts:
+        delay = retry_delay(task.attempts)
+        task.status = 'PENDING'
+        task.available_at = now + timedelta(seconds=delay)
+        logger.info(f"Task {task.task_id} will be retried in {delay}s (attempt {task.attempts}/{task.max_attempts})")
+    else:
+        task.status = 'FAILURE'
+        task.audio_data = None
+        audio_file_path, task.audio_file_path = task.audio_file_path, None
+        logger.error(f"Task {task.task_id} failed permanently: {error}")
+    return audio_file_path
+
+def count_tasks(status, priority=None):
+    query = Task.query.filter_by(status=status)
+    if priority:
+        query = query.filter_by(priority=priority)
+    return query.count()
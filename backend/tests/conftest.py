@@ -0,0 +1,59 @@
+# tests/conftest.py
+#
+# Run from the backend directory with `python -m pytest tests`. The backend modules use flat
+# imports (from extensions import db), as when running app.py.
+
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import pytest
+from flask import Flask
+
+@pytest.fixture
+def app(tmp_path):
+    """
+    A Flask app on a fresh SQLite database with the task queue settings and one user (id 1).
+    """
+    from extensions import db
+    from models import User
+
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'tasks.db'}",
+        TASK_LEASE_SECONDS=120,
+        TASK_MAX_ATTEMPTS=2,
+        TASK_RETRY_BACKOFF=5,
+        TASK_RETRY_BACKOFF_MAX=300,
+        TASK_PRIORITY_AGING_SECONDS=60
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, first_name='Ada', last_name='Lovelace'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+@pytest.fixture
+def llm_stub():
+    """
+    Starts benchmarks/llm_stub_server.py on a free port. Call it with serve()'s options; it
+    returns (base_url, stats). Every server started is shut down after the test.
+    """
+    sys.path.insert(0, os.path.join(BACKEND_DIR, 'benchmarks'))
+    from llm_stub_server import serve
+
+    servers = []
+
+    def start(**options):
+        server, stats = serve(port=0, **{'latency': 0.0, **options})
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}/v1", stats
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
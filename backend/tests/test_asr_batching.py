@@ -0,0 +1,90 @@
+# tests/test_asr_batching.py
+
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from utils import asr_batching
+from utils.asr_batching import BatchingTranscriber
+from utils.asr_profiles import AsrProfile, DEFAULT_PROFILE
+
+BEAM = AsrProfile('accurate', beam_size=5)
+ENGLISH = AsrProfile('english', language='en')
+
+def clip(number, seconds=1.0):
+    # The clip's number is its sample value, so fake decodes can tell clips apart
+    return np.full(int(seconds * 16000), number, dtype=np.float32)
+
+class FakeModel:
+    """
+    Transcribes clips one at a time as "single <number>".
+    """
+    device = SimpleNamespace(type='cpu')
+
+    def __init__(self):
+        self.single = []
+
+    def transcribe(self, audio, **kwargs):
+        self.single.append(int(audio[0]))
+        return {'text': f"single {int(audio[0])}"}
+
+@pytest.fixture
+def batches(monkeypatch):
+    """
+    Replaces whisper.decode: records each batch as (profile name, clip numbers) and decodes a
+    clip as "batched <number>", with a low-confidence result for clip 13.
+    """
+    batches = []
+
+    def decode_batch(model, clips, profile):
+        numbers = [int(audio[0]) for audio in clips]
+        batches.append((profile.name, sorted(numbers)))
+        return [SimpleNamespace(text=f" batched {number}", compression_ratio=1.0,
+                                avg_logprob=-2.0 if number == 13 else -0.2) for number in numbers]
+
+    monkeypatch.setattr(asr_batching, 'decode_batch', decode_batch)
+    return batches
+
+def transcribe_together(transcriber, requests):
+    with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+        futures = [executor.submit(transcriber.transcribe, audio, profile) for audio, profile in requests]
+        return [future.result(timeout=5)['text'] for future in futures]
+
+def test_clips_arriving_together_are_decoded_as_one_batch(batches):
+    transcriber = BatchingTranscriber(FakeModel(), max_batch_size=8, max_wait_ms=200)
+    texts = transcribe_together(transcriber, [(clip(number), None) for number in range(1, 5)])
+    assert texts == [f"batched {number}" for number in range(1, 5)]
+    assert batches == [('default', [1, 2, 3, 4])]
+
+def test_batches_hold_one_profile_and_at_most_max_batch_size(batches):
+    transcriber = BatchingTranscriber(FakeModel(), max_batch_size=2, max_wait_ms=200)
+    transcribe_together(transcriber, [(clip(1), DEFAULT_PROFILE), (clip(2), ENGLISH), (clip(3), ENGLISH)])
+    assert all(len(numbers) <= 2 for _, numbers in batches)
+    assert {number for name, numbers in batches if name == 'english' for number in numbers} == {2, 3}
+    assert {number for name, numbers in batches if name == 'default' for number in numbers} == {1}
+
+def test_beam_search_and_long_clips_are_transcribed_on_their_own(batches):
+    model = FakeModel()
+    transcriber = BatchingTranscriber(model, max_batch_size=8, max_wait_ms=20)
+    assert transcriber.transcribe(clip(1), BEAM)['text'] == 'single 1'
+    assert transcriber.transcribe(clip(2, seconds=31), None)['text'] == 'single 2'
+    assert batches == [] and model.single == [1, 2]
+
+def test_low_confidence_clip_is_transcribed_again_with_fallback(batches):
+    model = FakeModel()
+    transcriber = BatchingTranscriber(model, max_batch_size=8, max_wait_ms=200)
+    texts = transcribe_together(transcriber, [(clip(12), None), (clip(13), None)])
+    assert texts == ['batched 12', 'single 13']
+    assert model.single == [13]
+
+def test_failed_batch_fails_every_clip_in_it(monkeypatch):
+    def decode_batch(model, clips, profile):
+        raise RuntimeError('out of memory')
+
+    monkeypatch.setattr(asr_batching, 'decode_batch', decode_batch)
+    transcriber = BatchingTranscriber(FakeModel(), max_batch_size=8, max_wait_ms=200)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(transcriber.transcribe, clip(number)) for number in (1, 2)]
+        for future in futures:
+            with pytest.raises(RuntimeError, match='out of memory'):
+                future.result(timeout=5)
@@ -0,0 +1,89 @@
+# tests/test_audio_routes.py
+
+import io
+import numpy as np
+import pytest
+from config import Config
+import audio_sessions
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    from app import create_app
+    from extensions import db
+    from models import User
+
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setattr(Config, 'TEMP_DIR', str(tmp_path / 'temp'))
+    monkeypatch.setattr(Config, 'EMBEDDED_AUDIO_WORKERS', False)
+    monkeypatch.setattr(Config, 'STREAM_WINDOW_ASR', False)
+    monkeypatch.setattr(audio_sessions, '_session_manager', None)
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, first_name='Ada', last_name='Lovelace'))
+        db.session.commit()
+    yield app.test_client()
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+def wav_upload():
+    return (io.BytesIO(b'RIFF'), 'question.wav')
+
+def pcm_chunk(seconds=1.0):
+    return (io.BytesIO((np.ones(int(seconds * 16000)) * 1000).astype('<i2').tobytes()), 'chunk.raw')
+
+@pytest.mark.parametrize('field, value, error', [
+    ('user_id', 'abc', 'user_id must be an integer'),
+    ('priority', 'whenever', 'priority must be one of'),
+    ('asr_profile', 'perfect', 'asr_profile must be one of')
+])
+def test_upload_and_session_validate_the_same_options(client, field, value, error):
+    form = {'user_id': '1', field: value}
+    upload = client.post('/process-audio', data={**form, 'audio': wav_upload()})
+    session = client.post('/audio-sessions', data=form)
+    for response in (upload, session):
+        assert response.status_code == 400
+        assert response.json['error'].startswith(error)
+
+def test_full_queue_rejects_uploads_and_keeps_sessions_for_a_retry(client, monkeypatch):
+    monkeypatch.setitem(client.application.config, 'AUDIO_QUEUE_SIZE', 0)
+    upload = client.post('/process-audio', data={'user_id': '1', 'audio': wav_upload()})
+    session_id = client.post('/audio-sessions', data={'user_id': '1'}).json['session_id']
+    client.post(f'/audio-sessions/{session_id}/chunks', data={'sequence': '0', 'format': 'pcm_s16le',
+                                                             'audio': pcm_chunk()})
+    finish = client.post(f'/audio-sessions/{session_id}/finish')
+    for response in (upload, finish):
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == str(Config.AUDIO_QUEUE_RETRY_AFTER)
+
+    monkeypatch.setitem(client.application.config, 'AUDIO_QUEUE_SIZE', 10)
+    assert client.post(f'/audio-sessions/{session_id}/finish').status_code == 202
+
+def test_finished_session_queues_its_transcript_with_the_audio_after_it(client, monkeypatch):
+    from models import Task
+
+    monkeypatch.setitem(client.application.config, 'STREAM_WINDOW_ASR', True)
+    monkeypatch.setitem(client.application.config, 'STREAM_WINDOW_SECONDS', 1)
+    monkeypatch.setattr(audio_sessions, 'transcribe_audio_array', lambda audio, asr_profile: ('words', 'tiny'))
+    session_id = client.post('/audio-sessions', data={'user_id': '1'}).json['session_id']
+    client.post(f'/audio-sessions/{session_id}/chunks', data={'sequence': '0', 'format': 'pcm_s16le',
+                                                             'audio': pcm_chunk(1.5)})
+    finish = client.post(f'/audio-sessions/{session_id}/finish')
+    assert finish.status_code == 202
+    assert set(finish.json['partial_transcript'].split()) == {'words'}
+    with client.application.app_context():
+        task = Task.query.filter_by(task_id=finish.json['task_id']).one()
+        assert task.transcript is None
+        assert task.partial_transcript == finish.json['partial_transcript']
+        assert task.audio_data is not None
+
+def test_sessions_over_the_limits_are_refused(client, monkeypatch):
+    monkeypatch.setitem(client.application.config, 'STREAM_MAX_SESSIONS', 1)
+    monkeypatch.setitem(client.application.config, 'STREAM_MAX_SESSION_BYTES', 4 * 16000)
+    session_id = client.post('/audio-sessions', data={'user_id': '1'}).json['session_id']
+    assert client.post('/audio-sessions', data={'user_id': '1'}).status_code == 429
+
+    chunk = client.post(f'/audio-sessions/{session_id}/chunks', data={'sequence': '0', 'format': 'pcm_s16le',
+                                                                     'audio': pcm_chunk(2.0)})
+    assert chunk.status_code == 413
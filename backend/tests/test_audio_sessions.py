@@ -0,0 +1,87 @@
+# tests/test_audio_sessions.py
+
+import threading
+import numpy as np
+import pytest
+from audio_sessions import AudioSessionManager, SessionError, SAMPLE_RATE
+
+def tone(seconds):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+class Transcriber:
+    """
+    Transcribes every window as "words", or fails while failing is set.
+    """
+    def __init__(self):
+        self.failing = False
+        self.threads = set()
+
+    def __call__(self, audio, asr_profile):
+        self.threads.add(threading.current_thread().name)
+        if self.failing:
+            raise RuntimeError('ASR failed')
+        return 'words'
+
+def test_session_stays_open_until_closed():
+    sessions = AudioSessionManager(Transcriber(), window_seconds=1)
+    session = sessions.create(1, 'routine')
+    sessions.append(session.session_id, 0, tone(2.5))
+    transcript = sessions.finish(session.session_id).transcript
+    assert transcript == ' '.join(['words'] * len(session.windows))
+
+    # A retry after the task could not be queued gets the same transcript
+    assert sessions.finish(session.session_id).transcript == transcript
+    with pytest.raises(SessionError) as error:
+        sessions.append(session.session_id, 1, tone(1))
+    assert error.value.status == 409
+
+    sessions.close(session.session_id)
+    with pytest.raises(SessionError) as error:
+        sessions.finish(session.session_id)
+    assert error.value.status == 404
+
+def test_failed_window_is_transcribed_again_on_retry():
+    transcriber = Transcriber()
+    sessions = AudioSessionManager(transcriber, window_seconds=1)
+    session = sessions.create(1, 'routine')
+    transcriber.failing = True
+    sessions.append(session.session_id, 0, tone(1.5))
+    with pytest.raises(RuntimeError):
+        sessions.finish(session.session_id)
+    transcriber.failing = False
+    assert sessions.finish(session.session_id).transcript == ' '.join(['words'] * len(session.windows))
+
+def test_finish_leaves_the_last_partial_window_to_the_workers():
+    transcriber = Transcriber()
+    sessions = AudioSessionManager(transcriber, window_seconds=1)
+    session = sessions.create(1, 'routine')
+    sessions.append(session.session_id, 0, tone(2.5))
+    session = sessions.finish(session.session_id)
+    assert session.transcript == ' '.join(['words'] * len(session.windows))
+    assert 0 < len(session.buffer) < SAMPLE_RATE
+    assert threading.current_thread().name not in transcriber.threads
+
+def test_open_sessions_and_their_audio_are_limited():
+    sessions = AudioSessionManager(None, max_sessions=1, max_session_bytes=4 * SAMPLE_RATE)
+    session = sessions.create(1, 'routine')
+    with pytest.raises(SessionError) as error:
+        sessions.create(2, 'routine')
+    assert error.value.status == 429
+
+    sessions.append(session.session_id, 0, tone(0.75))
+    with pytest.raises(SessionError) as error:
+        sessions.append(session.session_id, 1, tone(0.5))
+    assert error.value.status == 413
+    sessions.close(session.session_id)
+    sessions.create(2, 'routine')
+
+def test_without_window_asr_the_audio_is_kept_for_the_workers():
+    sessions = AudioSessionManager(None, window_seconds=1)
+    session = sessions.create(1, 'routine')
+    sessions.append(session.session_id, 0, tone(1.5))
+    sessions.append(session.session_id, 1, tone(1.0))
+    session = sessions.finish(session.session_id)
+    assert session.transcript is None
+    assert session.windows == []
+    assert len(session.buffer) == int(2.5 * SAMPLE_RATE)
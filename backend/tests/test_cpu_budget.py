@@ -0,0 +1,50 @@
+# tests/test_cpu_budget.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from utils import cpu_budget
+from utils.cpu_budget import CpuBudget, split_cores
+
+@pytest.fixture
+def cores(monkeypatch):
+    def set_cores(count):
+        monkeypatch.setattr(cpu_budget.os, 'cpu_count', lambda: count)
+    return set_cores
+
+def test_one_process_splits_the_cores_between_its_transcriptions(cores):
+    cores(8)
+    assert split_cores(2) == (2, 4)
+
+def test_processes_share_the_cores_instead_of_each_claiming_them(cores):
+    cores(8)
+    assert split_cores(2, processes=2) == (2, 2)
+    assert split_cores(2, processes=8) == (1, 1)  # One slot of one thread per worker
+    assert split_cores(2, processes=16) == (1, 1)  # More processes than cores: the minimum
+
+def test_budget_counts_threads_across_processes(cores):
+    cores(8)
+    budget = CpuBudget(2, 1, processes=8)
+    assert budget.total_threads() == 16
+    assert budget.stats()['total_threads'] == 16
+
+def test_slots_bound_concurrent_transcriptions():
+    budget = CpuBudget(2, 1)
+    running, peak = 0, 0
+    lock = threading.Lock()
+
+    def transcribe(_):
+        nonlocal running, peak
+        with budget.slot():
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        list(executor.map(transcribe, range(12)))
+    assert peak == 2
+    assert budget.stats()['active'] == 0
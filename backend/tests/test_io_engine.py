@@ -0,0 +1,91 @@
+# tests/test_io_engine.py
+
+import asyncio
+import contextvars
+import time
+import pytest
+from utils.async_llm_client import AsyncLLMClient
+from utils.io_engine import IOEngine
+from utils.llm_client import LLMError
+
+MESSAGES = [{'role': 'user', 'content': 'Question: when is dinner?'}]
+
+request_id = contextvars.ContextVar('request_id', default=None)
+
+@pytest.fixture
+def engine():
+    engine = IOEngine()
+    yield engine
+    engine.stop(timeout=5)
+
+def test_run_returns_or_raises_what_the_coroutine_does(engine):
+    async def answer(value):
+        await asyncio.sleep(0.01)
+        if value is None:
+            raise ValueError('no value')
+        return value * 2
+
+    assert engine.run(answer(21), timeout=5) == 42
+    with pytest.raises(ValueError):
+        engine.run(answer(None), timeout=5)
+
+def test_coroutines_see_the_submitting_threads_context(engine):
+    async def current_request():
+        return request_id.get()
+
+    request_id.set('task-1')
+    assert engine.run(current_request(), timeout=5) == 'task-1'
+
+def test_many_waits_overlap_on_the_one_loop(engine):
+    started = time.perf_counter()
+    futures = [engine.submit(asyncio.sleep(0.2)) for _ in range(200)]
+    for future in futures:
+        future.result(timeout=5)
+    assert time.perf_counter() - started < 1.0
+
+def test_run_from_the_loop_itself_is_refused(engine):
+    async def nested():
+        return engine.run(asyncio.sleep(0))
+
+    with pytest.raises(RuntimeError, match='await the coroutine'):
+        engine.run(nested(), timeout=5)
+
+def test_stop_cancels_what_is_still_running():
+    engine = IOEngine()
+    future = engine.submit(asyncio.sleep(60))
+    engine.stop(timeout=5)
+    assert future.cancelled()
+
+def test_async_client_answers_concurrent_chats_and_streams(engine, llm_stub):
+    base_url, stats = llm_stub(latency=0.2)
+    client = AsyncLLMClient(base_url, 'test-key')
+
+    async def ask():
+        streamed = [''.join([piece async for piece in client.chat_stream(MESSAGES, 'stub')])]
+        answers = await asyncio.gather(*(client.chat(MESSAGES, 'stub') for _ in range(20)))
+        await client.close()
+        return streamed + answers
+
+    started = time.perf_counter()
+    answers = engine.run(ask(), timeout=10)
+    assert len(set(answers)) == 1 and 'You asked: when is dinner?' in answers[0]
+    assert time.perf_counter() - started < 2.0  # The 20 chats overlap instead of taking 4 seconds
+    assert stats.as_dict()['requests'] == 21
+
+def test_async_client_retries_server_errors_but_not_timeouts(engine, llm_stub):
+    failing_url, failing_stats = llm_stub(error_rate=1.0)
+    slow_url, slow_stats = llm_stub(latency=1.0)
+
+    async def ask(base_url, **options):
+        client = AsyncLLMClient(base_url, 'test-key', backoff_factor=0.01, **options)
+        try:
+            return await client.chat(MESSAGES, 'stub')
+        finally:
+            await client.close()
+
+    with pytest.raises(LLMError, match='503'):
+        engine.run(ask(failing_url, max_retries=2), timeout=10)
+    assert failing_stats.as_dict()['requests'] == 3
+    with pytest.raises(LLMError, match='timed out'):
+        engine.run(ask(slow_url, read_timeout=0.2), timeout=10)
+    assert slow_stats.as_dict()['requests'] == 1
@@ -0,0 +1,41 @@
+# tests/test_keyword_spotting.py
+
+import pytest
+from config import Config
+from utils.keyword_spotting import EmergencyPhraseDetector, normalize_text
+
+@pytest.fixture
+def detector():
+    return EmergencyPhraseDetector(Config.EMERGENCY_PHRASES)
+
+def test_normalize_text_drops_case_punctuation_and_extra_spaces():
+    assert normalize_text("Help!  Call the NURSE.") == 'help call the nurse'
+    assert normalize_text("I’ve fallen") == "i've fallen"
+
+@pytest.mark.parametrize('text, phrase', [
+    ("Help!", 'help'),
+    ("help me please", 'help'),
+    ("Can someone HELP me, I'm stuck", 'help'),  # Any "help" alerts, erring towards a nurse checking
+    ("I’ve fallen and can't get up", "i've fallen"),
+    ("please call the nurse", 'call the nurse'),
+    ("Emergency.", 'emergency')
+])
+def test_emergency_phrase_is_found(detector, text, phrase):
+    assert detector.find(text) == phrase
+
+@pytest.mark.parametrize('text', [
+    "the nurse was very helpful today",
+    "she helped me with lunch",
+    "what's on the menu",
+    "unhelpful weather",
+    ""
+])
+def test_phrase_inside_another_word_is_not_found(detector, text):
+    assert detector.find(text) is None
+
+def test_longest_phrase_wins_where_phrases_overlap():
+    detector = EmergencyPhraseDetector(['help', 'help me'])
+    assert detector.find("help me now") == 'help me'
+
+def test_without_phrases_nothing_is_found():
+    assert EmergencyPhraseDetector(['', ' ']).find("help") is None
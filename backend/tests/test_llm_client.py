@@ -0,0 +1,35 @@
+# tests/test_llm_client.py
+
+import pytest
+from utils.llm_client import LLMClient, LLMError
+
+MESSAGES = [{'role': 'user', 'content': 'Question: what time is lunch?'}]
+
+def test_chat_returns_the_answer_over_one_kept_alive_connection(llm_stub):
+    base_url, stats = llm_stub()
+    client = LLMClient(base_url, 'test-key')
+    answers = [client.chat(MESSAGES, 'stub') for _ in range(3)]
+    client.close()
+    assert all('You asked: what time is lunch?' in answer for answer in answers)
+    assert stats.as_dict() == {'requests': 3, 'connections': 1, 'failures': 0}
+
+def test_streamed_answer_arrives_in_pieces_that_add_up_to_the_answer(llm_stub):
+    base_url, _ = llm_stub()
+    client = LLMClient(base_url, 'test-key')
+    pieces = list(client.chat_stream(MESSAGES, 'stub'))
+    assert len(pieces) > 1
+    assert ''.join(pieces) == client.chat(MESSAGES, 'stub')
+
+def test_server_errors_are_retried_then_raised(llm_stub):
+    base_url, stats = llm_stub(error_rate=1.0)
+    client = LLMClient(base_url, 'test-key', max_retries=2)
+    with pytest.raises(LLMError, match='503'):
+        client.chat(MESSAGES, 'stub')
+    assert stats.as_dict()['requests'] == 3
+
+def test_slow_answer_times_out_without_a_retry(llm_stub):
+    base_url, stats = llm_stub(latency=1.0)
+    client = LLMClient(base_url, 'test-key', read_timeout=0.2)
+    with pytest.raises(LLMError, match='timed out'):
+        client.chat(MESSAGES, 'stub')
+    assert stats.as_dict()['requests'] == 1
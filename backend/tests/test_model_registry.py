@@ -0,0 +1,45 @@
+# tests/test_model_registry.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.model_registry import ModelRegistry
+
+class SlowLoader:
+    """
+    Loads a size as f"model {size}", holding back the sizes in blocked until release is set.
+    """
+    def __init__(self, blocked=()):
+        self.blocked = set(blocked)
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.loads = []
+
+    def __call__(self, size):
+        self.loads.append(size)
+        if size in self.blocked:
+            self.started.set()
+            self.release.wait(5)
+        return f"model {size}"
+
+def test_loaded_size_is_served_while_another_size_loads():
+    loader = SlowLoader(blocked={'small'})
+    registry = ModelRegistry(loader)
+    registry.get('tiny')
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        small = executor.submit(registry.get, 'small')
+        assert loader.started.wait(5)
+        assert executor.submit(registry.get, 'tiny').result(timeout=1) == 'model tiny'
+        assert executor.submit(registry.get, 'base').result(timeout=1) == 'model base'
+        loader.release.set()
+        assert small.result(timeout=5) == 'model small'
+    assert sorted(registry.loaded_sizes()) == ['base', 'small', 'tiny']
+
+def test_concurrent_requests_for_one_size_load_it_once():
+    loader = SlowLoader(blocked={'small'})
+    registry = ModelRegistry(loader)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(registry.get, 'small') for _ in range(4)]
+        assert loader.started.wait(5)
+        loader.release.set()
+        assert {future.result(timeout=5) for future in futures} == {'model small'}
+    assert loader.loads == ['small']
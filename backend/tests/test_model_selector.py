@@ -0,0 +1,24 @@
+# tests/test_model_selector.py
+
+from utils.model_registry import AdaptiveModelSelector, model_size_ladder
+
+def selector(sizes, max_size):
+    return AdaptiveModelSelector(sizes, max_size, latency_target=10, downgrade_queue_depth=5,
+                                 upgrade_queue_depth=0, cooldown=0)
+
+def test_ladder_is_capped_at_the_configured_model():
+    assert model_size_ladder(['tiny', 'base', 'small'], 'base') == ['tiny', 'base']
+
+def test_configured_model_missing_from_the_list_tops_the_ladder():
+    assert model_size_ladder(['tiny', 'base', 'small'], 'medium') == ['tiny', 'base', 'small', 'medium']
+    assert model_size_ladder(['tiny', 'base', 'small'], 'large-v3') == ['tiny', 'base', 'small', 'large-v3']
+    assert model_size_ladder(['tiny', 'small'], 'base') == ['tiny', 'base']
+
+def test_unknown_configured_model_is_used_as_is():
+    assert model_size_ladder(['tiny', 'base'], 'custom') == ['custom']
+
+def test_selector_steps_down_and_back_up_to_an_unlisted_model():
+    chooser = selector(['tiny', 'base', 'small'], 'medium')
+    assert chooser.choose(queue_depth=1) == 'medium'
+    assert chooser.choose(queue_depth=10) == 'small'
+    assert chooser.choose(queue_depth=0) == 'medium'
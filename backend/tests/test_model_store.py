@@ -0,0 +1,58 @@
+# tests/test_model_store.py
+
+from dataclasses import asdict
+import pytest
+import torch
+from whisper.model import ModelDimensions, Whisper
+from utils.model_store import ModelStore, ModelStoreError
+
+DIMS = ModelDimensions(n_mels=80, n_audio_ctx=16, n_audio_state=32, n_audio_head=2, n_audio_layer=1,
+                       n_vocab=64, n_text_ctx=8, n_text_state=32, n_text_head=2, n_text_layer=1)
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    """
+    A tiny Whisper checkpoint with fp16 weights, like the published ones. Returns (path, model).
+    """
+    model = Whisper(DIMS)
+    with torch.no_grad():
+        for parameter in model.parameters():
+            parameter.normal_()  # Some are left uninitialized, and NaN never compares equal
+    path = tmp_path / 'mini-fp16.pt'
+    torch.save({'dims': asdict(DIMS), 'model_state_dict': {name: tensor.half() for name, tensor in
+                                                             model.state_dict().items()}}, path)
+    return str(path), model
+
+@pytest.fixture
+def store(tmp_path, checkpoint):
+    store = ModelStore(str(tmp_path / 'models'), allow_download=False)
+    store.fetch('mini', source=checkpoint[0])
+    return store
+
+def test_fetched_model_loads_with_the_checkpoint_weights_as_fp32(store, checkpoint):
+    _, original = checkpoint
+    loaded = store.load('mini', device='cpu')
+    for name, tensor in original.state_dict().items():
+        stored = loaded.state_dict()[name]
+        assert stored.dtype == torch.float32
+        assert torch.equal(stored, tensor.half().float())
+    assert store.verify('mini')['bytes'] > 0
+
+def test_verify_detects_a_corrupt_artifact(store):
+    with open(store.path('mini'), 'r+b') as f:
+        f.seek(-16, 2)
+        f.write(b'\0' * 16)
+    with pytest.raises(ModelStoreError, match='corrupt'):
+        store.verify('mini')
+
+def test_load_refuses_an_artifact_of_the_wrong_size(store):
+    with open(store.path('mini'), 'ab') as f:
+        f.write(b'\0')
+    with pytest.raises(ModelStoreError, match='wrong size'):
+        store.load('mini', device='cpu')
+
+def test_missing_model_is_not_downloaded_when_downloads_are_off(store):
+    with pytest.raises(ModelStoreError, match='not in the model store'):
+        store.load('tiny', device='cpu')
+    with pytest.raises(ModelStoreError):
+        store.verify('tiny')
@@ -0,0 +1,109 @@
+# tests/test_pipeline.py
+
+import asyncio
+import threading
+import pytest
+from pipeline import Pipeline, Stage
+from utils.io_engine import IOEngine
+
+class Results:
+    """
+    Collects the pipeline's callbacks; wait() blocks until count jobs have left it.
+    """
+    def __init__(self):
+        self.succeeded = []
+        self.failed = []
+        self._done = threading.Condition()
+
+    def on_success(self, job):
+        with self._done:
+            self.succeeded.append(job)
+            self._done.notify_all()
+
+    def on_error(self, job, error):
+        with self._done:
+            self.failed.append((job, error))
+            self._done.notify_all()
+
+    def wait(self, count, timeout=5):
+        with self._done:
+            assert self._done.wait_for(lambda: len(self.succeeded) + len(self.failed) >= count, timeout)
+
+def test_jobs_pass_every_stage_in_order_and_failures_leave_early():
+    def parse(job):
+        if job['value'] < 0:
+            raise ValueError('negative')
+        job['steps'].append('parse')
+
+    def double(job):
+        job['steps'].append('double')
+        job['value'] *= 2
+
+    results = Results()
+    pipeline = Pipeline([Stage('parse', parse, 2, 4), Stage('double', double, 1, 4)],
+                        results.on_success, results.on_error)
+    pipeline.start()
+    jobs = [{'value': value, 'steps': []} for value in (1, -1, 3)]
+    for job in jobs:
+        pipeline.submit(job)
+    results.wait(3)
+    pipeline.stop(timeout=5)
+
+    assert sorted(job['value'] for job in results.succeeded) == [2, 6]
+    assert all(job['steps'] == ['parse', 'double'] for job in results.succeeded)
+    [(job, error)] = results.failed
+    assert job['steps'] == [] and isinstance(error, ValueError)
+    stats = pipeline.stats()
+    assert stats['parse']['processed'] == 2 and stats['parse']['failed'] == 1
+    assert stats['double']['processed'] == 2
+
+def test_full_queue_blocks_the_stage_in_front_of_it():
+    release = threading.Event()
+    results = Results()
+    pipeline = Pipeline([Stage('fast', lambda job: None, 1, 1), Stage('slow', lambda job: release.wait(5), 1, 1)],
+                        results.on_success, results.on_error)
+    pipeline.start()
+    # One job in the slow handler, one in its queue, one held by the fast worker, one in its queue
+    for job in range(4):
+        pipeline.submit(job)
+    assert not pipeline.wait_for_capacity(timeout=0.2)
+    assert pipeline.stats()['slow']['queue_depth'] == 1
+
+    release.set()
+    assert pipeline.wait_for_capacity(timeout=5)
+    results.wait(4)
+    pipeline.stop(timeout=5)
+    assert sorted(results.succeeded) == [0, 1, 2, 3]
+
+def test_async_stage_runs_jobs_concurrently_on_the_engine():
+    running, peak = 0, 0
+
+    async def fetch(job):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        if job == 'bad':
+            raise RuntimeError('timed out')
+
+    engine = IOEngine()
+    results = Results()
+    pipeline = Pipeline([Stage('fetch', fetch, 3, 10)], results.on_success, results.on_error, engine=engine)
+    pipeline.start()
+    for job in ['a', 'b', 'bad', 'c', 'd']:
+        pipeline.submit(job)
+    results.wait(5)
+    pipeline.stop(timeout=5)
+    engine.stop(timeout=5)
+
+    assert sorted(results.succeeded) == ['a', 'b', 'c', 'd']
+    assert [job for job, _ in results.failed] == ['bad']
+    assert peak == 3
+
+def test_async_stage_needs_an_engine():
+    async def fetch(job):
+        pass
+
+    with pytest.raises(ValueError):
+        Pipeline([Stage('fetch', fetch, 1, 1)], print, print)
@@ -0,0 +1,44 @@
+# tests/test_question_matcher.py
+
+import pytest
+from config import Config
+from utils.question_matcher import QuestionMatcher
+
+ASKED = ["what time is dinner", "when is my next pill", "what time is lunch", "what's the weather today",
+         "when is my daughter coming", "when is my physical therapy", "what time do we eat dinner"]
+
+@pytest.fixture
+def matcher():
+    matcher = QuestionMatcher(threshold=Config.QUESTION_MATCHER_THRESHOLD)
+    for question in ASKED:
+        matcher.add('resident', question, f"answer to {question}")
+    return matcher
+
+@pytest.mark.parametrize('question, paraphrase_of', [
+    ("when's dinner", "what time is dinner"),
+    ("when is my next pill due", "when is my next pill"),
+    ("when do i take my next pill", "when is my next pill"),
+    ("when do we eat lunch", "what time is lunch"),
+    ("what time do we eat lunch", "what time is lunch")
+])
+def test_paraphrase_gets_the_stored_answer(matcher, question, paraphrase_of):
+    match = matcher.match('resident', question)
+    assert match is not None and match.question == paraphrase_of
+
+@pytest.mark.parametrize('question', [
+    "what time do we eat breakfast",
+    "when's breakfast",
+    "when is my next meal",
+    "what's the date today",
+    "when is my son coming",
+    "what medications am i on"
+])
+def test_question_differing_in_a_decisive_word_is_not_matched(matcher, question):
+    assert matcher.match('resident', question) is None
+
+def test_answers_are_not_shared_between_scopes(matcher):
+    assert matcher.match('another resident', "when's dinner") is None
+
+def test_repeated_question_replaces_its_older_answer(matcher):
+    matcher.add('resident', "what time is dinner", 'dinner moved to six')
+    assert matcher.match('resident', "when's dinner").answer == 'dinner moved to six'
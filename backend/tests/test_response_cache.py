@@ -0,0 +1,79 @@
+# tests/test_response_cache.py
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from utils import response_cache
+from utils.response_cache import ResponseCache
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / 'responses.db'))
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+def test_concurrent_misses_for_one_key_share_a_call(cache):
+    calls, started, release = [], threading.Event(), threading.Event()
+
+    def generate():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'lunch is at noon'
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(cache.get_or_generate, 'key', generate)
+        assert started.wait(5)
+        waiters = [executor.submit(cache.get_or_generate, 'key', generate) for _ in range(3)]
+        release.set()
+        answers = [future.result(timeout=5) for future in [leader] + waiters]
+    assert answers == ['lunch is at noon'] * 4
+    assert len(calls) == 1
+
+def test_concurrent_async_misses_share_a_call_and_its_failure(cache):
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise RuntimeError('chat API down')
+
+    async def ask_together():
+        return await asyncio.gather(*(cache.get_or_generate_async('key', generate) for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(ask_together())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(calls) == 1
+    assert cache.get('key') is None  # Failed calls are not cached
+    assert cache.stats()['in_flight'] == 0
+
+def test_answers_expire_after_ttl(cache, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, 'time', clock.time)
+    cache.put('key', 'lunch is at noon')
+    clock.now += cache.ttl - 1
+    assert cache.get('key') == 'lunch is at noon'
+    clock.now += 2
+    assert cache.get('key') is None
+
+def test_least_recently_used_answers_are_evicted_past_max_bytes(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, 'time', clock.time)
+    cache = ResponseCache(str(tmp_path / 'responses.db'), max_bytes=40)
+    for key in ('breakfast', 'lunch'):
+        clock.now += 1
+        cache.put(key, f"{key} answer!")
+    clock.now += 1
+    assert cache.get('breakfast') is not None  # Now more recently used than lunch
+    clock.now += 1
+    cache.put('dinner', 'dinner answer!')  # 44 bytes with the other two
+    assert cache.get('lunch') is None
+    assert cache.get('breakfast') == 'breakfast answer!'
+    assert cache.stats()['bytes'] <= 40
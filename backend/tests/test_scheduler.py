@@ -0,0 +1,47 @@
+# tests/test_scheduler.py
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from extensions import db
+from models import User, Task
+import task_queue
+from scheduler import effective_rank, order_candidates
+
+def add_task(task_id, user_id=1, priority='routine', age=0, claimed_age=None):
+    now = datetime.utcnow()
+    task = Task(task_id=task_id, user_id=user_id, status='PENDING', priority=priority,
+                created_at=now - timedelta(seconds=age), available_at=now - timedelta(seconds=age),
+                claimed_at=now - timedelta(seconds=claimed_age) if claimed_age is not None else None)
+    db.session.add(task)
+    db.session.commit()
+    return task
+
+def test_waiting_promotes_a_task_one_lane_per_aging_period():
+    now = datetime.utcnow()
+    task = SimpleNamespace(priority='routine', created_at=now - timedelta(seconds=61))
+    assert effective_rank(task, now, aging_seconds=60) == 0
+    assert effective_rank(task, now, aging_seconds=0) == 1
+    assert effective_rank(SimpleNamespace(priority='routine', created_at=now), now, aging_seconds=60) == 1
+
+def test_aged_routine_task_goes_before_a_newer_urgent_one(app):
+    add_task('urgent', priority='urgent')
+    add_task('old-routine', age=120)
+    ordered = order_candidates(Task.query.all(), aging_seconds=60)
+    assert [task.task_id for task in ordered] == ['old-routine', 'urgent']
+
+def test_users_are_served_round_robin_within_a_lane(app):
+    db.session.add(User(id=2, first_name='Grace', last_name='Hopper'))
+    db.session.commit()
+    add_task('recently-served-user', user_id=1, age=10)
+    add_task('history', user_id=1, claimed_age=5).status = 'SUCCESS'
+    add_task('never-served', user_id=2, age=5)
+    db.session.commit()
+    ordered = order_candidates(Task.query.filter_by(status='PENDING').all(), aging_seconds=0)
+    assert [task.task_id for task in ordered] == ['never-served', 'recently-served-user']
+
+def test_urgent_task_behind_a_long_backlog_is_claimed_first(app, monkeypatch):
+    monkeypatch.setattr(task_queue, 'CLAIM_CANDIDATES', 3)
+    for i in range(5):
+        add_task(f"routine-{i}", age=30 - i)
+    add_task('urgent', priority='urgent')
+    assert task_queue.claim_next_task('worker-1').task_id == 'urgent'
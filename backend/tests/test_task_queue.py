@@ -0,0 +1,117 @@
+# tests/test_task_queue.py
+
+from datetime import datetime, timedelta
+from extensions import db
+from models import User, Task
+import task_queue
+
+def make_task(task_id, priority='routine'):
+    return task_queue.create_task(task_id, 1, f"/tmp/{task_id}.wav", priority=priority)
+
+def expire_lease(task_id):
+    Task.query.filter_by(task_id=task_id).update({'lease_expires_at': datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+
+def test_claim_takes_a_lease_and_a_task_is_claimed_once(app):
+    make_task('a')
+    task = task_queue.claim_next_task('worker-1')
+    assert task.task_id == 'a'
+    assert task.status == 'IN_PROGRESS'
+    assert task.lease_owner == 'worker-1'
+    assert task.attempts == 1
+    assert task.lease_expires_at > datetime.utcnow()
+    assert task_queue.claim_next_task('worker-2') is None
+
+def test_urgent_tasks_are_claimed_first(app):
+    make_task('routine')
+    make_task('urgent', priority='urgent')
+    assert task_queue.claim_next_task('worker-1').task_id == 'urgent'
+
+def test_heartbeat_only_renews_the_owners_leases(app):
+    make_task('a')
+    task_queue.claim_next_task('worker-1')
+    assert task_queue.heartbeat(['a'], 'worker-2') == 0
+    assert task_queue.heartbeat(['a'], 'worker-1') == 1
+
+def test_expired_lease_is_requeued_with_backoff_then_failed(app):
+    make_task('a')
+    task_queue.claim_next_task('worker-1')
+    expire_lease('a')
+    assert task_queue.requeue_expired_leases() == 1
+    task = Task.query.filter_by(task_id='a').one()
+    assert task.status == 'PENDING'
+    assert task.lease_owner is None
+    assert task.available_at > datetime.utcnow()
+    assert task_queue.claim_next_task('worker-2') is None  # Still backing off
+
+    Task.query.filter_by(task_id='a').update({'available_at': datetime.utcnow()})
+    db.session.commit()
+    assert task_queue.claim_next_task('worker-2').attempts == 2
+    expire_lease('a')
+    task_queue.requeue_expired_leases()
+    assert Task.query.filter_by(task_id='a').one().status == 'FAILURE'  # Attempt budget spent
+
+def test_result_of_a_worker_that_lost_its_lease_is_discarded(app):
+    make_task('a')
+    task_queue.claim_next_task('worker-1')
+    expire_lease('a')
+    task_queue.requeue_expired_leases()
+    Task.query.filter_by(task_id='a').update({'available_at': datetime.utcnow()})
+    db.session.commit()
+    task_queue.claim_next_task('worker-2')
+
+    assert not task_queue.complete_task('a', 'worker-1', 'stale.mp3')
+    assert not task_queue.fail_task('a', 'worker-1', 'stale error')
+    assert task_queue.complete_task('a', 'worker-2', 'answer.mp3')
+    task = Task.query.filter_by(task_id='a').one()
+    assert (task.status, task.result, task.lease_owner) == ('SUCCESS', 'answer.mp3', None)
+
+def test_permanent_failure_is_not_retried(app):
+    make_task('a')
+    task_queue.claim_next_task('worker-1')
+    assert task_queue.fail_task('a', 'worker-1', 'User not found', retryable=False)
+    assert Task.query.filter_by(task_id='a').one().status == 'FAILURE'
+
+def test_spilled_audio_is_removed_once_the_task_is_done_for_good(app, tmp_path):
+    paths = {}
+    for task_id in ('succeeds', 'retries', 'fails'):
+        paths[task_id] = tmp_path / f"{task_id}.wav"
+        paths[task_id].write_bytes(b'RIFF')
+        task_queue.create_task(task_id, 1, str(paths[task_id]))
+        task_queue.claim_next_task('worker-1')
+
+    task_queue.complete_task('succeeds', 'worker-1', 'answer.mp3')
+    task_queue.fail_task('retries', 'worker-1', 'chat API down')
+    task_queue.fail_task('fails', 'worker-1', 'User not found', retryable=False)
+    assert not paths['succeeds'].exists()
+    assert paths['retries'].exists()  # Its next attempt decodes it again
+    assert not paths['fails'].exists()
+    assert Task.query.filter_by(task_id='fails').one().audio_file_path is None
+
+def test_task_is_not_added_past_max_pending(app):
+    assert task_queue.create_task('a', 1, None, max_pending=1) is not None
+    assert task_queue.create_task('b', 1, None, max_pending=1) is None
+    assert [task.task_id for task in Task.query.all()] == ['a']
+
+def test_upgrade_schema_adds_missing_columns_and_index(app):
+    db.drop_all()
+    with db.engine.begin() as connection:
+        # The tasks table as the first release created it
+        connection.execute(db.text(
+            "CREATE TABLE tasks (id INTEGER PRIMARY KEY, task_id VARCHAR(36) NOT NULL UNIQUE, "
+            "user_id INTEGER NOT NULL, status VARCHAR(20) NOT NULL, result VARCHAR, "
+            "created_at DATETIME, updated_at DATETIME)"))
+        connection.execute(db.text(
+            "INSERT INTO tasks (task_id, user_id, status, created_at) VALUES ('old', 1, 'PENDING', :now)"),
+            {'now': datetime.utcnow() - timedelta(minutes=1)})
+    db.create_all()
+    task_queue.upgrade_schema()
+    task_queue.upgrade_schema()  # Idempotent
+
+    inspector = db.inspect(db.engine)
+    assert {column['name'] for column in inspector.get_columns('tasks')} == set(Task.__table__.columns.keys())
+    assert 'ix_tasks_status_available_at' in {index['name'] for index in inspector.get_indexes('tasks')}
+    db.session.add(User(id=1, first_name='Ada', last_name='Lovelace'))
+    db.session.commit()
+    task = task_queue.claim_next_task('worker-1')  # The old PENDING task is still claimable
+    assert (task.task_id, task.priority, task.attempts) == ('old', 'routine', 1)
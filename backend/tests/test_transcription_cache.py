@@ -0,0 +1,34 @@
+# tests/test_transcription_cache.py
+
+import numpy as np
+import pytest
+from flask import Flask
+from config import Config
+import background_tasks
+
+class FakeTranscriber:
+    def __init__(self, size):
+        self.size = size
+
+    def transcribe(self, audio, profile):
+        return {'text': f"heard by {self.size}"}
+
+@pytest.fixture
+def app(monkeypatch):
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['TRANSCRIPT_CACHE_PATH'] = ''
+    monkeypatch.setattr(background_tasks, '_transcription_cache', None)
+    monkeypatch.setattr(background_tasks, 'get_transcriber', FakeTranscriber)
+    with app.app_context():
+        yield app
+
+def test_transcript_from_a_downgraded_model_is_not_served_at_full_size(app, monkeypatch):
+    audio = np.ones(16000, dtype=np.float32)
+    monkeypatch.setattr(background_tasks, 'choose_model_size', lambda: 'tiny')
+    assert background_tasks.transcribe_audio_array(audio) == ('heard by tiny', 'tiny')
+
+    monkeypatch.setattr(background_tasks, 'choose_model_size', lambda: 'base')
+    assert background_tasks.transcribe_audio_array(audio) == ('heard by base', 'base')
+    assert background_tasks.transcribe_audio_array(audio) == ('heard by base', 'base')
+    assert background_tasks.get_transcription_cache().stats()['entries'] == 2
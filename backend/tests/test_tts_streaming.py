@@ -0,0 +1,89 @@
+# tests/test_tts_streaming.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from utils.tts_streaming import SentenceSplitter, SpokenAnswer
+
+def split(pieces, max_chars=200):
+    splitter = SentenceSplitter(max_chars)
+    sentences = [sentence for piece in pieces for sentence in splitter.feed(piece)]
+    return sentences, splitter.flush()
+
+def test_sentences_are_cut_once_the_space_after_them_arrives():
+    sentences, rest = split(["Lunch is at", " noon. Dinner", " is at 6.", "30 pm! See", " you"])
+    assert sentences == ["Lunch is at noon.", "Dinner is at 6.30 pm!"]
+    assert rest == ["See you"]
+
+def test_abbreviations_initials_and_list_numbers_do_not_end_a_sentence():
+    sentences, rest = split(["Dr. Patel comes at 8 a.m. tomorrow. ", "Ask J. Smith. ", "1. Take ", "your pills. "])
+    assert sentences == ["Dr. Patel comes at 8 a.m. tomorrow.", "Ask J. Smith.", "1. Take your pills."]
+    assert rest == []
+
+def test_long_sentence_is_cut_at_its_last_comma():
+    sentences, rest = split(["Today we have soup, salad, bread and ", "a very long list of desserts"], max_chars=40)
+    assert sentences[0] == "Today we have soup, salad,"
+    assert ' '.join(sentences + rest) == "Today we have soup, salad, bread and a very long list of desserts"
+
+class Synthesizer:
+    """
+    "Synthesizes" a sentence as its bytes, finishing the sentences in delays sooner than the
+    ones before them, and failing on sentences containing "fail".
+    """
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+
+    def __call__(self, sentence):
+        time.sleep(self.delays.get(sentence, 0))
+        if 'fail' in sentence:
+            raise RuntimeError('TTS service unavailable')
+        return sentence.encode('utf-8') + b'|'
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+def test_sentences_are_written_in_answer_order_as_they_finish(tmp_path, executor):
+    first_audio = threading.Event()
+    speech = SpokenAnswer(str(tmp_path / 'answer.mp3'), executor, Synthesizer({'One.': 0.2}),
+                          on_first_audio=lambda seconds: first_audio.set())
+    speech.feed("One. Two. Three")
+    time.sleep(0.1)
+    assert not first_audio.is_set()  # Two is done, but waits for One
+    with open(speech.finish(timeout=5), 'rb') as f:
+        assert f.read() == b'One.|Two.|Three|'
+    assert first_audio.is_set() and speech.first_audio_seconds >= 0.2
+
+def test_first_synthesis_error_is_raised_by_finish(tmp_path, executor):
+    speech = SpokenAnswer(str(tmp_path / 'answer.mp3'), executor, Synthesizer())
+    speech.feed("Lunch is at noon. This will fail. Dinner is at six.")
+    with pytest.raises(RuntimeError, match='TTS service unavailable'):
+        speech.finish(timeout=5)
+
+def test_async_finish_waits_for_every_sentence(tmp_path, executor):
+    speech = SpokenAnswer(str(tmp_path / 'answer.mp3'), executor, Synthesizer({'One.': 0.1}))
+    speech.feed("One. Two.")
+    with open(asyncio.run(speech.finish_async()), 'rb') as f:
+        assert f.read() == b'One.|Two.|'
+
+def test_timeout_covers_the_whole_answer_not_each_sentence(tmp_path):
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        speech = SpokenAnswer(str(tmp_path / 'answer.mp3'), executor, Synthesizer({'One.': 0.15, 'Two.': 0.15}))
+        speech.feed("One. Two.")
+        with pytest.raises(TimeoutError):
+            speech.finish(timeout=0.2)  # Each sentence alone would make it
+
+def test_async_finish_times_out(tmp_path, executor):
+    speech = SpokenAnswer(str(tmp_path / 'async.mp3'), executor, Synthesizer({'One.': 0.3}))
+    speech.feed("One.")
+    with pytest.raises(TimeoutError):
+        asyncio.run(speech.finish_async(timeout=0.1))
+
+def test_answer_without_text_cannot_be_spoken(tmp_path, executor):
+    speech = SpokenAnswer(str(tmp_path / 'answer.mp3'), executor, Synthesizer())
+    speech.feed("   ")
+    with pytest.raises(ValueError):
+        speech.finish(timeout=5)
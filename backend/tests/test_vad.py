@@ -0,0 +1,40 @@
+# tests/test_vad.py
+
+import numpy as np
+from utils.audio_processing import trim_silence
+
+SAMPLE_RATE = 16000
+
+def voiced(seconds, amplitude=0.2):
+    # A 150 Hz voice with a few harmonics
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    wave = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 5))
+    return (amplitude * wave / np.abs(wave).max()).astype(np.float32)
+
+def silence(seconds, level=0.001):
+    return np.random.default_rng(0).normal(0, level, int(seconds * SAMPLE_RATE)).astype(np.float32)
+
+def test_clip_without_leading_or_trailing_silence_is_kept():
+    audio = voiced(2.0)
+    trimmed, skipped = trim_silence(audio)
+    assert trimmed is not None
+    assert len(trimmed) == len(audio)
+    assert skipped == 0.0
+
+def test_quiet_clip_that_is_speech_throughout_is_kept():
+    audio = voiced(2.0, amplitude=0.02)  # About -40 dBFS, below the capped noise floor plus margin
+    trimmed, skipped = trim_silence(audio)
+    assert trimmed is not None
+    assert len(trimmed) == len(audio)
+
+def test_silence_around_speech_is_trimmed():
+    audio = np.concatenate([silence(2.0), voiced(1.0), silence(2.0)])
+    trimmed, skipped = trim_silence(audio, padding_ms=300)
+    assert trimmed is not None
+    assert 1.0 <= len(trimmed) / SAMPLE_RATE <= 1.7
+    assert skipped > 3.0
+
+def test_clip_without_speech_is_dropped():
+    trimmed, skipped = trim_silence(silence(2.0))
+    assert trimmed is None
+    assert skipped == 2.0
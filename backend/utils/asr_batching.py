@@ -0,0 +1,126 @@
+# utils/asr_batching.py
+
+import threading
+import queue
+import time
+import logging
+from contextlib import nullcontext
+from concurrent.futures import Future
+import metrics
+from utils.audio_processing import split_at_silence
+from utils.asr_profiles import DEFAULT_PROFILE
+
+logger = logging.getLogger('background_tasks')
+
+class BatchingTranscriber:
+    """
+    Transcribes clips with a shared Whisper model, decoding clips with the same profile that
+    arrive within max_wait_ms as one batch. Long clips and beam search profiles are transcribed
+    on their own. Model calls run inside a slot of cpu_budget, when one is given.
+    """
+    def __init__(self, model, max_batch_size=8, max_wait_ms=20, cpu_budget=None):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._cpu_budget = cpu_budget
+        self._queue = queue.Queue()
+        if max_batch_size > 1:
+            self._thread = threading.Thread(target=self._run, name="asr-batcher", daemon=True)
+            self._thread.start()
+
+    def transcribe(self, audio, profile=None):
+        """
+        Transcribe 16 kHz mono float32 samples with an AsrProfile (Whisper's defaults if None).
+        Blocks until the clip's batch is decoded and returns a dict with 'text', like model.transcribe.
+        """
+        import whisper
+
+        profile = profile or DEFAULT_PROFILE
+        if self.max_batch_size <= 1 or not profile.batchable or len(audio) > whisper.audio.N_SAMPLES:
+            metrics.increment('asr_unbatched_clips')
+            return self._transcribe_one(audio, profile)
+
+        future = Future()
+        self._queue.put((audio, profile, future))
+        return future.result()
+
+    def _transcribe_one(self, audio, profile):
+        with self._slot():
+            return self.model.transcribe(audio, **profile.transcribe_kwargs(self.model))
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # Clips are decoded together only with others that use the same profile
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[1].name, []).append(item)
+            for group in groups.values():
+                self._decode_batch(group)
+
+    def _decode_batch(self, batch):
+        started = time.perf_counter()
+        profile = batch[0][1]
+        try:
+            with self._slot():
+                results = decode_batch(self.model, [audio for audio, _, _ in batch], profile)
+        except Exception as e:
+            logger.error(f"Error decoding batch of {len(batch)} clips: {e}")
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (audio, _, future), result in zip(batch, results):
+            if not profile.needs_fallback(result):
+                future.set_result({'text': result.text.strip()})
+                continue
+            metrics.increment('asr_batch_fallbacks')
+            try:
+                future.set_result(self._transcribe_one(audio, profile))
+            except Exception as e:
+                future.set_exception(e)
+
+        metrics.increment('asr_batches')
+        metrics.increment('asr_batched_clips', len(batch))
+        metrics.observe('asr_batch_size', len(batch))
+        metrics.observe('asr_batch_seconds', time.perf_counter() - started)
+
+    def _slot(self):
+        return self._cpu_budget.slot() if self._cpu_budget else nullcontext()
+
+def transcribe_segments(transcriber, audio, executor, segment_seconds=30.0, profile=None):
+    """
+    Transcribe a long recording by splitting it at silence into segments of at most
+    segment_seconds and transcribing them in parallel on executor, so several cores (or one
+    batch) work on it at once instead of a single sequential model.transcribe. Returns the
+    segment transcripts joined in order.
+    """
+    segments = split_at_silence(audio, max_seconds=segment_seconds)
+    texts = executor.map(lambda segment: transcriber.transcribe(segment, profile)['text'].strip(), segments)
+    metrics.increment('asr_segmented_clips')
+    metrics.increment('asr_segments', len(segments))
+    return ' '.join(text for text in texts if text)
+
+def decode_batch(model, clips, profile=DEFAULT_PROFILE):
+    """
+    Decode clips of at most 30 seconds together at the profile's first temperature.
+    Returns their DecodingResults in order.
+    """
+    import torch
+    import whisper
+
+    mel = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audio)), n_mels=model.dims.n_mels)
+        for audio in clips
+    ]).to(model.device)
+    with torch.no_grad():
+        return whisper.decode(model, mel, profile.decoding_options(model))
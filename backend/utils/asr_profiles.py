@@ -0,0 +1,69 @@
+# utils/asr_profiles.py
+
+class AsrProfile:
+    """
+    Named Whisper decoding settings (Config.ASR_PROFILES). language=None lets Whisper detect
+    it; temperature is the fallback sequence: decoding starts at the first value and moves to
+    the next only when the output looks like a failed decode (repetitive or low confidence).
+    beam_size applies at temperature 0, best_of to the sampled retries.
+    """
+    # Whisper's own thresholds for retrying at the next temperature
+    COMPRESSION_RATIO_THRESHOLD = 2.4
+    LOGPROB_THRESHOLD = -1.0
+
+    def __init__(self, name, language=None, beam_size=None, best_of=None,
+                 temperature=(0.0, 0.2, 0.4, 0.6, 0.8, 1.0), condition_on_previous_text=True):
+        self.name = name
+        self.language = language
+        self.beam_size = beam_size
+        self.best_of = best_of
+        self.temperature = tuple(temperature)
+        self.condition_on_previous_text = condition_on_previous_text
+
+    @property
+    def batchable(self):
+        # whisper.decode's beam search fails on batches of more than one clip
+        return self.beam_size is None
+
+    def transcribe_kwargs(self, model):
+        """
+        Keyword arguments for model.transcribe.
+        """
+        return {
+            'language': self.language,
+            'beam_size': self.beam_size,
+            'best_of': self.best_of,
+            'temperature': self.temperature,
+            'condition_on_previous_text': self.condition_on_previous_text,
+            'compression_ratio_threshold': self.COMPRESSION_RATIO_THRESHOLD,
+            'logprob_threshold': self.LOGPROB_THRESHOLD,
+            'fp16': model.device.type == 'cuda'
+        }
+
+    def decoding_options(self, model):
+        """
+        DecodingOptions for a batched whisper.decode at the first temperature.
+        """
+        import whisper
+
+        temperature = self.temperature[0]
+        return whisper.DecodingOptions(
+            language=self.language,
+            temperature=temperature,
+            beam_size=self.beam_size if temperature == 0 else None,
+            best_of=self.best_of if temperature > 0 else None,
+            fp16=model.device.type == 'cuda',
+            without_timestamps=True
+        )
+
+    def needs_fallback(self, result):
+        """
+        Whether a batched DecodingResult should be redone with the rest of the temperatures.
+        """
+        if len(self.temperature) < 2:
+            return False
+        return (result.compression_ratio > self.COMPRESSION_RATIO_THRESHOLD
+                or result.avg_logprob < self.LOGPROB_THRESHOLD)
+
+# Whisper's own defaults, for callers that don't pick a profile
+DEFAULT_PROFILE = AsrProfile('default')
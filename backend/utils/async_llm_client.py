@@ -0,0 +1,113 @@
+# utils/async_llm_client.py
+
+import asyncio
+import time
+import aiohttp
+import metrics
+from utils.llm_client import LLMError, RETRY_STATUSES, chat_body, stream_event_content
+
+class AsyncLLMClient:
+    """
+    asyncio counterpart of LLMClient, on an aiohttp session created on first use.
+    """
+    def __init__(self, base_url, api_key, connect_timeout=3.05, read_timeout=30, pool_size=100, max_retries=2,
+                 backoff_factor=0.5):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        # sock_read bounds the wait for each read, like the read timeout of requests
+        self.timeout = aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout, sock_read=read_timeout)
+        self._session = None
+
+    async def chat(self, messages, model, max_tokens=None, temperature=None):
+        """
+        Return the text of the first choice for a list of chat messages.
+        """
+        started = time.perf_counter()
+        async with await self._post(chat_body(messages, model, max_tokens, temperature)) as response:
+            try:
+                payload = await response.json(content_type=None)
+                content = payload['choices'][0]['message']['content']
+            except asyncio.TimeoutError as e:
+                metrics.increment('llm_timeouts')
+                raise LLMError("Chat API timed out reading the response") from e
+            except aiohttp.ClientError as e:
+                metrics.increment('llm_errors')
+                raise LLMError(f"Chat API request failed: {e}") from e
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                metrics.increment('llm_errors')
+                raise LLMError("Unexpected chat API response") from e
+        metrics.observe('llm_request_seconds', time.perf_counter() - started)
+        return content
+
+    async def chat_stream(self, messages, model, max_tokens=None, temperature=None):
+        """
+        Like chat, but an async generator of the answer's text pieces as the API streams them.
+        """
+        started = time.perf_counter()
+        first = True
+        async with await self._post(chat_body(messages, model, max_tokens, temperature, stream=True)) as response:
+            try:
+                async for line in response.content:
+                    content = stream_event_content(line.decode('utf-8').strip())
+                    if content:
+                        if first:
+                            metrics.observe('llm_first_token_seconds', time.perf_counter() - started)
+                            first = False
+                        yield content
+            except asyncio.TimeoutError as e:
+                metrics.increment('llm_timeouts')
+                raise LLMError("Chat API stream timed out") from e
+            except aiohttp.ClientError as e:
+                metrics.increment('llm_errors')
+                raise LLMError(f"Chat API stream failed: {e}") from e
+        metrics.observe('llm_request_seconds', time.perf_counter() - started)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _post(self, body):
+        """
+        POST body to the completions endpoint and return the 200 response, to be used with
+        async with. Connection errors, 429 and 5xx responses are retried with exponential
+        backoff, honouring Retry-After; timeouts are not.
+        """
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=self.timeout,
+                headers={'Authorization': f"Bearer {self.api_key}"}
+            )
+        for attempt in range(self.max_retries + 1):
+            retries_left = attempt < self.max_retries
+            delay = self.backoff_factor * 2 ** attempt
+            try:
+                response = await self._session.post(f"{self.base_url}/chat/completions", json=body)
+            except asyncio.TimeoutError as e:
+                metrics.increment('llm_timeouts')
+                raise LLMError("Chat API timed out") from e
+            except aiohttp.ClientError as e:
+                if retries_left:
+                    await asyncio.sleep(delay)
+                    continue
+                metrics.increment('llm_errors')
+                raise LLMError(f"Chat API request failed: {e}") from e
+
+            if response.status == 200:
+                return response
+            if response.status in RETRY_STATUSES and retries_left:
+                retry_after = response.headers.get('Retry-After', '')
+                response.release()
+                await asyncio.sleep(float(retry_after) if retry_after.isdigit() else delay)
+                continue
+            try:
+                text = (await response.text())[:200]
+            except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeDecodeError):
+                text = ''
+            response.release()
+            metrics.increment('llm_errors')
+            raise LLMError(f"Chat API returned {response.status}: {text}")
@@ -0,0 +1,84 @@
+# utils/cpu_budget.py
+
+import os
+import threading
+import time
+import logging
+from contextlib import contextmanager
+import metrics
+
+logger = logging.getLogger('background_tasks')
+
+def split_cores(concurrency, processes=1):
+    """
+    (concurrency, torch threads) for each of processes processes that together use the
+    machine's cores once: concurrency is lowered when there are fewer cores than
+    processes x concurrency, and the remaining cores are split evenly as threads.
+    """
+    cores = os.cpu_count() or 1
+    processes = max(processes, 1)
+    concurrency = max(1, min(concurrency, cores // processes))
+    return concurrency, max(1, cores // (processes * concurrency))
+
+class CpuBudget:
+    """
+    The CPU share of ASR in this process, one of processes with the same share: at most
+    concurrency transcriptions (or batches) run at once inside slot(), each with
+    threads_per_transcription torch threads.
+    """
+    def __init__(self, concurrency, threads_per_transcription, processes=1):
+        self.concurrency = concurrency
+        self.threads_per_transcription = threads_per_transcription
+        self.processes = processes
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._active = 0
+        metrics.set_gauge('asr_concurrency_limit', concurrency)
+        metrics.set_gauge('asr_torch_threads', threads_per_transcription)
+        metrics.set_gauge('asr_cpu_budget_threads', self.total_threads())
+        metrics.set_gauge('asr_active_transcriptions', 0)
+        if self.total_threads() > (os.cpu_count() or 1):
+            logger.warning(f"ASR CPU budget of {processes} processes x {concurrency} x {threads_per_transcription} "
+                           f"threads exceeds the {os.cpu_count()} available cores")
+
+    def total_threads(self):
+        """
+        Torch threads ASR may use across all the processes sharing the machine.
+        """
+        return self.processes * self.concurrency * self.threads_per_transcription
+
+    @contextmanager
+    def slot(self):
+        started = time.perf_counter()
+        self._slots.acquire()
+        metrics.observe('asr_budget_wait_seconds', time.perf_counter() - started)
+        try:
+            # With OpenMP builds the intra-op thread count is kept per calling thread, so set it
+            # in every thread that runs the model
+            if getattr(self._local, 'threads', None) != self.threads_per_transcription:
+                import torch
+
+                torch.set_num_threads(self.threads_per_transcription)
+                self._local.threads = self.threads_per_transcription
+            with self._lock:
+                self._active += 1
+                metrics.set_gauge('asr_active_transcriptions', self._active)
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    metrics.set_gauge('asr_active_transcriptions', self._active)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'processes': self.processes,
+                'concurrency': self.concurrency,
+                'threads_per_transcription': self.threads_per_transcription,
+                'total_threads': self.total_threads(),
+                'active': self._active
+            }
@@ -0,0 +1,54 @@
+# utils/io_engine.py
+
+import asyncio
+import threading
+import logging
+
+logger = logging.getLogger('background_tasks')
+
+class IOEngine:
+    """
+    An asyncio event loop on a background thread for network-bound work. Synchronous code hands
+    it coroutines with submit or run; they run with a copy of the caller's context (current_app).
+    """
+    def __init__(self, name='io-engine'):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """
+        Run coro on the loop and block the calling thread until it returns or raises.
+        """
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("IOEngine.run called from the engine's own loop; await the coroutine instead")
+        return self.submit(coro).result(timeout)
+
+    def stop(self, timeout=None):
+        """
+        Cancel what is still running on the loop and stop its thread.
+        """
+        async def cancel_all():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self.loop.is_running():
+            try:
+                self.submit(cancel_all()).result(timeout)
+            except Exception as e:
+                logger.warning(f"IO engine tasks did not stop cleanly: {e}")
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
@@ -0,0 +1,32 @@
+# utils/keyword_spotting.py
+
+import re
+
+def normalize_text(text):
+    """
+    Lowercase a transcript and reduce it to words separated by single spaces, so
+    "Help! Call the nurse." and "help call the  nurse" read the same.
+    """
+    text = text.lower().replace('’', "'")
+    return ' '.join(re.sub(r"[^a-z0-9' ]+", ' ', text).split())
+
+class EmergencyPhraseDetector:
+    """
+    Finds emergency phrases ("help", "call the nurse", ...) in transcribed text. Phrases match
+    whole words only, so "helpful" does not count as "help".
+    """
+    def __init__(self, phrases):
+        self.phrases = sorted({normalize_text(phrase) for phrase in phrases if phrase.strip()}, key=len, reverse=True)
+        if self.phrases:
+            self._pattern = re.compile(r"(?<![a-z0-9'])(" + '|'.join(re.escape(phrase) for phrase in self.phrases) + r")(?![a-z0-9'])")
+        else:
+            self._pattern = None
+
+    def find(self, text):
+        """
+        Return the first emergency phrase in text, or None.
+        """
+        if self._pattern is None or not text:
+            return None
+        match = self._pattern.search(normalize_text(text))
+        return match.group(1) if match else None
@@ -0,0 +1,119 @@
+# utils/llm_client.py
+
+import json
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
+import metrics
+
+class LLMError(Exception):
+    """
+    Raised when the chat API can't be reached, times out or returns an error.
+    """
+
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+def chat_body(messages, model, max_tokens=None, temperature=None, stream=False):
+    body = {'model': model, 'messages': messages}
+    if max_tokens is not None:
+        body['max_tokens'] = max_tokens
+    if temperature is not None:
+        body['temperature'] = temperature
+    if stream:
+        body['stream'] = True
+    return body
+
+def stream_event_content(line):
+    """
+    The text carried by one line of a streamed chat completion, or None for lines without
+    any (keep-alive blank lines, SSE comments, the closing [DONE]).
+    """
+    if not line.startswith('data:'):
+        return None
+    data = line[len('data:'):].strip()
+    if data == '[DONE]':
+        return None
+    try:
+        return json.loads(data)['choices'][0]['delta'].get('content')
+    except (ValueError, KeyError, IndexError) as e:
+        metrics.increment('llm_errors')
+        raise LLMError(f"Unexpected chat API stream event: {data[:200]}") from e
+
+class LLMClient:
+    """
+    Client for an OpenAI-compatible chat completions API on one pooled requests session, with
+    connect and read timeouts. Connection errors, 429 and 5xx responses are retried with backoff.
+    """
+    def __init__(self, base_url, api_key, connect_timeout=3.05, read_timeout=30, pool_size=10, max_retries=2):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(total=max_retries, read=False, backoff_factor=0.5, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=['POST'], respect_retry_after_header=True, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True, max_retries=retry)
+        self._session = requests.Session()
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._session.headers.update({'Authorization': f"Bearer {api_key}"})
+
+    def chat(self, messages, model, max_tokens=None, temperature=None):
+        """
+        Return the text of the first choice for a list of chat messages.
+        """
+        started = time.perf_counter()
+        response = self._post(chat_body(messages, model, max_tokens, temperature))
+        metrics.observe('llm_request_seconds', time.perf_counter() - started)
+        try:
+            return response.json()['choices'][0]['message']['content']
+        except (ValueError, KeyError, IndexError) as e:
+            metrics.increment('llm_errors')
+            raise LLMError(f"Unexpected chat API response: {response.text[:200]}") from e
+
+    def chat_stream(self, messages, model, max_tokens=None, temperature=None):
+        """
+        Like chat, but a generator of the answer's text pieces as the API streams them
+        (server-sent events), so the caller can use the start of the answer before the end is
+        generated. read_timeout then also bounds the wait for each following piece.
+        """
+        body = chat_body(messages, model, max_tokens, temperature, stream=True)
+        started = time.perf_counter()
+        first = True
+        with self._post(body, stream=True) as response:
+            try:
+                # Read on to the end of the stream, past [DONE], so the connection goes back to the pool
+                for line in response.iter_lines():
+                    content = stream_event_content(line.decode('utf-8'))
+                    if content:
+                        if first:
+                            metrics.observe('llm_first_token_seconds', time.perf_counter() - started)
+                            first = False
+                        yield content
+            except requests.RequestException as e:
+                # requests reports a read timeout in the middle of a stream as a ConnectionError
+                if isinstance(e, requests.Timeout) or (e.args and isinstance(e.args[0], ReadTimeoutError)):
+                    metrics.increment('llm_timeouts')
+                    raise LLMError(f"Chat API stream timed out: {e}") from e
+                metrics.increment('llm_errors')
+                raise LLMError(f"Chat API stream failed: {e}") from e
+        metrics.observe('llm_request_seconds', time.perf_counter() - started)
+
+    def _post(self, body, stream=False):
+        try:
+            response = self._session.post(f"{self.base_url}/chat/completions", json=body, timeout=self.timeout,
+                                          stream=stream)
+        except requests.Timeout as e:
+            metrics.increment('llm_timeouts')
+            raise LLMError(f"Chat API timed out: {e}") from e
+        except requests.RequestException as e:
+            metrics.increment('llm_errors')
+            raise LLMError(f"Chat API request failed: {e}") from e
+        if response.status_code != 200:
+            metrics.increment('llm_errors')
+            text = response.text[:200]
+            response.close()
+            raise LLMError(f"Chat API returned {response.status_code}: {text}")
+        return response
+
+    def close(self):
+        self._session.close()
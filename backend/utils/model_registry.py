@@ -0,0 +1,177 @@
+# utils/model_registry.py
+
+import threading
+import time
+import logging
+import warnings
+from collections import deque
+import metrics
+
+logger = logging.getLogger('background_tasks')
+
+QUANTIZATION_MODES = ['none', 'int8']
+
+# Whisper sizes smallest first; variants such as 'tiny.en' or 'large-v3' rank with their size
+SIZE_ORDER = ['tiny', 'base', 'small', 'medium', 'large']
+
+def size_rank(size):
+    name = size.split('.')[0].split('-')[0]
+    return SIZE_ORDER.index(name) if name in SIZE_ORDER else None
+
+def model_size_ladder(sizes, max_size):
+    """
+    The sizes the adaptive selector moves between: those of sizes below max_size, then
+    max_size itself, so the configured model is always the top even when it isn't listed.
+    """
+    if max_size in sizes:
+        return sizes[:sizes.index(max_size) + 1]
+    rank = size_rank(max_size)
+    if rank is None:
+        logger.warning(f"Unknown Whisper model size '{max_size}'; adaptive model selection will not downgrade")
+        return [max_size]
+    return [size for size in sizes if size_rank(size) is not None and size_rank(size) < rank] + [max_size]
+
+def load_whisper_model(size, quantization='none', store=None):
+    """
+    Load a Whisper model, from a ModelStore when one is given. With quantization 'int8' the
+    model is loaded on the CPU and its linear layers (attention projections and MLPs, most of
+    the weights and compute) are converted to dynamic int8 quantization: weights are stored
+    as int8 and activations are quantized on the fly, which is faster on CPUs without
+    changing the model's interface.
+    """
+    import torch
+    import whisper
+
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown Whisper quantization '{quantization}', expected one of {QUANTIZATION_MODES}")
+    load = store.load if store else whisper.load_model
+    if quantization == 'none':
+        return load(size)
+
+    # The quantized weights are private to the process, even when the fp32 ones were mapped
+    model = load(size, device='cpu')
+    _use_plain_linear(model)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    logger.info(f"Quantized Whisper model '{size}' to int8")
+    return model
+
+def _use_plain_linear(module):
+    # Whisper uses its own nn.Linear subclass, which quantize_dynamic does not recognise.
+    # On the CPU in fp32 it behaves exactly like nn.Linear, so swap in plain layers that
+    # share the same parameters.
+    import torch
+
+    for name, child in module.named_children():
+        if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+            linear = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+            linear.weight = child.weight
+            linear.bias = child.bias
+            setattr(module, name, linear)
+        else:
+            _use_plain_linear(child)
+
+class ModelRegistry:
+    """
+    Whisper models by size, each loaded on first use and kept for the life of the process.
+    Each size loads under its own lock, so a load never holds up tasks using another size.
+    """
+    def __init__(self, loader):
+        self._loader = loader
+        self._models = {}
+        self._load_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, size):
+        with self._lock:
+            if size in self._models:
+                return self._models[size]
+            load_lock = self._load_locks.setdefault(size, threading.Lock())
+        with load_lock:
+            # Another thread may have loaded it while this one waited
+            with self._lock:
+                if size in self._models:
+                    return self._models[size]
+            logger.info(f"Loading Whisper model '{size}'...")
+            started = time.perf_counter()
+            model = self._loader(size)
+            metrics.increment('asr_model_loads')
+            logger.info(f"Whisper model '{size}' loaded in {time.perf_counter() - started:.1f}s")
+            with self._lock:
+                self._models[size] = model
+            return model
+
+    def loaded_sizes(self):
+        with self._lock:
+            return list(self._models)
+
+class AdaptiveModelSelector:
+    """
+    Picks the Whisper size for each task from the queue depth and the recent p95 of task
+    latency (upload to finished answer). Under load it steps down to smaller, faster models
+    to keep p95 under the latency target, and steps back up once the queue drains and
+    latency has headroom again. Moves are one size at a time and at most once per cooldown,
+    so the choice does not flap.
+    """
+    # Step back up only while p95 is below this fraction of the target
+    UPGRADE_HEADROOM = 0.5
+
+    def __init__(self, sizes, max_size, latency_target, downgrade_queue_depth, upgrade_queue_depth,
+                 cooldown, latency_window=60):
+        # sizes are ordered smallest first; never go above the configured model
+        self.sizes = model_size_ladder(sizes, max_size)
+        self.latency_target = latency_target
+        self.downgrade_queue_depth = downgrade_queue_depth
+        self.upgrade_queue_depth = upgrade_queue_depth
+        self.cooldown = cooldown
+        self.latency_window = latency_window
+        self.current = max_size
+        self._last_switch = 0.0
+        self._latencies = deque()
+        self._lock = threading.Lock()
+
+    def record_latency(self, seconds):
+        with self._lock:
+            self._latencies.append((time.monotonic(), seconds))
+
+    def p95_latency(self):
+        with self._lock:
+            self._expire_latencies(time.monotonic())
+            ordered = sorted(seconds for _, seconds in self._latencies)
+        if not ordered:
+            return None
+        return ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)]
+
+    def _expire_latencies(self, now):
+        while self._latencies and now - self._latencies[0][0] > self.latency_window:
+            self._latencies.popleft()
+
+    def choose(self, queue_depth):
+        p95 = self.p95_latency()
+        now = time.monotonic()
+        with self._lock:
+            previous = self.current
+            index = self.sizes.index(self.current)
+            overloaded = queue_depth >= self.downgrade_queue_depth or (p95 is not None and p95 > self.latency_target)
+            relaxed = queue_depth <= self.upgrade_queue_depth and (
+                p95 is None or p95 < self.latency_target * self.UPGRADE_HEADROOM)
+            if now - self._last_switch >= self.cooldown:
+                if overloaded and index > 0:
+                    index -= 1
+                elif relaxed and index < len(self.sizes) - 1:
+                    index += 1
+            self.current = self.sizes[index]
+            if self.current != previous:
+                self._last_switch = now
+            size = self.current
+
+        p95_text = f"{p95:.1f}s" if p95 is not None else 'n/a'
+        if size != previous:
+            metrics.increment('asr_model_switches')
+            logger.warning(f"ASR model switched from '{previous}' to '{size}' "
+                            f"(queue depth {queue_depth}, p95 {p95_text}, target {self.latency_target}s)")
+        logger.info(f"ASR model decision: '{size}' (queue depth {queue_depth}, p95 {p95_text})")
+        metrics.increment(f'asr_model_decisions.{size}')
+        metrics.set_gauge('asr_model_size', size)
+        return size
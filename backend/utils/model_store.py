@@ -0,0 +1,172 @@
+# utils/model_store.py
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger('background_tasks')
+
+class ModelStoreError(Exception):
+    """
+    Raised when a model is missing from the store or its artifact does not match the manifest.
+    """
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# The torch.nn.init functions Whisper's layers (Linear, Conv1d, LayerNorm, Embedding) call
+_INIT_FUNCTIONS = ['uniform_', 'normal_', 'constant_', 'ones_', 'zeros_', 'kaiming_uniform_']
+_init_lock = threading.Lock()
+
+@contextmanager
+def _skip_weight_init():
+    # Like transformers' no_init_weights: modules built inside this block allocate their
+    # parameters (pages that are never touched, so no real memory) but skip filling them
+    # with random values that load_state_dict replaces anyway. Buffers such as Whisper's
+    # attention mask are still computed. The patch is process-wide, so models of different
+    # sizes loading at the same time take turns building.
+    import torch
+
+    with _init_lock:
+        originals = {name: getattr(torch.nn.init, name) for name in _INIT_FUNCTIONS}
+        for name in _INIT_FUNCTIONS:
+            setattr(torch.nn.init, name, lambda tensor, *args, **kwargs: tensor)
+        try:
+            yield
+        finally:
+            for name, function in originals.items():
+                setattr(torch.nn.init, name, function)
+
+class ModelStore:
+    """
+    Whisper checkpoints stored as fp32 <size>.pt files in root, with their SHA256 and size in
+    manifest.json, so load() can memory-map them and processes share the weight pages.
+    load() only checks the size; verify() checks the full SHA256.
+    """
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, root, allow_download=True):
+        self.root = root
+        self.allow_download = allow_download
+        self._lock = threading.Lock()
+
+    def path(self, size):
+        return os.path.join(self.root, f"{size}.pt")
+
+    def manifest(self):
+        try:
+            with open(os.path.join(self.root, self.MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def fetch(self, size, source=None):
+        """
+        Add model size to the store from source (a checkpoint file), or by downloading the
+        official checkpoint when source is None. Official checkpoints are checked against
+        their published SHA256 either way. Returns the manifest entry.
+        """
+        import torch
+        import whisper
+
+        url = whisper._MODELS.get(size)
+        if source is None and url is None:
+            raise ModelStoreError(f"'{size}' is not an official Whisper model; pass a checkpoint file to add it")
+        os.makedirs(self.root, exist_ok=True)
+
+        with tempfile.TemporaryDirectory(dir=self.root) as scratch:
+            if source is None:
+                logger.info(f"Downloading Whisper model '{size}'...")
+                # whisper._download checks the published SHA256 itself
+                source = whisper._download(url, scratch, in_memory=False)
+                source_sha256 = url.split('/')[-2]
+            else:
+                source_sha256 = file_sha256(source)
+                if url is not None and source_sha256 != url.split('/')[-2]:
+                    raise ModelStoreError(f"{source} does not match the published SHA256 of Whisper model '{size}'")
+
+            checkpoint = torch.load(source, map_location='cpu', weights_only=True)
+            checkpoint['model_state_dict'] = {
+                name: tensor.float() if tensor.is_floating_point() else tensor
+                for name, tensor in checkpoint['model_state_dict'].items()
+            }
+            converted = os.path.join(scratch, f"{size}.pt")
+            torch.save({'dims': checkpoint['dims'], 'model_state_dict': checkpoint['model_state_dict']}, converted)
+            entry = {
+                'file': f"{size}.pt",
+                'sha256': file_sha256(converted),
+                'bytes': os.path.getsize(converted),
+                'source_sha256': source_sha256,
+                'fetched_at': datetime.utcnow().isoformat()
+            }
+            # scratch is inside root, so this is an atomic rename
+            os.replace(converted, self.path(size))
+
+        with self._lock:
+            manifest = self.manifest()
+            manifest[size] = entry
+            self._write_manifest(manifest)
+        logger.info(f"Stored Whisper model '{size}' ({entry['bytes'] / 2 ** 20:.0f} MiB) in {self.root}")
+        return entry
+
+    def verify(self, size):
+        """
+        Check the stored artifact of model size against the SHA256 in the manifest.
+        Raises ModelStoreError if it is missing or does not match.
+        """
+        entry = self._entry(size)
+        sha256 = file_sha256(self.path(size))
+        if sha256 != entry['sha256']:
+            raise ModelStoreError(f"Stored Whisper model '{size}' is corrupt: SHA256 {sha256}, expected {entry['sha256']}")
+        return entry
+
+    def load(self, size, device=None):
+        """
+        Load model size with its weights memory-mapped from the store, fetching it first if it
+        is missing and downloads are allowed. Same interface as whisper.load_model.
+        """
+        import torch
+        from whisper.model import ModelDimensions, Whisper
+        from whisper import _ALIGNMENT_HEADS
+
+        if size not in self.manifest() or not os.path.isfile(self.path(size)):
+            if not self.allow_download:
+                raise ModelStoreError(f"Whisper model '{size}' is not in the model store at {self.root}; "
+                                      f"add it with python manage_models.py fetch {size}")
+            self.fetch(size)
+        entry = self._entry(size)
+        if os.path.getsize(self.path(size)) != entry['bytes']:
+            raise ModelStoreError(f"Stored Whisper model '{size}' has the wrong size; fetch it again")
+
+        checkpoint = torch.load(self.path(size), map_location='cpu', mmap=True, weights_only=True)
+        with _skip_weight_init():
+            model = Whisper(ModelDimensions(**checkpoint['dims']))
+        # Use the mapped tensors as the model's parameters instead of copying them in
+        model.load_state_dict(checkpoint['model_state_dict'], assign=True)
+        if size in _ALIGNMENT_HEADS:
+            model.set_alignment_heads(_ALIGNMENT_HEADS[size])
+
+        if device is None:
+            device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        return model.to(device)
+
+    def _entry(self, size):
+        entry = self.manifest().get(size)
+        if entry is None or not os.path.isfile(self.path(size)):
+            raise ModelStoreError(f"Whisper model '{size}' is not in the model store at {self.root}")
+        return entry
+
+    def _write_manifest(self, manifest):
+        path = os.path.join(self.root, self.MANIFEST)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(path + '.tmp', path)
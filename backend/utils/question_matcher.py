@@ -0,0 +1,160 @@
+# utils/question_matcher.py
+
+import math
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+import numpy as np
+import metrics
+from utils.keyword_spotting import normalize_text
+
+# Question words and other function words, never the word that tells two questions apart
+STOP_WORDS = {
+    'a', 'an', 'the', 'is', 'are', 'am', 'was', 'be', 'do', 'does', 'did', 'can', 'could', 'will',
+    'would', 'should', 'i', 'me', 'my', 'we', 'our', 'you', 'your', 'it', 'to', 'of', 'in', 'on',
+    'at', 'for', 'and', 'or', 'what', "what's", 'when', "when's", 'where', "where's", 'which',
+    'who', 'how', "how's", 'why', 'time', 'today', 'like', 'get', 'have', 'has', 'please', 'tell'
+}
+
+def _same_word(a, b, stem=4):
+    return a == b or (len(a) >= stem and len(b) >= stem and a[:stem] == b[:stem])
+
+def _content_words(question):
+    return [word for word in question.split() if word not in STOP_WORDS] or question.split()
+
+def _word_overlap(question, other, idf):
+    """
+    The IDF-weighted share of one question's content words found in the other, taking the
+    better covered of the two: a question that adds words to another ("when is my next pill
+    due") still scores 1, one that swaps a word ("lunch" for "dinner") leaves both uncovered.
+    """
+    words, other_words = _content_words(question), _content_words(other)
+
+    def covered(words, by):
+        total = sum(idf[f"word:{word}"] for word in words)
+        shared = sum(idf[f"word:{word}"] for word in words if any(_same_word(word, match) for match in by))
+        return shared / total
+
+    return max(covered(words, other_words), covered(other_words, words))
+
+class QuestionMatch:
+    def __init__(self, question, answer, score):
+        self.question = question
+        self.answer = answer
+        self.score = score
+
+class QuestionMatcher:
+    """
+    Recent questions and their answers by scope (utils.response_cache.response_scope), searched
+    for paraphrases of a new question by TF-IDF cosine similarity of character n-grams and words,
+    averaged with the IDF-weighted overlap of their content words.
+    """
+    def __init__(self, threshold=0.65, entries_per_scope=50, max_scopes=1000, ttl=900, ngram_min=2, ngram_max=4):
+        self.threshold = threshold
+        self.entries_per_scope = entries_per_scope
+        self.max_scopes = max_scopes
+        self.ttl = ttl
+        self.ngram_min = ngram_min
+        self.ngram_max = ngram_max
+        self._scopes = OrderedDict()  # scope -> deque of (question, answer, features, added_at)
+        self._document_frequency = Counter()
+        self._documents = 0
+        self._lock = threading.Lock()
+
+    def features(self, question):
+        """
+        Counts of the character n-grams and words of a normalized question.
+        """
+        padded = f" {question} "
+        grams = Counter(padded[i:i + n] for n in range(self.ngram_min, self.ngram_max + 1)
+                        for i in range(len(padded) - n + 1))
+        grams.update(f"word:{word}" for word in question.split())
+        return grams
+
+    def add(self, scope, question, answer):
+        question = normalize_text(question)
+        if not question:
+            return
+        features = self.features(question)
+        with self._lock:
+            entries = self._scopes.get(scope)
+            if entries is None:
+                entries = self._scopes[scope] = deque()
+            self._scopes.move_to_end(scope)
+            # A repeated question replaces its older answer
+            for entry in [entry for entry in entries if entry[0] == question]:
+                entries.remove(entry)
+                self._forget(entry)
+            entries.append((question, answer, features, time.monotonic()))
+            self._document_frequency.update(features.keys())
+            self._documents += 1
+            while len(entries) > self.entries_per_scope:
+                self._forget(entries.popleft())
+            while len(self._scopes) > self.max_scopes:
+                _, evicted = self._scopes.popitem(last=False)
+                for entry in evicted:
+                    self._forget(entry)
+            metrics.set_gauge('question_matcher_entries', self._documents)
+
+    def search(self, scope, question, k=3):
+        """
+        The k stored questions of scope most similar to question, best first, as QuestionMatch.
+        """
+        question = normalize_text(question)
+        if not question:
+            return []
+        query = self.features(question)
+        with self._lock:
+            entries = self._scopes.get(scope)
+            if not entries:
+                return []
+            self._expire(entries, time.monotonic() - self.ttl)
+            if not entries:
+                return []
+            candidates = list(entries)
+            # Smoothed IDF, as in scikit-learn's TfidfVectorizer
+            idf = {gram: math.log((1 + self._documents) / (1 + self._document_frequency[gram])) + 1
+                   for gram in set(query).union(*(entry[2] for entry in candidates))}
+
+        columns = {gram: i for i, gram in enumerate(idf)}
+        weights = np.array([idf[gram] for gram in columns], dtype=np.float32)
+        matrix = np.zeros((len(candidates) + 1, len(columns)), dtype=np.float32)
+        for row, features in enumerate([query] + [entry[2] for entry in candidates]):
+            for gram, count in features.items():
+                matrix[row, columns[gram]] = 1 + math.log(count)  # Sublinear term frequency
+        matrix *= weights
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        scores = matrix[1:] @ matrix[0]
+        # Questions that differ in one decisive word ("what's the date today" and "what's the
+        # weather today") can still share most n-grams, so the score is averaged with the
+        # overlap of their content words, where a word also matches one sharing its first
+        # letters ("physio" for "physical"). Questions without a content word in common score 0
+        for i, (stored, _, _, _) in enumerate(candidates):
+            overlap = _word_overlap(question, stored, idf)
+            scores[i] = (scores[i] + overlap) / 2 if overlap else 0.0
+        best = np.argsort(-scores)[:k]
+        return [QuestionMatch(candidates[i][0], candidates[i][1], float(scores[i])) for i in best]
+
+    def match(self, scope, question):
+        """
+        The stored answer to a paraphrase of question in scope scoring at least threshold, or None.
+        """
+        started = time.perf_counter()
+        results = self.search(scope, question, k=1)
+        metrics.observe('question_matcher_seconds', time.perf_counter() - started)
+        if results and results[0].score >= self.threshold:
+            metrics.increment('question_matcher_hits')
+            return results[0]
+        metrics.increment('question_matcher_misses')
+        return None
+
+    def _expire(self, entries, cutoff):
+        while entries and entries[0][3] < cutoff:
+            self._forget(entries.popleft())
+
+    def _forget(self, entry):
+        for gram in entry[2]:
+            self._document_frequency[gram] -= 1
+            if not self._document_frequency[gram]:
+                del self._document_frequency[gram]
+        self._documents -= 1
@@ -0,0 +1,190 @@
+# utils/response_cache.py
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from concurrent.futures import Future
+import metrics
+from utils.keyword_spotting import normalize_text
+from utils.sqlite_local import ThreadConnections
+
+logger = logging.getLogger('background_tasks')
+
+def context_version(user_data):
+    """
+    Version of a resident's context (the user data the prompt is built from): it changes
+    whenever any of it does, e.g. a new prescription, so answers given before go stale.
+    """
+    return hashlib.sha256(json.dumps(user_data, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+def response_scope(user_id, user_data, parameters):
+    """
+    The answers that may be reused for one another: same resident, same context version
+    and same chat parameters.
+    """
+    scope = json.dumps({
+        'user_id': user_id,
+        'context_version': context_version(user_data),
+        'parameters': parameters
+    }, sort_keys=True)
+    return hashlib.sha256(scope.encode('utf-8')).hexdigest()
+
+def response_key(user_id, user_data, question, parameters):
+    """
+    Cache key for an answer: its scope plus the normalized question ("What time is lunch?"
+    and "what time is lunch" match).
+    """
+    key = response_scope(user_id, user_data, parameters) + ':' + normalize_text(question)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """
+    Chat answers in a SQLite file shared by every process on the host. Entries expire
+    ttl seconds after they were generated, and once there are more than max_entries or
+    their text takes more than max_bytes the least recently used ones are evicted.
+    Failed calls are never cached. Concurrent misses for one key in a process share a
+    single call, so residents asking the same thing at once cost one chat call.
+    """
+    def __init__(self, path, ttl=900, max_entries=5000, max_bytes=16 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._connections = ThreadConnections(path)
+        self._in_flight = {}  # key -> Future of the answer being generated
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connections.get() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, bytes INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+
+    def get_or_generate(self, key, generate):
+        """
+        Return the cached answer for key, or the answer of a concurrent call for the same key,
+        or call generate() and cache what it returns.
+        """
+        response = self.get(key)
+        if response is not None:
+            self._record(hit=True)
+            return response
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            response = generate()
+            self.put(key, response)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._leave(key)
+
+    async def get_or_generate_async(self, key, generate):
+        """
+        get_or_generate for coroutines: generate is a coroutine function, and the SQLite
+        calls run on the event loop's default executor so they don't block the loop.
+        """
+        response = await asyncio.to_thread(self.get, key)
+        if response is not None:
+            self._record(hit=True)
+            return response
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            response = await generate()
+            await asyncio.to_thread(self.put, key, response)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._leave(key)
+
+    def get(self, key):
+        now = time.time()
+        try:
+            with self._connections.get() as connection:
+                row = connection.execute(
+                    "SELECT response FROM responses WHERE key = ? AND created_at > ?", (key, now - self.ttl)
+                ).fetchone()
+                if row is not None:
+                    connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+        return row[0] if row is not None else None
+
+    def put(self, key, response):
+        now = time.time()
+        try:
+            with self._connections.get() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, bytes, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (key, response, len(response.encode('utf-8')), now, now)
+                )
+                self._trim(connection, now)
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    def stats(self):
+        try:
+            with self._connections.get() as connection:
+                entries, total_bytes = connection.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM responses").fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache stats failed: {e}")
+            return {}
+        with self._lock:
+            in_flight = len(self._in_flight)
+        return {'entries': entries, 'bytes': total_bytes, 'in_flight': in_flight}
+
+    def _trim(self, connection, now):
+        expired = connection.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl,)).rowcount
+        # Keep the most recently used entries that fit in both max_entries and max_bytes
+        evicted = connection.execute(
+            "DELETE FROM responses WHERE key IN (SELECT key FROM ("
+            "SELECT key, ROW_NUMBER() OVER recent AS position, SUM(bytes) OVER recent AS running_bytes "
+            "FROM responses WINDOW recent AS (ORDER BY last_used DESC, key)"
+            ") WHERE position > ? OR running_bytes > ?)",
+            (self.max_entries, self.max_bytes)
+        ).rowcount
+        if expired:
+            metrics.increment('response_cache_expired', expired)
+        if evicted:
+            metrics.increment('response_cache_evictions', evicted)
+
+    def _join(self, key):
+        # (future, leader): the leader generates the answer, the others wait on its future
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+        if leader:
+            self._record(hit=False)
+        else:
+            metrics.increment('response_cache_coalesced')
+            logger.info(f"Waiting for in-flight answer {key[:12]}")
+        return future, leader
+
+    def _leave(self, key):
+        with self._lock:
+            self._in_flight.pop(key, None)
+
+    def _record(self, hit):
+        metrics.increment('response_cache_hits' if hit else 'response_cache_misses')
+        hits = metrics.get_counter('response_cache_hits')
+        misses = metrics.get_counter('response_cache_misses')
+        metrics.set_gauge('response_cache_hit_ratio', hits / (hits + misses))
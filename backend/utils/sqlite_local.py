@@ -0,0 +1,20 @@
+# utils/sqlite_local.py
+
+import sqlite3
+import threading
+
+class ThreadConnections:
+    """
+    sqlite3 connections to one database file, one per thread: a connection can't be shared
+    between threads, so each thread opens its own on first use and keeps it.
+    """
+    def __init__(self, path, timeout=5):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=self.timeout)
+        return connection
@@ -0,0 +1,140 @@
+# utils/transcription_cache.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+import metrics
+from utils.sqlite_local import ThreadConnections
+
+logger = logging.getLogger('background_tasks')
+
+def audio_key(audio, variant=''):
+    """
+    Cache key for decoded audio: a hash of the samples themselves, so a re-uploaded clip
+    matches whatever its filename is, plus variant (the decoding profile and model size).
+    """
+    digest = hashlib.sha256(audio.tobytes())
+    digest.update(variant.encode('utf-8'))
+    return digest.hexdigest()
+
+class TranscriptionCache:
+    """
+    Transcripts by audio hash, in an LRU kept in memory and, with a path, a SQLite file shared
+    by the workers on the host. Concurrent calls for the same audio wait for one transcription.
+    """
+    def __init__(self, max_entries=1024, max_bytes=4 * 1024 * 1024, path=None, disk_entries=10000):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = path
+        self.disk_entries = disk_entries
+        self._entries = OrderedDict()  # key -> (text, model_size)
+        self._bytes = 0
+        self._in_flight = {}  # key -> Future of (text, model_size)
+        self._lock = threading.Lock()
+        self._connections = ThreadConnections(path) if path else None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with self._connections.get() as connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS transcripts ("
+                    "key TEXT PRIMARY KEY, text TEXT NOT NULL, model_size TEXT, last_used REAL NOT NULL)"
+                )
+
+    def get_or_transcribe(self, audio, transcribe, variant=''):
+        """
+        Return (text, model_size) for 16 kHz mono float32 samples, calling transcribe(audio)
+        only when neither the cache nor a concurrent call already has the transcript for the
+        same audio and variant.
+        """
+        key = audio_key(audio, variant)
+        with self._lock:
+            entry = self._get_memory(key)
+            if entry is None:
+                future = self._in_flight.get(key)
+                leader = future is None
+                if leader:
+                    future = self._in_flight[key] = Future()
+        if entry is not None:
+            metrics.increment('transcript_cache_hits')
+            return entry
+
+        if not leader:
+            metrics.increment('transcript_cache_coalesced')
+            logger.info(f"Waiting for in-flight transcription of audio {key[:12]}")
+            return future.result()
+
+        try:
+            entry = self._get_disk(key)
+            if entry is not None:
+                metrics.increment('transcript_cache_disk_hits')
+            else:
+                metrics.increment('transcript_cache_misses')
+                entry = transcribe(audio)
+                self._put_disk(key, entry)
+            with self._lock:
+                self._put_memory(key, entry)
+            future.set_result(entry)
+            return entry
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'in_flight': len(self._in_flight)}
+
+    def _get_memory(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _put_memory(self, key, entry):
+        if key in self._entries:
+            return
+        self._entries[key] = entry
+        self._bytes += len(entry[0].encode('utf-8'))
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (text, _) = self._entries.popitem(last=False)
+            self._bytes -= len(text.encode('utf-8'))
+            metrics.increment('transcript_cache_evictions')
+        metrics.set_gauge('transcript_cache_entries', len(self._entries))
+
+    def _get_disk(self, key):
+        if not self.path:
+            return None
+        try:
+            with self._connections.get() as connection:
+                row = connection.execute("SELECT text, model_size FROM transcripts WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    connection.execute("UPDATE transcripts SET last_used = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            logger.warning(f"Transcription cache read failed: {e}")
+            return None
+        return tuple(row) if row is not None else None
+
+    def _put_disk(self, key, entry):
+        if not self.path:
+            return
+        text, model_size = entry
+        try:
+            with self._connections.get() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO transcripts (key, text, model_size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, text, model_size, time.time())
+                )
+                connection.execute(
+                    "DELETE FROM transcripts WHERE key NOT IN "
+                    "(SELECT key FROM transcripts ORDER BY last_used DESC LIMIT ?)",
+                    (self.disk_entries,)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Transcription cache write failed: {e}")
@@ -0,0 +1,184 @@
+# utils/tts_streaming.py
+
+import asyncio
+import io
+import re
+import threading
+import time
+import logging
+from concurrent.futures import Future
+import metrics
+
+logger = logging.getLogger('background_tasks')
+
+# Words whose period does not end the sentence ("Dr. Patel", "at 8 a.m. and 6 p.m.")
+ABBREVIATIONS = {'dr', 'mr', 'mrs', 'ms', 'st', 'jr', 'sr', 'prof', 'vs', 'no', 'e.g', 'i.e', 'a.m', 'p.m'}
+
+# Sentence-ending punctuation and any closing quotes or brackets, once the whitespace after
+# them has arrived, or a line break
+_BOUNDARY = re.compile(r'[.!?]+["\')\]]*\s+|\n+')
+
+def synthesize_speech(text, lang='en'):
+    """
+    MP3 bytes of text spoken with gTTS.
+    """
+    from gtts import gTTS
+
+    buffer = io.BytesIO()
+    gTTS(text=text, lang=lang).write_to_fp(buffer)
+    return buffer.getvalue()
+
+class SentenceSplitter:
+    """
+    Cuts text that arrives in pieces, such as streamed chat tokens, into sentences as soon as
+    each one is complete. A period only ends a sentence once the whitespace after it has
+    arrived ("3." may still become "3.5"), and not after an abbreviation, an initial or a list
+    number. Text running past max_chars without a boundary is cut at its last comma or space,
+    so a long sentence does not hold back the audio.
+    """
+    def __init__(self, max_chars=200):
+        self.max_chars = max_chars
+        self._buffer = ''
+
+    def feed(self, text):
+        """
+        Add a piece of text. Returns the sentences it completed.
+        """
+        self._buffer += text
+        sentences = []
+        start = 0
+        for boundary in _BOUNDARY.finditer(self._buffer):
+            if self._buffer[boundary.start()] == '.' and self._continues(self._buffer[start:boundary.start()]):
+                continue
+            sentence = self._buffer[start:boundary.end()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = boundary.end()
+        self._buffer = self._buffer[start:]
+
+        while len(self._buffer) > self.max_chars:
+            cut = max(self._buffer.rfind(mark, 0, self.max_chars) for mark in (', ', '; ', ': '))
+            if cut <= 0:
+                cut = self._buffer.rfind(' ', 0, self.max_chars)
+            if cut <= 0:
+                cut = self.max_chars
+            sentences.append(self._buffer[:cut + 1].strip())
+            self._buffer = self._buffer[cut + 1:]
+        return sentences
+
+    def flush(self):
+        """
+        The text left after the last boundary, as a final sentence.
+        """
+        sentence, self._buffer = self._buffer.strip(), ''
+        return [sentence] if sentence else []
+
+    def _continues(self, text):
+        words = text.split()
+        if not words:
+            return False
+        last = words[-1].lower().strip('"\'(').rstrip('.')
+        return (last in ABBREVIATIONS
+                or (len(last) == 1 and last.isalpha())  # An initial, "J. Smith"
+                or (len(words) == 1 and last.isdigit()))  # A list number, "1. Take ..."
+
+class SpokenAnswer:
+    """
+    Audio for an answer written to path sentence by sentence, each synthesized on executor as
+    soon as it is complete. on_first_audio(seconds) is called once the first sentence is in the file.
+    """
+    def __init__(self, path, executor, synthesize=synthesize_speech, on_first_audio=None):
+        self.path = path
+        self.first_audio_seconds = None
+        self._executor = executor
+        self._synthesize = synthesize
+        self._on_first_audio = on_first_audio
+        self._splitter = SentenceSplitter()
+        self._parts = []  # Futures of the sentences' audio, in answer order
+        self._written = 0
+        self._all_written = Future()  # Set once the answer is complete and every sentence written
+        self._closed = False
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def feed(self, text):
+        for sentence in self._splitter.feed(text):
+            self._submit(sentence)
+
+    def finish(self, timeout=None):
+        """
+        Synthesize what is left of the answer and wait until every sentence is written, for
+        at most timeout seconds in all. Raises the first synthesis error, or TimeoutError.
+        Returns path.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining():
+            return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+        try:
+            for future in self._close():
+                future.result(remaining())
+            # The last sentences may still be being written by their done callbacks
+            self._all_written.result(remaining())
+        except TimeoutError:
+            raise TimeoutError(f"Speech for {self.path} not ready after {timeout}s") from None
+        return self.path
+
+    async def finish_async(self, timeout=None):
+        """
+        finish for coroutines: waits without holding a thread.
+        """
+        async def written():
+            await asyncio.gather(*(asyncio.wrap_future(future) for future in self._close()))
+            await asyncio.wrap_future(self._all_written)
+
+        try:
+            await asyncio.wait_for(written(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Speech for {self.path} not ready after {timeout}s") from None
+        return self.path
+
+    def _close(self):
+        for sentence in self._splitter.flush():
+            self._submit(sentence)
+        with self._lock:
+            if not self._parts:
+                raise ValueError("No text to speak.")
+            self._closed = True
+            if self._written == len(self._parts) and not self._all_written.done():
+                self._all_written.set_result(None)
+            return list(self._parts)
+
+    def _submit(self, sentence):
+        future = self._executor.submit(self._timed_synthesize, sentence)
+        with self._lock:
+            self._parts.append(future)
+        future.add_done_callback(self._write_ready)
+
+    def _timed_synthesize(self, sentence):
+        started = time.perf_counter()
+        audio = self._synthesize(sentence)
+        metrics.observe('tts_sentence_seconds', time.perf_counter() - started)
+        return audio
+
+    def _write_ready(self, _):
+        # Write every finished sentence whose predecessors are all written
+        first = False
+        with self._lock:
+            while self._written < len(self._parts) and self._parts[self._written].done():
+                future = self._parts[self._written]
+                if future.exception() is not None:
+                    return  # finish() raises it
+                with open(self.path, 'ab' if self._written else 'wb') as f:
+                    f.write(future.result())
+                self._written += 1
+                if self._written == 1:
+                    self.first_audio_seconds = time.perf_counter() - self._started
+                    first = True
+            if self._closed and self._written == len(self._parts) and not self._all_written.done():
+                self._all_written.set_result(None)
+        if first:
+            metrics.observe('answer_first_audio_seconds', self.first_audio_seconds)
+            if self._on_first_audio:
+                self._on_first_audio(self.first_audio_seconds)
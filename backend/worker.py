@@ -0,0 +1,171 @@
+# backend/worker.py
+#
+# Standalone audio processing worker. Run from the repository root with
+#
+#     python -m backend.worker --processes 4
+#
+# Each process runs an AudioWorkerPool, which claims tasks from the durable queue in the
+# tasks table and runs them through the processing pipeline, so the Flask API (started with
+# EMBEDDED_AUDIO_WORKERS=false) never loads Whisper itself.
+#
+# In prefork mode (the default where fork is available) the parent loads the model once
+# and forks the workers, which then share the weight pages copy-on-write instead of each
+# holding a private copy. The weights are memory-mapped from the model store
+# (MODEL_STORE_DIR), so without prefork the workers still share them through the page
+# cache. The parent logs the memory of every worker periodically.
+
+import os
+import sys
+
+# The backend modules use flat imports (from extensions import db), as when running app.py
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import gc
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+from config import Config
+
+logger = logging.getLogger('background_tasks')
+
+def run_worker(threads, io_threads, processes=1):
+    """
+    Run one worker process until SIGTERM/SIGINT, then finish in-flight tasks and exit.
+    processes is the number of worker processes sharing the machine's cores for ASR.
+    """
+    from app import create_app
+    from extensions import db
+    from background_tasks import AudioWorkerPool
+    from task_queue import upgrade_schema
+    from health import run_warmup, WARMUP_CHECKS
+
+    app = create_app()
+    app.config['ASR_PROCESSES'] = processes
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+
+    # Warm up (database, model and TTS) before claiming anything, so the first task is not
+    # slowed down and a worker that can't process tasks doesn't take them and fail them.
+    # In prefork mode the model was already loaded by the parent.
+    if not run_warmup(app, list(WARMUP_CHECKS), stop):
+        return
+
+    pool = AudioWorkerPool(app, max_workers=threads, io_workers=io_threads)
+    pool.start()
+    stop.wait()
+
+    logger.info(f"Worker {pool.worker_id} shutting down")
+    pool.stop()
+
+def process_memory(pid):
+    """
+    Memory of a process in bytes from /proc: rss, and where the kernel reports it, pss
+    (shared pages split between the processes using them), shared and private.
+    Returns None when /proc is not available.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            lines = f.read().splitlines()[1:]  # The first line is the address range header
+        fields = dict(line.split(':', 1) for line in lines if ':' in line)
+    except OSError:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                fields = dict(line.split(':', 1) for line in f if ':' in line)
+            return {'rss': int(fields['VmRSS'].split()[0]) * 1024}
+        except (OSError, KeyError):
+            return None
+
+    def kb(*names):
+        return sum(int(fields[name].split()[0]) for name in names if name in fields) * 1024
+
+    return {
+        'rss': kb('Rss'),
+        'pss': kb('Pss'),
+        'shared': kb('Shared_Clean', 'Shared_Dirty'),
+        'private': kb('Private_Clean', 'Private_Dirty')
+    }
+
+def log_memory_report(processes):
+    """
+    Log the memory of this process and of every worker, in MiB.
+    """
+    rows = [('parent', os.getpid())] + [(process.name, process.pid) for process in processes if process.is_alive()]
+    for name, pid in rows:
+        memory = process_memory(pid)
+        if memory is None:
+            logger.info(f"Memory report not available for {name} (pid {pid})")
+            continue
+        logger.info(f"Memory {name} (pid {pid}): " +
+                    ', '.join(f"{key} {value / 2 ** 20:.1f} MiB" for key, value in memory.items()))
+
+def main():
+    parser = argparse.ArgumentParser(description='NurseAI audio processing worker')
+    parser.add_argument('--processes', type=int, default=Config.WORKER_PROCESSES,
+                        help='number of worker processes to run (default: one per core)')
+    parser.add_argument('--threads', type=int, default=Config.WORKER_THREADS,
+                        help='threads per CPU stage (decode, ASR) in each process')
+    parser.add_argument('--io-threads', type=int, default=Config.AUDIO_IO_WORKERS,
+                        help='threads per network stage (LLM, TTS) in each process when IO_ENGINE_ENABLED is off')
+    parser.add_argument('--prefork', action=argparse.BooleanOptionalAction, default=Config.WORKER_PREFORK,
+                        help='load the model once and fork workers that share its memory')
+    parser.add_argument('--memory-report', type=int, default=Config.WORKER_MEMORY_REPORT_SECONDS,
+                        help='seconds between per-worker memory reports, 0 to disable')
+    args = parser.parse_args()
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(processName)s]: %(message)s'))
+    logger.addHandler(console_handler)
+    logger.setLevel(logging.INFO)
+
+    if args.processes <= 1:
+        run_worker(args.threads, args.io_threads)
+        return
+
+    context = multiprocessing.get_context()
+    if args.prefork:
+        if 'fork' in multiprocessing.get_all_start_methods():
+            from background_tasks import get_model
+
+            context = multiprocessing.get_context('fork')
+            get_model()
+            # Move everything allocated so far out of the garbage collector's reach, so collections
+            # in the workers don't write to (and un-share) the pages holding these objects
+            gc.freeze()
+        else:
+            logger.warning("Prefork needs the fork start method; every worker will load its own model")
+
+    processes = [
+        context.Process(target=run_worker, args=(args.threads, args.io_threads, args.processes), name=f"worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"Started {args.processes} worker processes with {args.threads} CPU and {args.io_threads} I/O threads per stage"
+                f"{' (prefork)' if context.get_start_method() == 'fork' and args.prefork else ''}")
+
+    def shutdown(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()  # Delivers SIGTERM, workers finish their current task
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # First report once the workers are up, then every --memory-report seconds
+    next_report = time.monotonic() + min(args.memory_report, 30)
+    while any(process.is_alive() for process in processes):
+        time.sleep(1)
+        if args.memory_report and time.monotonic() >= next_report:
+            log_memory_report(processes)
+            next_report = time.monotonic() + args.memory_report
+
+if __name__ == '__main__':
+    main()